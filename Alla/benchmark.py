@@ -0,0 +1,166 @@
+# benchmark.py
+"""
+banc d'essai du placement d'ambulances.
+
+Génère des instances synthétiques reproductibles, mesure séparément le calcul
+de la couverture, la construction du modèle et la résolution (modes entier et
+binaire) et écrit un rapport JSON.
+
+    python -m Alla.benchmark --sites 200 1000 --zones 2000 --radii 3 5 \\
+        --budgets 20 50 --output bench_placement.json
+"""
+import argparse
+import itertools
+import json
+import platform
+import time
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import gurobipy as gp
+import numpy as np
+
+from Alla.data.columns import ColumnTable
+from Alla.model.coverage import build_coverage
+from Alla.model.optimizer import build_model, solve_status
+
+
+def generate_instance(n_sites: int, n_zones: int, layout: str = 'uniform',
+                      size: float = 50.0, seed: int = 0) -> Tuple[ColumnTable, ColumnTable]:
+    """
+    génère une instance synthétique reproductible.
+
+    Args:
+        n_sites: Nombre de sites candidats (uniformes sur le carré)
+        n_zones: Nombre de zones de demande
+        layout: 'uniform' (zones uniformes) ou 'clustered' (zones groupées
+                autour de quelques centres urbains)
+        size: Côté du carré en kilomètres
+        seed: Graine du générateur aléatoire
+
+    Returns:
+        (sites, zones) sous forme de ColumnTable
+    """
+    rng = np.random.default_rng(seed)
+
+    sites = ColumnTable({
+        'name': np.array([f"Site_{i + 1}" for i in range(n_sites)], dtype=object),
+        'x': rng.uniform(0, size, n_sites),
+        'y': rng.uniform(0, size, n_sites),
+        'capacity': rng.integers(0, 4, n_sites),
+    })
+
+    if layout == 'clustered':
+        n_centers = max(1, n_zones // 500)
+        centers = rng.uniform(0.1 * size, 0.9 * size, (n_centers, 2))
+        owner = rng.integers(0, n_centers, n_zones)
+        xy = centers[owner] + rng.normal(0, size / 20, (n_zones, 2))
+        xy = np.clip(xy, 0, size)
+    elif layout == 'uniform':
+        xy = rng.uniform(0, size, (n_zones, 2))
+    else:
+        raise ValueError(f"Disposition inconnue : {layout}")
+
+    zones = ColumnTable({
+        'name': np.array([f"Zone_{j + 1}" for j in range(n_zones)], dtype=object),
+        'x': xy[:, 0],
+        'y': xy[:, 1],
+        'population': rng.integers(100, 10000, n_zones),
+        'priority': rng.integers(1, 4, n_zones),
+    })
+    return sites, zones
+
+
+def run_case(sites, zones, max_distance: float, total_ambulances: int, mode: str,
+             time_limit: float, env) -> Dict:
+    """mesure couverture, construction et résolution pour un point"""
+    t0 = time.perf_counter()
+    coverage = build_coverage(sites, zones, max_distance)
+    t1 = time.perf_counter()
+    model, x, k, z = build_model(sites, zones, coverage, total_ambulances, mode, env=env)
+    model.Params.TimeLimit = time_limit
+    model.update()
+    t2 = time.perf_counter()
+    model.optimize()
+    t3 = time.perf_counter()
+
+    result = {
+        'coverage_pairs': coverage.nnz,
+        'num_vars': model.NumVars,
+        'num_constrs': model.NumConstrs,
+        'num_nonzeros': model.NumNZs,
+        'coverage_s': round(t1 - t0, 6),
+        'build_s': round(t2 - t1, 6),
+        'solve_s': round(t3 - t2, 6),
+        'status': solve_status(model),
+        'objective': model.ObjVal if model.SolCount > 0 else None,
+        'mip_gap': model.MIPGap if model.SolCount > 0 else None,
+        'nodes': model.NodeCount,
+    }
+    model.dispose()
+    return result
+
+
+def run_benchmark(site_counts: List[int], zone_counts: List[int], layouts: List[str],
+                  radii: List[float], budgets: List[int], modes: List[str],
+                  seed: int = 0, time_limit: float = 30.0, threads: int = 0) -> Dict:
+    """exécute toute la grille et retourne le rapport"""
+    cases = []
+    with gp.Env(params={'OutputFlag': 0, 'Threads': threads}) as env:
+        for n_sites, n_zones, layout in itertools.product(site_counts, zone_counts, layouts):
+            sites, zones = generate_instance(n_sites, n_zones, layout, seed=seed)
+            for max_distance, budget, mode in itertools.product(radii, budgets, modes):
+                case = {
+                    'n_sites': n_sites,
+                    'n_zones': n_zones,
+                    'layout': layout,
+                    'max_distance': max_distance,
+                    'total_ambulances': budget,
+                    'mode': mode,
+                }
+                try:
+                    case.update(run_case(sites, zones, max_distance, budget, mode, time_limit, env))
+                except gp.GurobiError as e:
+                    case['error'] = str(e)
+                print(f"{layout:9} sites={n_sites:<6} zones={n_zones:<7} r={max_distance:<5} "
+                      f"b={budget:<4} {mode:8} "
+                      + (f"cov={case['coverage_s']:.3f}s build={case['build_s']:.3f}s "
+                         f"solve={case['solve_s']:.3f}s" if 'error' not in case else case['error']))
+                cases.append(case)
+
+    return {
+        'benchmark': 'ambulance_placement',
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'gurobi': '.'.join(map(str, gp.gurobi.version())),
+        'seed': seed,
+        'time_limit': time_limit,
+        'cases': cases,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Banc d'essai du placement d'ambulances")
+    parser.add_argument('--sites', type=int, nargs='+', default=[100, 500])
+    parser.add_argument('--zones', type=int, nargs='+', default=[1000, 5000])
+    parser.add_argument('--layouts', nargs='+', default=['uniform', 'clustered'],
+                        choices=['uniform', 'clustered'])
+    parser.add_argument('--radii', type=float, nargs='+', default=[3.0, 6.0])
+    parser.add_argument('--budgets', type=int, nargs='+', default=[20, 50])
+    parser.add_argument('--modes', nargs='+', default=['entier', 'binaire'],
+                        choices=['entier', 'binaire', 'mexclp'])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--time-limit', type=float, default=30.0)
+    parser.add_argument('--threads', type=int, default=0)
+    parser.add_argument('--output', default='bench_placement.json')
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.sites, args.zones, args.layouts, args.radii, args.budgets,
+                           args.modes, args.seed, args.time_limit, args.threads)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Rapport écrit dans {args.output} ({len(report['cases'])} cas)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
 from .parser import parse_table_sites, parse_table_zones
+from .columns import ColumnTable
+from .loader import load_sites, load_zones
 
-__all__ = ["parse_table_sites", "parse_table_zones"]
\ No newline at end of file
+__all__ = ["parse_table_sites", "parse_table_zones", "ColumnTable", "load_sites", "load_zones"]
\ No newline at end of file
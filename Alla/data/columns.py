@@ -0,0 +1,65 @@
+# data/columns.py
+from typing import Dict, Sequence, Union
+
+import numpy as np
+
+
+class ColumnTable:
+    """
+    table en colonnes NumPy (une entrée par site ou par zone).
+
+    Se comporte comme une liste de dictionnaires en lecture (len, indexation,
+    itération) pour rester compatible avec le code existant, mais expose les
+    colonnes complètes pour les calculs vectorisés.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+        lengths = {len(col) for col in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"Colonnes de longueurs différentes : {sorted(lengths)}")
+        self._length = lengths.pop() if lengths else 0
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, row: int) -> Dict:
+        if row < 0:
+            row += self._length
+        if not 0 <= row < self._length:
+            raise IndexError(row)
+        return {name: col[row].item() if hasattr(col[row], 'item') else col[row]
+                for name, col in self.columns.items()}
+
+    def __iter__(self):
+        for row in range(self._length):
+            yield self[row]
+
+    def column_names(self):
+        return list(self.columns)
+
+    def __repr__(self):
+        return f"ColumnTable(rows={self._length}, columns={self.column_names()})"
+
+
+Records = Union[Sequence[Dict], ColumnTable]
+
+
+def column(items: Records, name: str, default=0, dtype=float) -> np.ndarray:
+    """
+    extrait une colonne sous forme de tableau NumPy.
+
+    Args:
+        items: Liste de dictionnaires ou ColumnTable
+        name: Nom de la colonne ('x', 'population', ...)
+        default: Valeur utilisée si la clé est absente
+        dtype: Type du tableau retourné
+
+    Returns:
+        Tableau NumPy de longueur len(items)
+    """
+    if isinstance(items, ColumnTable):
+        if name in items.columns:
+            return np.asarray(items.columns[name], dtype=dtype)
+        return np.full(len(items), default, dtype=dtype)
+    return np.array([item.get(name, default) for item in items], dtype=dtype)
@@ -0,0 +1,79 @@
+# data/loader.py
+import os
+
+import numpy as np
+
+from Alla.data.columns import ColumnTable
+
+
+def _read_frame(path: str):
+    #pandas n'est nécessaire que pour l'import de fichiers
+    import pandas as pd
+
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.parquet', '.pq'):
+        df = pd.read_parquet(path)
+    elif ext == '.csv':
+        df = pd.read_csv(path)
+    else:
+        raise ValueError(f"Format non supporté : {ext} (CSV ou Parquet attendu)")
+
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    missing = [c for c in ('name', 'x', 'y') if c not in df.columns]
+    if missing:
+        raise ValueError(f"Colonnes manquantes dans {os.path.basename(path)} : {', '.join(missing)}")
+
+    #mêmes règles que le parseur : lignes sans nom ignorées
+    df['name'] = df['name'].fillna('').astype(str).str.strip()
+    return df[df['name'] != ''].reset_index(drop=True)
+
+
+def _numeric(df, name: str, default, dtype):
+    import pandas as pd
+
+    if name not in df.columns:
+        return np.full(len(df), default, dtype=dtype)
+    return pd.to_numeric(df[name], errors='coerce').fillna(default).to_numpy(dtype=dtype)
+
+
+def load_sites(path: str) -> ColumnTable:
+    """
+    charge les sites depuis un fichier CSV ou Parquet.
+    Colonnes : name, x, y et capacity (optionnelle, 0 = illimitée)
+
+    Args:
+        path: Chemin du fichier
+
+    Returns:
+        ColumnTable avec les colonnes name, x, y, capacity
+    """
+    df = _read_frame(path)
+    capacity = _numeric(df, 'capacity', 0, np.int64)
+    return ColumnTable({
+        'name': df['name'].to_numpy(dtype=object),
+        'x': _numeric(df, 'x', 0.0, float),
+        'y': _numeric(df, 'y', 0.0, float),
+        'capacity': np.maximum(capacity, 0),
+    })
+
+
+def load_zones(path: str) -> ColumnTable:
+    """
+    charge les zones depuis un fichier CSV ou Parquet.
+    Colonnes : name, x, y, population et priority (optionnelle, par défaut = 1)
+
+    Args:
+        path: Chemin du fichier
+
+    Returns:
+        ColumnTable avec les colonnes name, x, y, population, priority
+    """
+    df = _read_frame(path)
+    priority = _numeric(df, 'priority', 1, np.int64)
+    return ColumnTable({
+        'name': df['name'].to_numpy(dtype=object),
+        'x': _numeric(df, 'x', 0.0, float),
+        'y': _numeric(df, 'y', 0.0, float),
+        'population': np.maximum(_numeric(df, 'population', 0, np.int64), 0),
+        'priority': np.where(priority > 0, priority, 1),
+    })
@@ -1,10 +1,49 @@
 # main.py
 import sys
+import threading
+from PyQt5.QtCore import QThread, pyqtSignal
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QMessageBox,
-                             QTableWidgetItem, QHeaderView)
+                             QTableWidgetItem, QHeaderView, QPushButton,
+                             QTableView, QFileDialog)
 import Alla.ui.ui_placement
 from Alla.model.optimizer import optimize_placement
 from Alla.data.parser import parse_table_sites, parse_table_zones
+from Alla.data.loader import load_sites, load_zones
+from Alla.model.road_network import load_road_graph
+from Alla.ui.column_table_model import ColumnTableModel
+
+
+class OptimizerWorker(QThread):
+    """Résout le placement hors du thread graphique"""
+    progress = pyqtSignal(dict)
+    result_ready = pyqtSignal(dict, dict)
+    error_signal = pyqtSignal(str)
+    cancelled = pyqtSignal(str)
+
+    def __init__(self, sites, zones, total_ambulances, max_distance, mode, road_graph=None):
+        super().__init__()
+        self.args = (sites, zones, total_ambulances, max_distance, mode)
+        self.road_graph = road_graph
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        """Demande l'arrêt : Gurobi s'interrompt et garde la meilleure solution"""
+        self.cancel_event.set()
+
+    def run(self):
+        try:
+            placement, stats = optimize_placement(*self.args,
+                                                  progress=self.progress.emit,
+                                                  cancel=self.cancel_event,
+                                                  road_graph=self.road_graph)
+            if 'error' in stats and stats.get('status') == 'interrompu':
+                self.cancelled.emit(stats['error'])
+            elif 'error' in stats:
+                self.error_signal.emit(stats['error'])
+            else:
+                self.result_ready.emit(placement, stats)
+        except Exception as e:
+            self.error_signal.emit(str(e))
 
 
 class MainWindow(QMainWindow):
@@ -16,6 +55,19 @@ class MainWindow(QMainWindow):
         #configuration des tableaux
         self.setup_tables()
 
+        #bouton d'annulation (à côté du bouton d'optimisation)
+        self.setup_cancel_button()
+        self.worker = None
+
+        #import de fichiers : données en colonnes affichées dans une vue paginée
+        self.imported_sites = None
+        self.imported_zones = None
+        self.setup_import_buttons()
+
+        #réseau routier optionnel : couverture par temps de parcours
+        self.road_graph = None
+        self.setup_road_button()
+
         #connexion des signaux
         self.connect_signals()
 
@@ -39,10 +91,40 @@ class MainWindow(QMainWindow):
         #zone de resultats en lecture seule
         self.ui.textResults.setReadOnly(True)
 
+    def setup_cancel_button(self):
+        self.btnCancel = QPushButton("ANNULER", self.ui.scrollAreaWidgetContents)
+        self.btnCancel.setObjectName("btnCancel")
+        self.btnCancel.setToolTip("Arrête la résolution et garde la meilleure solution trouvée")
+        self.btnCancel.setEnabled(False)
+        layout = self.ui.verticalLayout_main
+        layout.insertWidget(layout.indexOf(self.ui.btnOptimize) + 1, self.btnCancel)
+
+    def setup_import_buttons(self):
+        self.btnImportSites = QPushButton("📂 Importer (CSV/Parquet)", self.ui.groupSites)
+        self.btnImportSites.setToolTip("Colonnes : name, x, y, capacity")
+        self.ui.layout_buttons_sites.addWidget(self.btnImportSites)
+        self.viewSites = QTableView(self.ui.groupSites)
+        self.viewSites.setVisible(False)
+        self.ui.verticalLayout_sites.insertWidget(1, self.viewSites)
+
+        self.btnImportZones = QPushButton("📂 Importer (CSV/Parquet)", self.ui.groupZones)
+        self.btnImportZones.setToolTip("Colonnes : name, x, y, population, priority")
+        self.ui.layout_buttons_zones.addWidget(self.btnImportZones)
+        self.viewZones = QTableView(self.ui.groupZones)
+        self.viewZones.setVisible(False)
+        self.ui.verticalLayout_zones.insertWidget(1, self.viewZones)
+
+    def setup_road_button(self):
+        self.btnRoadGraph = QPushButton("🛣️ Réseau routier…", self.ui.groupParameters)
+        self.btnRoadGraph.setToolTip("Fichier CSV de tronçons (x1, y1, x2, y2, time, oneway).\n"
+                                     "La distance max devient un temps de parcours max.")
+        self.ui.gridLayoutParameters.addWidget(self.btnRoadGraph, 1, 2, 1, 2)
+
     def connect_signals(self):
         """Connecte tous les signaux aux slots"""
         #bouton d'optimisation
         self.ui.btnOptimize.clicked.connect(self.run_optimizer)
+        self.btnCancel.clicked.connect(self.cancel_optimizer)
 
         #boutons pour les sites
         self.ui.btnAddSite.clicked.connect(self.add_site_row)
@@ -52,6 +134,11 @@ class MainWindow(QMainWindow):
         self.ui.btnAddZone.clicked.connect(self.add_zone_row)
         self.ui.btnRemoveZone.clicked.connect(self.remove_zone_row)
 
+        #import de fichiers
+        self.btnImportSites.clicked.connect(self.import_sites)
+        self.btnImportZones.clicked.connect(self.import_zones)
+        self.btnRoadGraph.clicked.connect(self.toggle_road_graph)
+
     def add_site_row(self):
         """Ajoute une nouvelle ligne dans le tableau des sites"""
         row_count = self.ui.tableSites.rowCount()
@@ -97,6 +184,106 @@ class MainWindow(QMainWindow):
         else:
             QMessageBox.warning(self, "Attention", "Veuillez sélectionner une ligne à supprimer")
 
+    def _show_imported(self, table_widget, view, table, keys):
+        """Remplace le QTableWidget par une vue paginée sur les données importées"""
+        headers = [(key, table_widget.horizontalHeaderItem(c).text())
+                   for c, key in enumerate(keys)]
+        view.setModel(ColumnTableModel(table, headers, view))
+        view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        view.setAlternatingRowColors(True)
+        view.setMinimumHeight(table_widget.minimumHeight())
+        view.setMaximumHeight(table_widget.maximumHeight())
+        table_widget.setVisible(False)
+        view.setVisible(True)
+
+    def _show_manual(self, table_widget, view):
+        """Revient au QTableWidget de saisie (les données importées sont oubliées)"""
+        view.setVisible(False)
+        view.setModel(None)
+        table_widget.setVisible(True)
+
+    def clear_imported_sites(self):
+        self.imported_sites = None
+        self._show_manual(self.ui.tableSites, self.viewSites)
+        self.btnImportSites.setText("📂 Importer (CSV/Parquet)")
+        self.ui.btnAddSite.setEnabled(True)
+        self.ui.btnRemoveSite.setEnabled(True)
+
+    def clear_imported_zones(self):
+        self.imported_zones = None
+        self._show_manual(self.ui.tableZones, self.viewZones)
+        self.btnImportZones.setText("📂 Importer (CSV/Parquet)")
+        self.ui.btnAddZone.setEnabled(True)
+        self.ui.btnRemoveZone.setEnabled(True)
+
+    def _open_data_file(self, title):
+        path, _ = QFileDialog.getOpenFileName(self, title, "",
+                                              "Données (*.csv *.parquet *.pq)")
+        return path
+
+    def import_sites(self):
+        """Charge les sites depuis un fichier CSV ou Parquet, ou revient à la saisie"""
+        if self.imported_sites is not None:
+            self.clear_imported_sites()
+            self.statusBar().showMessage("Saisie manuelle des sites rétablie", 3000)
+            return
+        path = self._open_data_file("Importer les sites")
+        if not path:
+            return
+        try:
+            self.imported_sites = load_sites(path)
+        except Exception as e:
+            QMessageBox.critical(self, "Erreur d'import", str(e))
+            return
+        self._show_imported(self.ui.tableSites, self.viewSites, self.imported_sites,
+                            ['name', 'x', 'y', 'capacity'])
+        self.btnImportSites.setText("✏️ Revenir à la saisie")
+        self.ui.btnAddSite.setEnabled(False)
+        self.ui.btnRemoveSite.setEnabled(False)
+        self.statusBar().showMessage(f"{len(self.imported_sites)} sites importés", 5000)
+
+    def import_zones(self):
+        """Charge les zones depuis un fichier CSV ou Parquet, ou revient à la saisie"""
+        if self.imported_zones is not None:
+            self.clear_imported_zones()
+            self.statusBar().showMessage("Saisie manuelle des zones rétablie", 3000)
+            return
+        path = self._open_data_file("Importer les zones")
+        if not path:
+            return
+        try:
+            self.imported_zones = load_zones(path)
+        except Exception as e:
+            QMessageBox.critical(self, "Erreur d'import", str(e))
+            return
+        self._show_imported(self.ui.tableZones, self.viewZones, self.imported_zones,
+                            ['name', 'x', 'y', 'population', 'priority'])
+        self.btnImportZones.setText("✏️ Revenir à la saisie")
+        self.ui.btnAddZone.setEnabled(False)
+        self.ui.btnRemoveZone.setEnabled(False)
+        self.statusBar().showMessage(f"{len(self.imported_zones)} zones importées", 5000)
+
+    def toggle_road_graph(self):
+        """Charge un graphe routier, ou revient à la distance Euclidienne"""
+        if self.road_graph is not None:
+            self.road_graph = None
+            self.btnRoadGraph.setText("🛣️ Réseau routier…")
+            self.ui.labelMaxDist.setText("Distance Max de Couverture (km) :")
+            self.statusBar().showMessage("Couverture Euclidienne rétablie", 3000)
+            return
+        path, _ = QFileDialog.getOpenFileName(self, "Charger un réseau routier", "",
+                                              "Tronçons (*.csv)")
+        if not path:
+            return
+        try:
+            self.road_graph = load_road_graph(path)
+        except Exception as e:
+            QMessageBox.critical(self, "Erreur d'import", str(e))
+            return
+        self.btnRoadGraph.setText("🛣️ Retirer le réseau routier")
+        self.ui.labelMaxDist.setText("Temps Max de Parcours :")
+        self.statusBar().showMessage(f"Réseau routier chargé : {self.road_graph.n_nodes} nœuds", 5000)
+
     def load_example_data(self):
         """Charge des données d'exemple pour faciliter les tests"""
         # Exemple 1 : - Hôpital Centre couvre TOUTES les zones (5km max) et Base Est couvre B et E (zones peuplées)
@@ -145,7 +332,11 @@ class MainWindow(QMainWindow):
         ]"""
         #exemple 4: mm que exemple 1 mais rayon 3
 
-
+        #les exemples remplacent un éventuel import
+        if self.imported_sites is not None:
+            self.clear_imported_sites()
+        if self.imported_zones is not None:
+            self.clear_imported_zones()
 
         self.ui.tableSites.setRowCount(len(sites_data))
         for i, (name, x, y, cap) in enumerate(sites_data):
@@ -170,11 +361,19 @@ class MainWindow(QMainWindow):
         self.ui.spinMaxDistance.setValue(5.0)
 
     def run_optimizer(self):
-        """Lance l'optimisation et affiche les résultats"""
+        """Lance l'optimisation dans un thread séparé"""
+        if self.worker is not None and self.worker.isRunning():
+            return
         try:
-            #récupération des données
-            sites = parse_table_sites(self.ui.tableSites)
-            zones = parse_table_zones(self.ui.tableZones)
+            #récupération des données (fichier importé prioritaire sur la saisie)
+            if self.imported_sites is not None:
+                sites = self.imported_sites
+            else:
+                sites = parse_table_sites(self.ui.tableSites)
+            if self.imported_zones is not None:
+                zones = self.imported_zones
+            else:
+                zones = parse_table_zones(self.ui.tableZones)
             total_ambulances = self.ui.spinTotalAmbulances.value()
             max_distance = self.ui.spinMaxDistance.value()
 
@@ -182,6 +381,8 @@ class MainWindow(QMainWindow):
             mode_text = self.ui.comboModeDecision.currentText()
             if 'Binaire' in mode_text or 'binaire' in mode_text:
                 mode = 'binaire'
+            elif 'MEXCLP' in mode_text:
+                mode = 'mexclp'
             else:
                 mode = 'entier'
 
@@ -197,28 +398,69 @@ class MainWindow(QMainWindow):
             #message de progression
             self.ui.textResults.setText("Optimisation en cours...\n\nCalcul du placement optimal...")
             self.statusBar().showMessage("Optimisation en cours...")
-            QApplication.processEvents()  # Forcer la mise à jour de l'interface
-
-            #lancer l'optimisation
-            placement, stats = optimize_placement(sites, zones, total_ambulances,
-                                                  max_distance, mode)
 
-            #vérifier les erreurs
-            if 'error' in stats:
-                QMessageBox.critical(self, " Erreur d'optimisation", stats['error'])
-                self.ui.textResults.setText(f" ERREUR\n\n{stats['error']}")
-                self.statusBar().showMessage("Erreur d'optimisation", 5000)
-                return
+            #lancer l'optimisation en arrière-plan
+            self.run_params = (mode, max_distance, total_ambulances)
+            self.worker = OptimizerWorker(sites, zones, total_ambulances, max_distance, mode,
+                                          self.road_graph)
+            self.worker.progress.connect(self.show_progress)
+            self.worker.result_ready.connect(self.on_optimizer_result)
+            self.worker.error_signal.connect(self.on_optimizer_error)
+            self.worker.cancelled.connect(self.on_optimizer_cancelled)
+            self.worker.finished.connect(self.on_optimizer_finished)
+            self.ui.btnOptimize.setEnabled(False)
+            self.btnCancel.setEnabled(True)
+            self.worker.start()
 
-            #afficher les résultats
-            self.display_results(placement, stats, mode, max_distance, total_ambulances)
+        except Exception as e:
+            self.on_optimizer_error(f"Une erreur s'est produite:\n{str(e)}")
+
+    def cancel_optimizer(self):
+        """Interrompt la résolution en cours"""
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.cancel()
+            self.btnCancel.setEnabled(False)
+            self.statusBar().showMessage("Annulation en cours...")
+
+    def show_progress(self, info):
+        """Affiche la meilleure solution, la borne et l'écart dans la barre de statut"""
+        incumbent = info['incumbent']
+        best = f"{incumbent:,.0f}".replace(",", " ") if incumbent is not None else "—"
+        bound = f"{info['bound']:,.0f}".replace(",", " ")
+        gap = f"{info['gap'] * 100:.2f} %" if info['gap'] is not None else "—"
+        self.statusBar().showMessage(
+            f"Optimisation en cours ({info['runtime']:.0f} s) — meilleure solution : {best}"
+            f" | borne : {bound} | écart : {gap}")
+
+    def on_optimizer_result(self, placement, stats):
+        mode, max_distance, total_ambulances = self.run_params
+        self.display_results(placement, stats, mode, max_distance, total_ambulances)
+        if stats.get('status') == 'interrompu':
+            self.statusBar().showMessage("Optimisation annulée : meilleure solution trouvée affichée", 5000)
+        elif stats.get('status') == 'limite_temps':
+            self.statusBar().showMessage("Limite de temps atteinte : meilleure solution trouvée affichée", 5000)
+        else:
             self.statusBar().showMessage("Optimisation terminée avec succès!", 5000)
 
-        except Exception as e:
-            error_msg = f"Une erreur s'est produite:\n{str(e)}"
-            QMessageBox.critical(self, "Erreur", error_msg)
-            self.ui.textResults.setText(f"ERREUR\n\n{str(e)}")
-            self.statusBar().showMessage("Erreur", 5000)
+    def on_optimizer_error(self, message):
+        QMessageBox.critical(self, " Erreur d'optimisation", message)
+        self.ui.textResults.setText(f" ERREUR\n\n{message}")
+        self.statusBar().showMessage("Erreur d'optimisation", 5000)
+
+    def on_optimizer_cancelled(self, message):
+        self.ui.textResults.setText(f" ANNULÉ\n\n{message}")
+        self.statusBar().showMessage("Optimisation annulée", 5000)
+
+    def closeEvent(self, event):
+        """Arrête la résolution en cours avant de fermer (un QThread actif ne peut être détruit)"""
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.cancel()
+            self.worker.wait()
+        super().closeEvent(event)
+
+    def on_optimizer_finished(self):
+        self.ui.btnOptimize.setEnabled(True)
+        self.btnCancel.setEnabled(False)
 
     def display_results(self, placement, stats, mode, max_distance, total_ambulances):
         """Affichage moderne, clair et professionnel avec les vraies probabilités"""
@@ -230,7 +472,10 @@ class MainWindow(QMainWindow):
         add("RÉSULTATS DE L'OPTIMISATION PROBABILISTE")
         add("────────────────────────────────────────────────────────────────")
         add(f"  Mode               : {mode.capitalize()}")
-        add(f"  Distance maximale  : {max_distance:.1f} km")
+        if self.road_graph is not None:
+            add(f"  Temps de parcours  : {max_distance:.1f} (réseau routier)")
+        else:
+            add(f"  Distance maximale  : {max_distance:.1f} km")
         add(f"  Budget ambulances  : {total_ambulances}")
         add("")
 
@@ -253,6 +498,8 @@ class MainWindow(QMainWindow):
 
         # Taux global
         add(f"  Couverture moyenne attendue : {stats['coverage_percentage']}%")
+        if 'gap' in stats:
+            add(f"  Solution non prouvée optimale (écart {stats['gap'] * 100:.2f} %)")
         add("")
 
         # Détail par zone (les 10 plus importantes + résumé)
@@ -0,0 +1,97 @@
+# model/coverage.py
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.spatial import cKDTree
+
+from Alla.data.columns import Records, column
+
+
+class Coverage:
+    """
+    matrice de couverture creuse zone×site au format CSR.
+    Les sites couvrant la zone j sont indices[indptr[j]:indptr[j + 1]].
+
+    Seules les paires (zone, site) à distance <= max_distance sont stockées,
+    la mémoire est donc proportionnelle au nombre de paires couvrantes.
+    """
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, n_sites: int):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.n_sites = n_sites
+        self.n_zones = len(self.indptr) - 1
+
+    @property
+    def nnz(self) -> int:
+        """nombre de paires (zone, site) couvrantes"""
+        return int(self.indptr[-1])
+
+    def sites_of(self, j: int) -> np.ndarray:
+        """indices des sites couvrant la zone j"""
+        return self.indices[self.indptr[j]:self.indptr[j + 1]]
+
+    def counts(self) -> np.ndarray:
+        """nombre de sites couvrant chaque zone"""
+        return np.diff(self.indptr)
+
+    def to_csr(self) -> sp.csr_matrix:
+        """matrice d'incidence 0/1 (zones × sites) au format scipy"""
+        return sp.csr_matrix((np.ones(self.nnz), self.indices, self.indptr),
+                             shape=(self.n_zones, self.n_sites))
+
+    def __repr__(self):
+        return f"Coverage(zones={self.n_zones}, sites={self.n_sites}, nnz={self.nnz})"
+
+
+def coordinates(items: Records) -> np.ndarray:
+    """
+    extrait les coordonnées (x, y) des sites ou des zones.
+
+    Args:
+        items: Liste de dictionnaires avec 'x' et 'y', ou ColumnTable
+
+    Returns:
+        Tableau NumPy de forme (n, 2)
+    """
+    return np.column_stack([column(items, 'x'), column(items, 'y')])
+
+
+def build_coverage(sites: Records, zones: Records,
+                   max_distance: float) -> Coverage:
+    """
+    calcule la couverture creuse entre sites et zones (distance Euclidienne).
+
+    Un KD-tree (scipy) est construit sur les sites puis interrogé par toutes
+    les zones : le coût dépend du nombre de paires couvrantes et non du
+    produit n_sites × n_zones.
+
+    Args:
+        sites: Liste de dictionnaires avec 'x' et 'y', ou ColumnTable
+        zones: Liste de dictionnaires avec 'x' et 'y', ou ColumnTable
+        max_distance: Rayon de couverture en kilomètres
+
+    Returns:
+        Objet Coverage (une ligne par zone)
+    """
+    n_sites = len(sites)
+    n_zones = len(zones)
+    if n_sites == 0 or n_zones == 0 or max_distance < 0:
+        return Coverage(np.zeros(n_zones + 1, dtype=np.int64),
+                        np.zeros(0, dtype=np.int64), n_sites)
+
+    site_xy = coordinates(sites)
+    zone_xy = coordinates(zones)
+
+    tree = cKDTree(site_xy)
+    neighbors = tree.query_ball_point(zone_xy, r=max_distance, return_sorted=True)
+
+    counts = np.fromiter((len(nb) for nb in neighbors), dtype=np.int64, count=n_zones)
+    indptr = np.zeros(n_zones + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    if indptr[-1]:
+        indices = np.concatenate([np.asarray(nb, dtype=np.int64) for nb in neighbors])
+    else:
+        indices = np.zeros(0, dtype=np.int64)
+
+    return Coverage(indptr, indices, n_sites)
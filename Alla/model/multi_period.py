@@ -0,0 +1,179 @@
+# model/multi_period.py
+from gurobipy import Model, GRB, MVar
+from typing import Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+import scipy.sparse as sp
+
+from Alla.data.columns import ColumnTable, Records, column
+from Alla.model.optimizer import (compute_coverage, placement_stats, solve_status,
+                                  add_expected_coverage)
+
+
+def _per_period(value, n_periods: int, label: str) -> List:
+    #accepte une valeur unique ou une valeur par période
+    if np.isscalar(value):
+        return [value] * n_periods
+    values = list(value)
+    if len(values) != n_periods:
+        raise ValueError(f"{label} : {len(values)} valeurs pour {n_periods} périodes")
+    return values
+
+
+def _zones_for_period(zones: Records, population: np.ndarray) -> ColumnTable:
+    #mêmes zones, population de la période (pour placement_stats)
+    return ColumnTable({
+        'name': column(zones, 'name', '', dtype=object),
+        'x': column(zones, 'x'),
+        'y': column(zones, 'y'),
+        'population': population,
+        'priority': column(zones, 'priority', 1),
+    })
+
+
+def optimize_multi_period(sites: Records, zones: Records,
+                          populations: Sequence[Sequence[float]],
+                          total_ambulances: Union[int, Sequence[int]],
+                          max_distance: float,
+                          max_relocations: Union[float, Sequence[float]],
+                          mode: str = 'entier',
+                          period_names: Sequence[str] = None,
+                          road_graph=None) -> Tuple[List[Dict[str, int]], Dict]:
+    """
+    placement multi-périodes (équipes) avec limite de relocalisation.
+
+    Une seule couverture creuse site–zone est calculée puis partagée par toutes
+    les périodes. Chaque période t a ses variables x[t], k[t] (et z[t]) et sa
+    population ; entre deux périodes consécutives, le coût des ambulances
+    déplacées d'un site vers un autre, somme_i c_i · r[t,i] (r : arrivées
+    par relocalisation), est limité par max_relocations. Les effectifs
+    peuvent varier d'une équipe à l'autre : une arrivée venant d'une hausse
+    d'effectif (ou d'une ambulance non placée à la période précédente) et un
+    départ en fin de service ne sont pas des relocalisations. Le coût c_i
+    vaut la colonne 'relocation_cost' des sites (1 par défaut, c'est-à-dire
+    un nombre d'ambulances déplacées).
+
+    Args:
+        sites: Sites candidats
+        zones: Zones de demande (la colonne population est ignorée)
+        populations: Une séquence de populations (alignée sur zones) par période
+        total_ambulances: Budget unique ou un budget par période
+        max_distance: Rayon de couverture (ou temps si road_graph est fourni)
+        max_relocations: Limite unique ou une limite par transition (T - 1 valeurs)
+        mode: 'entier', 'binaire' ou 'mexclp'
+        period_names: Noms des périodes (par défaut « Période 1 », ...)
+        road_graph: Graphe routier optionnel
+
+    Returns:
+        (placements, stats) : un placement par période et un dictionnaire avec
+        les statistiques par période ('periods') et les déplacements
+        ('relocations'), ou {'error': ...}
+    """
+    n_periods = len(populations)
+    if not sites or not zones or n_periods == 0:
+        return [], {'error': 'Données manquantes'}
+
+    budgets = _per_period(total_ambulances, n_periods, "Budgets")
+    if any(b <= 0 for b in budgets):
+        return [], {'error': 'Budget invalide'}
+    limits = _per_period(max_relocations, max(n_periods - 1, 0), "Limites de relocalisation")
+    names = list(period_names) if period_names else [f"Période {t + 1}" for t in range(n_periods)]
+
+    n_sites = len(sites)
+    n_zones = len(zones)
+    pops = [np.asarray(p, dtype=float) for p in populations]
+    if any(len(p) != n_zones for p in pops):
+        return [], {'error': 'Chaque période doit donner une population par zone'}
+
+    # Couverture calculée une seule fois pour toutes les périodes
+    coverage = compute_coverage(sites, zones, max_distance, road_graph)
+    A = coverage.to_csr()
+    eye = sp.identity(n_zones, format='csr')
+    priority = column(zones, 'priority', 1)
+
+    model = Model("Ambulances_MultiPeriodes")
+    model.Params.OutputFlag = 0
+    model.Params.TimeLimit = 30
+
+    caps = column(sites, 'capacity', 0)
+    ub = np.where(caps > 0, caps, GRB.INFINITY)
+    vtype = GRB.BINARY if mode == 'binaire' else GRB.INTEGER
+
+    xs, ks, objective = [], [], 0
+    for t in range(n_periods):
+        x = model.addMVar(n_sites, vtype=vtype, lb=0, ub=ub, name=f"x_{t}")
+        k = model.addMVar(n_zones, vtype=GRB.INTEGER, lb=0, name=f"k_{t}")
+        model.addConstr(x.sum() <= budgets[t], name=f"Budget_{t}")
+
+        # k[t] == A · x[t] (même matrice A pour toutes les périodes)
+        xk = MVar.fromlist(x.tolist() + k.tolist())
+        model.addMConstr(sp.hstack([A, -eye], format='csr'), xk, '=',
+                         np.zeros(n_zones), name=f"Couverture_{t}")
+
+        weights = pops[t] * priority
+        if mode == 'mexclp':
+            objective += add_expected_coverage(model, k, A, ub, weights, budgets[t], f"_{t}")
+        else:
+            z = model.addMVar(n_zones, vtype=GRB.BINARY, name=f"z_{t}")
+            kz = MVar.fromlist(k.tolist() + z.tolist())
+            model.addMConstr(sp.hstack([eye, -eye], format='csr'), kz, '>',
+                             np.zeros(n_zones), name=f"Active_{t}")
+            model.addMConstr(sp.hstack([eye, -budgets[t] * eye], format='csr'), kz, '<',
+                             np.zeros(n_zones), name=f"BigM_{t}")
+            objective += weights @ (z if mode == 'binaire' else k)
+        xs.append(x)
+        ks.append(k)
+
+    # Relocalisations : x[t] - x[t-1] = r + n - d (r arrivées relocalisées,
+    # n nouvelles ambulances, d départs), coût des seules arrivées r <= limite
+    reloc_cost = column(sites, 'relocation_cost', 1)
+    rs = []
+    for t in range(1, n_periods):
+        r = model.addMVar(n_sites, lb=0, name=f"m_{t}")
+        n = model.addMVar(n_sites, lb=0, name=f"n_{t}")
+        d = model.addMVar(n_sites, lb=0, name=f"d_{t}")
+        model.addConstr(xs[t] - xs[t - 1] == r + n - d, name=f"Deplacement_{t}")
+        #effectif disponible sur les deux équipes : hausse d'effectif ou ambulances non placées
+        staff = max(budgets[t - 1], budgets[t])
+        model.addConstr(r.sum() <= d.sum(), name=f"Origine_{t}")
+        model.addConstr(n.sum() + xs[t - 1].sum() <= staff, name=f"Renfort_{t}")
+        model.addConstr(d.sum() - r.sum() + xs[t].sum() <= staff, name=f"FinService_{t}")
+        model.addConstr(reloc_cost @ r <= limits[t - 1], name=f"Relocalisation_{t}")
+        rs.append(r)
+
+    model.setObjective(objective, GRB.MAXIMIZE)
+    model.optimize()
+
+    status = solve_status(model)
+    if status is None:
+        return [], {'error': 'Aucune solution trouvée. Essayez avec plus d\'ambulances, une plus grande distance ou plus de relocalisations.'}
+
+    placements, periods = [], []
+    for t in range(n_periods):
+        placement, stats = placement_stats(sites, _zones_for_period(zones, pops[t]),
+                                           xs[t].X, ks[t].X, budgets[t], status)
+        stats['period'] = names[t]
+        placements.append(placement)
+        periods.append(stats)
+
+    relocations = []
+    for t in range(1, n_periods):
+        moved = np.rint(xs[t].X - xs[t - 1].X).astype(np.int64)
+        relocations.append({
+            'from': names[t - 1],
+            'to': names[t],
+            'arrivals': {sites[int(i)]['name']: int(moved[i]) for i in np.flatnonzero(moved > 0)},
+            'departures': {sites[int(i)]['name']: int(-moved[i]) for i in np.flatnonzero(moved < 0)},
+            'cost': float(reloc_cost @ rs[t - 1].X),
+        })
+
+    stats = {
+        'status': status,
+        'objective': model.ObjVal,
+        'coverage_pairs': coverage.nnz,
+        'periods': periods,
+        'relocations': relocations,
+    }
+    if status != 'optimal':
+        stats['gap'] = model.MIPGap
+    return placements, stats
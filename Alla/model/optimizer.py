@@ -1,120 +1,229 @@
-from gurobipy import Model, GRB, quicksum
-from typing import List, Dict, Tuple
-import sys
+from gurobipy import Model, GRB, MVar
+from typing import Dict, Tuple, Callable, Optional
+import threading
 
-sys.path.append('..')
-from data.parser import distance
+import numpy as np
+import scipy.sparse as sp
 
+from Alla.data.columns import Records, column
+from Alla.model.coverage import Coverage, build_coverage
 
-def optimize_placement(sites: List[Dict], zones: List[Dict],
-                       total_ambulances: int, max_distance: float,
-                       mode: str = 'entier') -> Tuple[Dict[str, int], Dict]:
+AVAIL_PROB = 0.60
 
-    if not sites or not zones:
-        return {}, {'error': 'Données manquantes'}
-    if total_ambulances <= 0:
-        return {}, {'error': 'Budget invalide'}
+CANCELLED_ERROR = "Optimisation annulée avant la première solution : aucun placement à afficher."
 
-    n_sites = len(sites)
-    n_zones = len(zones)
 
-    # Matrice de couverture
-    coverage = [[0] * n_sites for _ in range(n_zones)]
-    for j, zone in enumerate(zones):
-        for i, site in enumerate(sites):
-            if distance(site, zone) <= max_distance:
-                coverage[j][i] = 1
+def compute_coverage(sites: Records, zones: Records, max_distance: float,
+                     road_graph=None) -> Coverage:
+    """
+    couverture Euclidienne (par défaut) ou par temps de parcours si un
+    graphe routier est fourni (max_distance est alors un temps maximal)
+    """
+    if road_graph is None:
+        return build_coverage(sites, zones, max_distance)
+    from Alla.model.road_network import road_coverage
+    return road_coverage(road_graph, sites, zones, max_distance)
 
-    AVAIL_PROB = 0.60
 
-    model = Model("Ambulances")
+def build_model(sites: Records, zones: Records, coverage: Coverage,
+                total_ambulances: int, mode: str = 'entier', env=None):
+    """
+    construit le modèle Gurobi de placement à partir de la couverture creuse.
+
+    Toutes les lignes sont ajoutées par blocs avec addMConstr : le temps de
+    construction et la mémoire sont proportionnels au nombre de non-zéros.
+
+    Les blocs de contraintes sont conservés sur le modèle (model._budget,
+    model._couverture, model._bigm) pour les mises à jour incrémentales.
+
+    Modes : 'binaire' et 'entier' (objectif population×priorité×z ou ×k),
+    'mexclp' (couverture espérée, voir add_expected_coverage).
+
+    Returns:
+        (model, x, k, z) où x, k et z sont des MVar (z vaut None en mode 'mexclp')
+    """
+    n_sites = len(sites)
+    n_zones = len(zones)
+
+    model = Model("Ambulances", env=env) if env is not None else Model("Ambulances")
     model.Params.OutputFlag = 0
     model.Params.TimeLimit = 30
 
-    # Variables : nombre d'ambulances par site
-    if mode == 'binaire':
-        x = model.addVars(n_sites, vtype=GRB.BINARY, lb=0, name="x")
-    else:  # entier
-        x = model.addVars(n_sites, vtype=GRB.INTEGER, lb=0, name="x")
+    # Variables : nombre d'ambulances par site (capacité portée par la borne sup)
+    caps = column(sites, 'capacity', 0)
+    ub = np.where(caps > 0, caps, GRB.INFINITY)
+    vtype = GRB.BINARY if mode == 'binaire' else GRB.INTEGER  # 'mexclp' : entier
+    x = model.addMVar(n_sites, vtype=vtype, lb=0, ub=ub, name="x")
+
+    # Variable k[j] = nombre d'ambulances couvrant la zone j
+    k = model.addMVar(n_zones, vtype=GRB.INTEGER, lb=0, name="k")
 
     # Contrainte budget
-    model.addConstr(quicksum(x[i] for i in range(n_sites)) <= total_ambulances, "Budget")
+    model._budget = model.addMConstr(sp.csr_matrix(np.ones((1, n_sites))), x, '<',
+                                     np.array([float(total_ambulances)]), name="Budget")
 
-    # Capacités des sites
-    for i, site in enumerate(sites):
-        cap = site.get('capacity', 0)
-        if cap > 0:
-            model.addConstr(x[i] <= cap, f"Capacite_{i}")
+    # k[j] == somme des x[i] couvrant j  →  [A | -I] · [x; k] = 0
+    eye = sp.identity(n_zones, format='csr')
+    A = coverage.to_csr()
+    xk = MVar.fromlist(x.tolist() + k.tolist())
+    model._couverture = model.addMConstr(sp.hstack([A, -eye], format='csr'), xk, '=',
+                                         np.zeros(n_zones), name="Couverture")
 
-    # Variable z[j] = 1 si zone couverte, k[j] = nb d'ambulances couvrantes
-    z = model.addVars(n_zones, vtype=GRB.BINARY, name="z")
+    weights = zone_weights(zones)
+    if mode == 'mexclp':
+        model._bigm = None
+        objective = add_expected_coverage(model, k, A, ub, weights, total_ambulances)
+        model.setObjective(objective, GRB.MAXIMIZE)
+        return model, x, k, None
 
-    # Variable k[j] = nombre d'ambulances couvrant la zone j
-    k = model.addVars(n_zones, vtype=GRB.INTEGER, lb=0, name="k")
+    # Variable z[j] = 1 si zone couverte
+    z = model.addMVar(n_zones, vtype=GRB.BINARY, name="z")
 
+    # Si z[j] = 1 → k[j] ≥ 1, si z[j] = 0 → k[j] = 0
+    kz = MVar.fromlist(k.tolist() + z.tolist())
+    model.addMConstr(sp.hstack([eye, -eye], format='csr'), kz, '>',
+                     np.zeros(n_zones), name="Active")
     M = total_ambulances
-    for j in range(n_zones):
-        model.addConstr(k[j] == quicksum(coverage[j][i] * x[i] for i in range(n_sites)))
-        # Contraintes pour z[j]
-        # Si z[j] = 1 → k[j] ≥ 1, si z[j] = 0 → k[j] = 0
-        model.addConstr(k[j] >= z[j])
-        model.addConstr(k[j] <= M * z[j])
-
+    model._bigm = model.addMConstr(sp.hstack([eye, -M * eye], format='csr'), kz, '<',
+                                   np.zeros(n_zones), name="BigM")
 
     if mode == 'binaire':
         # objectif : maximiser population×priorité×z
         # logique : esk la zone est couverte ou non
-        objective = quicksum(
-            zones[j]['population'] *
-            zones[j].get('priority', 1) *
-            z[j]  # 1 si couverte, 0 sinon
-            for j in range(n_zones)
-        )
-
+        model.setObjective(weights @ z, GRB.MAXIMIZE)
     else:  # mode entier
         # objectif : maximiser population×priorité×k
         # logique : "plus il y a d'ambulances, mieux c'est
-        objective = quicksum(
-            zones[j]['population'] *
-            zones[j].get('priority', 1) *
-            k[j]
-            for j in range(n_zones)
-        )
-    model.setObjective(objective, GRB.MAXIMIZE)
-    model.optimize()
-
-    if model.status != GRB.OPTIMAL:
-        return {}, {'error': 'Aucune solution trouvée. Essayez avec plus d\'ambulances ou une plus grande distance.'}
+        model.setObjective(weights @ k, GRB.MAXIMIZE)
+
+    return model, x, k, z
+
+
+def add_expected_coverage(model, k, A, ub, weights, total_ambulances, suffix=""):
+    """
+    formulation MEXCLP : couverture espérée avec disponibilité AVAIL_PROB.
+
+    Pour chaque zone j, y[j,l] (l = 1..U_j) vaut 1 si la l-ième ambulance
+    couvrante est présente ; son gain marginal vaut
+    AVAIL_PROB × (1 - AVAIL_PROB)^(l-1). La somme des gains vaut donc
+    exactement 1 - (1 - AVAIL_PROB)^k[j], la probabilité reportée.
+
+    U_j = min(budget, somme des capacités des sites couvrants) borne k[j]
+    sans ligne big-M. Les gains étant décroissants, l'optimum remplit les
+    y[j,l] dans l'ordre : des y continus dans [0, 1] suffisent.
+
+    Returns:
+        Expression de l'objectif (à maximiser) population×priorité×(1 - (1 - p)^k)
+    """
+    budget = float(total_ambulances)
+    U = np.minimum(A @ np.minimum(ub, budget), budget).astype(np.int64)
+    indptr = np.zeros(len(U) + 1, dtype=np.int64)
+    np.cumsum(U, out=indptr[1:])
+    n_y = int(indptr[-1])
+
+    # niveau l (à partir de 0) de chaque y dans sa zone
+    levels = np.arange(n_y) - np.repeat(indptr[:-1], U)
+    gains = AVAIL_PROB * (1 - AVAIL_PROB) ** levels
+    y = model.addMVar(n_y, vtype=GRB.CONTINUOUS, lb=0, ub=1, name=f"y{suffix}")
+    k.UB = U
 
+    # somme_l y[j,l] <= k[j]  →  [-I | S] · [k; y] <= 0
+    S = sp.csr_matrix((np.ones(n_y), np.arange(n_y), indptr), shape=(len(U), n_y))
+    ky = MVar.fromlist(k.tolist() + y.tolist())
+    eye = sp.identity(len(U), format='csr')
+    model.addMConstr(sp.hstack([-eye, S], format='csr'), ky, '<',
+                     np.zeros(len(U)), name=f"Niveaux{suffix}")
+
+    return (np.repeat(weights, U) * gains) @ y
+
+
+def zone_weights(zones: Records) -> np.ndarray:
+    """poids population×priorité de chaque zone"""
+    return column(zones, 'population') * column(zones, 'priority', 1)
+
+
+def make_callback(progress: Optional[Callable[[Dict], None]] = None,
+                  cancel: Optional[threading.Event] = None,
+                  interval: float = 0.5):
+    """
+    crée un callback Gurobi qui publie la progression et gère l'annulation.
+
+    Args:
+        progress: Fonction appelée avec {'incumbent', 'bound', 'gap', 'runtime'}
+        cancel: Événement ; s'il est positionné, la résolution est interrompue
+                (la meilleure solution trouvée est conservée)
+        interval: Délai minimal (s) entre deux appels à progress
+    """
+    last = [-interval]
+
+    def callback(model, where):
+        #annulation prise en compte à tout moment (présolve, racine) : il peut n'y avoir aucune solution
+        if cancel is not None and cancel.is_set():
+            model.terminate()
+            return
+        if where != GRB.Callback.MIP or progress is None:
+            return
+        runtime = model.cbGet(GRB.Callback.RUNTIME)
+        if runtime - last[0] < interval:
+            return
+        last[0] = runtime
+        best = model.cbGet(GRB.Callback.MIP_OBJBST)
+        bound = model.cbGet(GRB.Callback.MIP_OBJBND)
+        has_sol = model.cbGet(GRB.Callback.MIP_SOLCNT) > 0
+        gap = abs(bound - best) / abs(best) if has_sol and abs(best) > 1e-10 else None
+        progress({
+            'incumbent': best if has_sol else None,
+            'bound': bound,
+            'gap': gap,
+            'runtime': runtime,
+        })
+
+    return callback
+
+
+def solve_status(model) -> Optional[str]:
+    """
+    statut exploitable après optimize() : 'optimal', 'interrompu' ou
+    'limite_temps' (meilleure solution trouvée), None si aucune solution
+    """
+    if model.status == GRB.OPTIMAL:
+        return 'optimal'
+    if model.SolCount > 0:
+        if model.status == GRB.INTERRUPTED:
+            return 'interrompu'
+        if model.status == GRB.TIME_LIMIT:
+            return 'limite_temps'
+    return None
+
+
+def placement_stats(sites: Records, zones: Records, x_values, k_values,
+                    total_ambulances: int, status: str = 'optimal') -> Tuple[Dict[str, int], Dict]:
+    """calcule le placement final et les statistiques probabilistes"""
     # === Placement final ===
-    placement = {}
-    total_placed = 0
-    for i in range(n_sites):
-        nb = int(round(x[i].X))
-        if nb > 0:
-            placement[sites[i]['name']] = nb
-            total_placed += nb
+    x_int = np.rint(np.asarray(x_values)).astype(np.int64)
+    placed = np.flatnonzero(x_int > 0)
+    placement = {sites[int(i)]['name']: int(x_int[i]) for i in placed}
+    total_placed = int(x_int[placed].sum())
 
     # === Stats avec probabilité réelle ===
-    pop_expected = 0
-    details = []
-    for j, zone in enumerate(zones):
-        k_j = int(round(k[j].X))
-        proba = 1 - (1 - AVAIL_PROB) ** k_j if k_j > 0 else 0
-        contrib = zone['population'] * proba
-        pop_expected += contrib
-        details.append({
-            'nom': zone['name'],
-            'population': zone['population'],
-            'ambulances': k_j,
-            'probabilite_%': round(proba * 100, 1),
-            'contribution': int(contrib)
-        })
+    k_int = np.rint(np.asarray(k_values)).astype(np.int64)
+    proba = np.where(k_int > 0, 1 - (1 - AVAIL_PROB) ** k_int, 0.0)
+    population = column(zones, 'population')
+    contrib = population * proba
+    pop_expected = float(contrib.sum())
+    names = column(zones, 'name', '', dtype=object)
+    details = [{
+        'nom': names[j],
+        'population': int(population[j]),
+        'ambulances': int(k_int[j]),
+        'probabilite_%': round(float(proba[j]) * 100, 1),
+        'contribution': int(contrib[j])
+    } for j in range(len(k_int))]
 
-    total_pop = sum(z['population'] for z in zones) or 1
+    total_pop = int(population.sum()) or 1
 
     stats = {
-        'status': 'optimal',
+        'status': status,
         'total_ambulances_placed': total_placed,
         'total_ambulances_budget': total_ambulances,
         'population_covered': int(pop_expected),
@@ -124,3 +233,36 @@ def optimize_placement(sites: List[Dict], zones: List[Dict],
     }
 
     return placement, stats
+
+
+def optimize_placement(sites: Records, zones: Records,
+                       total_ambulances: int, max_distance: float,
+                       mode: str = 'entier',
+                       progress: Optional[Callable[[Dict], None]] = None,
+                       cancel: Optional[threading.Event] = None,
+                       road_graph=None) -> Tuple[Dict[str, int], Dict]:
+
+    if not sites or not zones:
+        return {}, {'error': 'Données manquantes'}
+    if total_ambulances <= 0:
+        return {}, {'error': 'Budget invalide'}
+
+    # Couverture creuse : seules les paires (zone, site) à distance <= max_distance
+    coverage = compute_coverage(sites, zones, max_distance, road_graph)
+
+    model, x, k, z = build_model(sites, zones, coverage, total_ambulances, mode)
+    if progress is None and cancel is None:
+        model.optimize()
+    else:
+        model.optimize(make_callback(progress, cancel))
+
+    status = solve_status(model)
+    if status is None and model.status == GRB.INTERRUPTED:
+        return {}, {'error': CANCELLED_ERROR, 'status': 'interrompu'}
+    if status is None:
+        return {}, {'error': 'Aucune solution trouvée. Essayez avec plus d\'ambulances ou une plus grande distance.'}
+
+    placement, stats = placement_stats(sites, zones, x.X, k.X, total_ambulances, status)
+    if status != 'optimal':
+        stats['gap'] = model.MIPGap
+    return placement, stats
@@ -0,0 +1,159 @@
+# model/placement_model.py
+from gurobipy import GRB
+from typing import List, Dict, Tuple, Iterable
+
+import numpy as np
+
+from Alla.data.columns import Records
+from Alla.model.optimizer import (build_model, placement_stats, zone_weights,
+                                  make_callback, solve_status, compute_coverage,
+                                  CANCELLED_ERROR)
+
+
+class PlacementModel:
+    """
+    modèle de placement persistant pour les analyses « what-if ».
+
+    Le modèle Gurobi est construit une seule fois ; les changements de budget,
+    de rayon de couverture ou de mode ne modifient que les coefficients
+    concernés, et chaque résolution repart de la solution précédente.
+    En mode 'mexclp', le nombre de variables par zone dépend du budget et de
+    la couverture : le modèle est alors reconstruit (le démarrage à chaud
+    est conservé).
+
+    Exemple :
+        pm = PlacementModel(sites, zones, total_ambulances=6, max_distance=5.0)
+        placement, stats = pm.solve()
+        pm.set_budget(8)
+        placement, stats = pm.solve()
+    """
+
+    def __init__(self, sites: Records, zones: Records,
+                 total_ambulances: int, max_distance: float,
+                 mode: str = 'entier', env=None, road_graph=None):
+        self.sites = sites
+        self.zones = zones
+        self.total_ambulances = total_ambulances
+        self.max_distance = max_distance
+        self.mode = mode
+        self.env = env
+        self.road_graph = road_graph
+
+        self.coverage = compute_coverage(sites, zones, max_distance, road_graph)
+        self._weights = zone_weights(zones)
+        self._last_x = None
+        self._rebuild()
+
+    def _rebuild(self):
+        if getattr(self, 'model', None) is not None:
+            self.model.dispose()
+        self.model, self.x, self.k, self.z = build_model(
+            self.sites, self.zones, self.coverage, self.total_ambulances,
+            self.mode, env=self.env)
+
+    def set_budget(self, total_ambulances: int):
+        """modifie le second membre du budget (et le big-M qui en dépend)"""
+        if total_ambulances == self.total_ambulances:
+            return
+        if self.mode == 'mexclp':
+            self.total_ambulances = total_ambulances
+            self._rebuild()
+            return
+        self.model._budget.RHS = np.array([float(total_ambulances)])
+
+        #k[j] <= M·z[j] avec M = budget
+        for row, z_j in zip(self.model._bigm.tolist(), self.z.tolist()):
+            self.model.chgCoeff(row, z_j, -float(total_ambulances))
+        self.total_ambulances = total_ambulances
+
+    def set_max_distance(self, max_distance: float):
+        """recalcule la couverture et ne change que les coefficients modifiés"""
+        if max_distance == self.max_distance:
+            return
+        coverage = compute_coverage(self.sites, self.zones, max_distance, self.road_graph)
+        if self.mode == 'mexclp':
+            self.coverage = coverage
+            self.max_distance = max_distance
+            self._rebuild()
+            return
+
+        #différence creuse : +1 = paire gagnée, -1 = paire perdue
+        diff = (coverage.to_csr() - self.coverage.to_csr()).tocoo()
+        rows = self.model._couverture.tolist()
+        x_vars = self.x.tolist()
+        for j, i, delta in zip(diff.row, diff.col, diff.data):
+            if delta != 0:
+                self.model.chgCoeff(rows[j], x_vars[i], 1.0 if delta > 0 else 0.0)
+
+        self.coverage = coverage
+        self.max_distance = max_distance
+
+    def set_mode(self, mode: str):
+        """bascule entre 'binaire', 'entier' et 'mexclp' (type de x et objectif)"""
+        if mode == self.mode:
+            return
+        if 'mexclp' in (mode, self.mode):
+            self.mode = mode
+            self._rebuild()
+            return
+        if mode == 'binaire':
+            self.x.VType = GRB.BINARY
+            self.z.Obj = self._weights
+            self.k.Obj = np.zeros(len(self.zones))
+        else:
+            self.x.VType = GRB.INTEGER
+            self.z.Obj = np.zeros(len(self.zones))
+            self.k.Obj = self._weights
+        self.mode = mode
+
+    def _warm_start(self):
+        if self._last_x is None:
+            return
+        start = self._last_x.copy()
+        if self.mode == 'binaire':
+            start = np.minimum(start, 1.0)
+
+        #réduire le point de départ s'il dépasse le nouveau budget
+        excess = start.sum() - self.total_ambulances
+        for i in np.argsort(start):
+            if excess <= 0:
+                break
+            removed = min(start[i], excess)
+            start[i] -= removed
+            excess -= removed
+        self.x.Start = start
+
+    def solve(self, progress=None, cancel=None) -> Tuple[Dict[str, int], Dict]:
+        """résout le modèle courant (mêmes arguments et retour qu'optimize_placement)"""
+        if not self.sites or not self.zones:
+            return {}, {'error': 'Données manquantes'}
+        if self.total_ambulances <= 0:
+            return {}, {'error': 'Budget invalide'}
+
+        self._warm_start()
+        if progress is None and cancel is None:
+            self.model.optimize()
+        else:
+            self.model.optimize(make_callback(progress, cancel))
+
+        status = solve_status(self.model)
+        if status is None and self.model.status == GRB.INTERRUPTED:
+            return {}, {'error': CANCELLED_ERROR, 'status': 'interrompu'}
+        if status is None:
+            return {}, {'error': 'Aucune solution trouvée. Essayez avec plus d\'ambulances ou une plus grande distance.'}
+
+        self._last_x = np.round(self.x.X)
+        placement, stats = placement_stats(self.sites, self.zones, self._last_x, self.k.X,
+                                           self.total_ambulances, status)
+        if status != 'optimal':
+            stats['gap'] = self.model.MIPGap
+        return placement, stats
+
+    def sweep_budget(self, budgets: Iterable[int]) -> List[Tuple[int, Dict[str, int], Dict]]:
+        """résout successivement pour chaque budget en réutilisant le modèle"""
+        results = []
+        for budget in budgets:
+            self.set_budget(budget)
+            placement, stats = self.solve()
+            results.append((budget, placement, stats))
+        return results
@@ -0,0 +1,211 @@
+# model/road_network.py
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import dijkstra
+from scipy.spatial import cKDTree
+
+from Alla.data.columns import Records
+from Alla.model.coverage import Coverage, coordinates
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "alla_coverage")
+
+
+class RoadGraph:
+    """
+    graphe routier orienté : nœuds (coordonnées) et arcs pondérés par le
+    temps de parcours, stockés en matrice creuse CSR.
+
+    access_speed est la vitesse hors réseau (distance par unité de temps)
+    entre un point et son nœud de rattachement.
+    """
+
+    def __init__(self, nodes_xy: np.ndarray, matrix: sp.csr_matrix, digest: str,
+                 access_speed: float = np.inf):
+        self.nodes_xy = nodes_xy
+        self.matrix = matrix
+        self.digest = digest
+        self.access_speed = access_speed
+        self._tree = None
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.nodes_xy)
+
+    def nearest_nodes(self, xy: np.ndarray) -> np.ndarray:
+        """indice du nœud du graphe le plus proche de chaque point"""
+        if self._tree is None:
+            self._tree = cKDTree(self.nodes_xy)
+        _, idx = self._tree.query(xy)
+        return np.asarray(idx, dtype=np.int64)
+
+    def snap(self, xy: np.ndarray):
+        """nœud le plus proche de chaque point et temps d'accès hors réseau jusqu'à ce nœud"""
+        if self._tree is None:
+            self._tree = cKDTree(self.nodes_xy)
+        dist, idx = self._tree.query(xy)
+        return np.asarray(idx, dtype=np.int64), np.asarray(dist, dtype=float) / self.access_speed
+
+    def __getstate__(self):
+        #le KD-tree est reconstruit à la demande (pickle pour les processus)
+        state = self.__dict__.copy()
+        state['_tree'] = None
+        return state
+
+    def __repr__(self):
+        return f"RoadGraph(nodes={self.n_nodes}, arcs={self.matrix.nnz})"
+
+
+def load_road_graph(path: str, access_speed: float = None) -> RoadGraph:
+    """
+    charge un graphe routier depuis un fichier CSV de tronçons.
+    Colonnes : x1, y1, x2, y2, time et oneway (optionnelle, 0 = double sens)
+
+    Les nœuds sont identifiés par leurs coordonnées ; les tronçons parallèles
+    gardent le temps minimal.
+
+    Args:
+        path: Chemin du fichier
+        access_speed: Vitesse hors réseau (distance par unité de temps) ; par
+            défaut la vitesse médiane des tronçons (longueur / temps)
+
+    Returns:
+        RoadGraph avec l'empreinte SHA-256 du fichier
+    """
+    import pandas as pd
+
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+
+    df = pd.read_csv(path)
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    missing = [c for c in ('x1', 'y1', 'x2', 'y2', 'time') if c not in df.columns]
+    if missing:
+        raise ValueError(f"Colonnes manquantes dans {os.path.basename(path)} : {', '.join(missing)}")
+
+    ends = np.vstack([df[['x1', 'y1']].to_numpy(float), df[['x2', 'y2']].to_numpy(float)])
+    nodes_xy, inverse = np.unique(ends, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    n_seg = len(df)
+    src, dst = inverse[:n_seg], inverse[n_seg:]
+    time = df['time'].to_numpy(float)
+
+    #tronçons à double sens : arc retour ajouté
+    oneway = df['oneway'].fillna(0).to_numpy(bool) if 'oneway' in df.columns else np.zeros(n_seg, bool)
+    back = ~oneway
+    rows = np.concatenate([src, dst[back]])
+    cols = np.concatenate([dst, src[back]])
+    vals = np.concatenate([time, time[back]])
+
+    #minimum sur les doublons (un csr_matrix additionnerait les temps)
+    order = np.lexsort((vals, cols, rows))
+    rows, cols, vals = rows[order], cols[order], vals[order]
+    first = np.ones(len(rows), dtype=bool)
+    first[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+    n = len(nodes_xy)
+    matrix = sp.csr_matrix((vals[first], (rows[first], cols[first])), shape=(n, n))
+
+    if access_speed is None:
+        length = np.linalg.norm(nodes_xy[src] - nodes_xy[dst], axis=1)
+        moving = time > 0
+        access_speed = float(np.median(length[moving] / time[moving])) if moving.any() else np.inf
+
+    return RoadGraph(nodes_xy, matrix, digest, access_speed)
+
+
+def _cache_key(graph: RoadGraph, site_nodes: np.ndarray, zone_nodes: np.ndarray,
+               site_access: np.ndarray, zone_access: np.ndarray, max_time: float) -> str:
+    h = hashlib.sha256()
+    h.update(graph.digest.encode())
+    h.update(repr(float(max_time)).encode())
+    h.update(site_nodes.tobytes())
+    h.update(zone_nodes.tobytes())
+    h.update(site_access.tobytes())
+    h.update(zone_access.tobytes())
+    return h.hexdigest()
+
+
+def road_coverage(graph: RoadGraph, sites: Records, zones: Records, max_time: float,
+                  cache_dir: str = DEFAULT_CACHE_DIR, chunk_size: int = 32) -> Coverage:
+    """
+    calcule la couverture creuse par temps de parcours sur le graphe routier.
+
+    Sites et zones sont rattachés à leur nœud le plus proche ; le trajet hors
+    réseau jusqu'à ce nœud (distance / graph.access_speed) s'ajoute au temps
+    de parcours, aux deux extrémités. Un Dijkstra multi-sources borné par
+    max_time est lancé depuis les nœuds des sites (par paquets de chunk_size
+    pour limiter la mémoire). Le résultat est mis en cache sur disque, indexé
+    par l'empreinte du graphe, le rayon, les nœuds de rattachement et les
+    temps d'accès.
+
+    Args:
+        graph: Graphe routier (voir load_road_graph)
+        sites: Sites (liste de dictionnaires ou ColumnTable)
+        zones: Zones (liste de dictionnaires ou ColumnTable)
+        max_time: Temps de parcours maximal, dans l'unité de la colonne 'time'
+        cache_dir: Dossier du cache (None pour le désactiver)
+        chunk_size: Nombre de sources par appel à Dijkstra
+
+    Returns:
+        Objet Coverage (une ligne par zone)
+    """
+    n_sites = len(sites)
+    n_zones = len(zones)
+    if n_sites == 0 or n_zones == 0 or max_time < 0:
+        return Coverage(np.zeros(n_zones + 1, dtype=np.int64),
+                        np.zeros(0, dtype=np.int64), n_sites)
+
+    site_nodes, site_access = graph.snap(coordinates(sites))
+    zone_nodes, zone_access = graph.snap(coordinates(zones))
+
+    cache_path = None
+    if cache_dir:
+        key = _cache_key(graph, site_nodes, zone_nodes, site_access, zone_access, max_time)
+        cache_path = os.path.join(cache_dir, f"{key}.npz")
+        if os.path.exists(cache_path):
+            with np.load(cache_path) as cached:
+                return Coverage(cached['indptr'], cached['indices'], n_sites)
+
+    #un seul Dijkstra par nœud source distinct
+    sources, site_to_source = np.unique(site_nodes, return_inverse=True)
+    site_to_source = site_to_source.ravel()
+    pair_zone, pair_source, pair_time = [], [], []
+    for start in range(0, len(sources), chunk_size):
+        chunk = sources[start:start + chunk_size]
+        times = dijkstra(graph.matrix, directed=True, indices=chunk, limit=max_time)
+        times = times[:, zone_nodes] + zone_access
+        src_idx, zone_idx = np.nonzero(times <= max_time)
+        pair_source.append(src_idx + start)
+        pair_zone.append(zone_idx)
+        pair_time.append(times[src_idx, zone_idx])
+    pair_zone = np.concatenate(pair_zone)
+    pair_source = np.concatenate(pair_source)
+    pair_time = np.concatenate(pair_time)
+
+    #paires (zone, nœud source) → (zone, site) : une copie par site rattaché à la source
+    by_source = np.argsort(site_to_source, kind='stable')
+    first_site = np.searchsorted(site_to_source[by_source], np.arange(len(sources) + 1))
+    count = np.diff(first_site)[pair_source]
+    offset = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+    site = by_source[np.repeat(first_site[pair_source], count) + offset]
+    zone = np.repeat(pair_zone, count)
+    keep = np.repeat(pair_time, count) + site_access[site] <= max_time
+    cov = sp.csr_matrix((np.ones(int(keep.sum())), (zone[keep], site[keep])),
+                        shape=(n_zones, n_sites))
+    cov.sort_indices()
+    coverage = Coverage(cov.indptr, cov.indices, n_sites)
+
+    if cache_path is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        #fichier temporaire propre à ce processus : plusieurs workers peuvent écrire la même clé
+        with tempfile.NamedTemporaryFile(dir=cache_dir, suffix=".tmp.npz", delete=False) as tmp:
+            np.savez(tmp, indptr=coverage.indptr, indices=coverage.indices)
+        try:
+            os.replace(tmp.name, cache_path)
+        except OSError:
+            os.remove(tmp.name)
+
+    return coverage
@@ -0,0 +1,90 @@
+# model/sweep.py
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Sequence
+
+import gurobipy as gp
+
+from Alla.data.columns import Records
+from Alla.model.optimizer import compute_coverage
+from Alla.model.placement_model import PlacementModel
+
+
+def _solve_chunk(sites: Records, zones: Records, max_distance: float,
+                 budgets: Sequence[int], mode: str, threads: int, road_graph) -> List[Dict]:
+    #chaque processus possède son propre environnement Gurobi
+    rows = []
+    with gp.Env(params={'OutputFlag': 0, 'Threads': threads}) as env:
+        pm = PlacementModel(sites, zones, budgets[0], max_distance, mode, env=env,
+                            road_graph=road_graph)
+        try:
+            for budget, placement, stats in pm.sweep_budget(budgets):
+                rows.append({
+                    'total_ambulances': budget,
+                    'max_distance': max_distance,
+                    'coverage_percentage': stats.get('coverage_percentage'),
+                    'population_covered': stats.get('population_covered'),
+                    'placement': placement,
+                    'error': stats.get('error'),
+                })
+        finally:
+            pm.model.dispose()
+    return rows
+
+
+def optimize_placement_grid(sites: Records, zones: Records,
+                            budgets: Sequence[int], distances: Sequence[float],
+                            mode: str = 'entier', processes: int = None,
+                            threads_per_worker: int = 1, road_graph=None) -> List[Dict]:
+    """
+    résout le placement sur la grille budgets × distances en parallèle.
+
+    Chaque tâche reçoit un rayon et une tranche de budgets croissants : elle
+    construit un seul PlacementModel et le ré-optimise budget par budget.
+
+    Args:
+        sites: Liste de sites (voir parse_table_sites)
+        zones: Liste de zones (voir parse_table_zones)
+        budgets: Valeurs de total_ambulances à tester
+        distances: Valeurs de max_distance à tester
+        mode: 'entier' ou 'binaire'
+        processes: Nombre de processus (par défaut : nombre de CPU)
+        threads_per_worker: Paramètre Threads de Gurobi dans chaque processus
+        road_graph: Graphe routier optionnel (couverture par temps de parcours)
+
+    Returns:
+        Une ligne par point de la grille, triée par (max_distance, total_ambulances),
+        avec les clés total_ambulances, max_distance, coverage_percentage,
+        population_covered, placement et error
+    """
+    budgets = sorted(set(budgets))
+    distances = sorted(set(distances))
+    if not budgets or not distances:
+        return []
+
+    processes = processes or os.cpu_count() or 1
+
+    #découper les budgets pour occuper tous les processus même avec peu de rayons
+    n_chunks = max(1, min(len(budgets), math.ceil(processes / len(distances))))
+    size = math.ceil(len(budgets) / n_chunks)
+    chunks = [budgets[s:s + size] for s in range(0, len(budgets), size)]
+
+    if road_graph is not None:
+        #couvertures routières calculées une fois ici : les workers les relisent depuis le cache disque
+        for d in distances:
+            compute_coverage(sites, zones, d, road_graph)
+
+    rows = []
+    #spawn : pas de fork d'un processus multithread (interface Qt, environnement Gurobi)
+    with ProcessPoolExecutor(max_workers=processes,
+                             mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = [pool.submit(_solve_chunk, sites, zones, d, chunk, mode,
+                               threads_per_worker, road_graph)
+                   for d in distances for chunk in chunks]
+        for future in futures:
+            rows.extend(future.result())
+
+    rows.sort(key=lambda r: (r['max_distance'], r['total_ambulances']))
+    return rows
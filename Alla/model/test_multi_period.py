@@ -0,0 +1,45 @@
+import random
+
+import numpy as np
+
+from Alla.model.multi_period import optimize_multi_period
+
+
+def instance(seed=0, n_sites=20, n_zones=40, n_periods=2):
+    r = random.Random(seed)
+    sites = [dict(name=f"s{i}", x=r.uniform(0, 20), y=r.uniform(0, 20), capacity=r.choice([0, 1, 2, 3]))
+             for i in range(n_sites)]
+    zones = [dict(name=f"z{j}", x=r.uniform(0, 20), y=r.uniform(0, 20), population=1, priority=1)
+             for j in range(n_zones)]
+    populations = [[r.randint(100, 5000) for _ in zones] for _ in range(n_periods)]
+    return sites, zones, populations
+
+
+def par_site(sites, placement):
+    return np.array([placement.get(s['name'], 0) for s in sites])
+
+
+def test_renfort_sans_relocalisation():
+    sites, zones, populations = instance()
+    placements, stats = optimize_multi_period(sites, zones, populations, [6, 10], 5.0, 0)
+
+    assert [p['total_ambulances_placed'] for p in stats['periods']] == [6, 10]
+    #aucune ambulance ne quitte son site : les 4 nouvelles s'ajoutent
+    assert np.all(par_site(sites, placements[1]) >= par_site(sites, placements[0]))
+    assert stats['relocations'][0]['cost'] == 0
+
+
+def test_fin_de_service_sans_relocalisation():
+    sites, zones, populations = instance(1)
+    placements, stats = optimize_multi_period(sites, zones, populations, [10, 6], 5.0, 0)
+
+    assert [p['total_ambulances_placed'] for p in stats['periods']] == [10, 6]
+    assert np.all(par_site(sites, placements[1]) <= par_site(sites, placements[0]))
+    assert stats['relocations'][0]['cost'] == 0
+
+
+def test_effectif_constant_sans_relocalisation():
+    sites, zones, populations = instance(2, n_periods=3)
+    placements, stats = optimize_multi_period(sites, zones, populations, 6, 5.0, 0)
+
+    assert placements[0] == placements[1] == placements[2]
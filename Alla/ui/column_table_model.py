@@ -0,0 +1,58 @@
+# ui/column_table_model.py
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+
+class ColumnTableModel(QAbstractTableModel):
+    """
+    modèle Qt en lecture seule au-dessus d'une ColumnTable.
+
+    Les lignes sont exposées par pages (fetchMore) : la vue ne demande que
+    les cellules visibles, sans recopier les données dans des QTableWidgetItem.
+    """
+
+    PAGE_SIZE = 500
+
+    def __init__(self, table, headers, parent=None):
+        """
+        Args:
+            table: ColumnTable à afficher
+            headers: Liste de (nom de colonne, libellé affiché)
+        """
+        super().__init__(parent)
+        self._table = table
+        self._keys = [key for key, _ in headers]
+        self._labels = [label for _, label in headers]
+        self._loaded = min(self.PAGE_SIZE, len(table))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._keys)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._loaded < len(self._table)
+
+    def fetchMore(self, parent=QModelIndex()):
+        remaining = len(self._table) - self._loaded
+        count = min(self.PAGE_SIZE, remaining)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        col = self._table.columns.get(self._keys[index.column()])
+        if col is None:
+            return ""
+        return str(col[index.row()])
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self._labels[section]
+        return str(section + 1)
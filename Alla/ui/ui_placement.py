@@ -343,6 +343,7 @@ class Ui_MainWindow(object):
         self.comboModeDecision.setObjectName("comboModeDecision")
         self.comboModeDecision.addItem("")
         self.comboModeDecision.addItem("")
+        self.comboModeDecision.addItem("")
         self.gridLayoutParameters.addWidget(self.comboModeDecision, 0, 1, 1, 1)
         self.labelTotalAmb = QtWidgets.QLabel(self.groupParameters)
         self.labelTotalAmb.setObjectName("labelTotalAmb")
@@ -441,9 +442,11 @@ class Ui_MainWindow(object):
         self.labelMode.setText(_translate("MainWindow", "Mode de Décision :"))
         self.labelMode.setToolTip(_translate("MainWindow", "Choisissez le type de variables de décision"))
         self.comboModeDecision.setToolTip(_translate("MainWindow", "Binaire : 0 ou 1 ambulance par site\n"
-"Entier : nombre quelconque d\'ambulances par site"))
+"Entier : nombre quelconque d\'ambulances par site\n"
+"MEXCLP : maximise la couverture espérée (disponibilité 60 %)"))
         self.comboModeDecision.setItemText(0, _translate("MainWindow", "🔘 Binaire (Installer ou Non)"))
         self.comboModeDecision.setItemText(1, _translate("MainWindow", "🔢 Entier (Nombre d\'Ambulances)"))
+        self.comboModeDecision.setItemText(2, _translate("MainWindow", "📈 MEXCLP (Couverture Espérée)"))
         self.labelTotalAmb.setText(_translate("MainWindow", "🚑 Total d\'Ambulances :"))
         self.labelTotalAmb.setToolTip(_translate("MainWindow", "Budget total d\'ambulances disponibles"))
         self.spinTotalAmbulances.setToolTip(_translate("MainWindow", "Nombre total d\'ambulances à placer"))
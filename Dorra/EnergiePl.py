@@ -1,5 +1,50 @@
 import gurobipy as gp
 from gurobipy import GRB
+import numpy as np
+import scipy.sparse as sp
+
+from Dorra.bornes import M_PRES_DEFAUT, calculer_grands_m
+from Dorra.decomposition import resoudre_par_composantes
+from Dorra.diagnostic import diagnostiquer
+from Dorra.incidence import ReseauIndexe, adjacence
+
+
+def rappel_progression(progression=None, annulation=None, intervalle=0.5):
+    """
+    Crée un callback Gurobi qui publie la progression et gère l'annulation.
+
+    Args:
+        progression: Fonction appelée avec {'meilleure', 'borne', 'gap', 'noeuds', 'temps'}
+        annulation: threading.Event ; s'il est positionné, la résolution est
+                    interrompue (la meilleure solution trouvée est conservée)
+        intervalle: Délai minimal (s) entre deux appels à progression
+    """
+    dernier = [-intervalle]
+
+    def rappel(m, where):
+        if annulation is not None and annulation.is_set() and where != GRB.Callback.POLLING:
+            m.terminate()
+            return
+        if progression is None or where != GRB.Callback.MIP:
+            return
+        temps = m.cbGet(GRB.Callback.RUNTIME)
+        if temps - dernier[0] < intervalle:
+            return
+        dernier[0] = temps
+        meilleure = m.cbGet(GRB.Callback.MIP_OBJBST)
+        borne = m.cbGet(GRB.Callback.MIP_OBJBND)
+        trouvee = m.cbGet(GRB.Callback.MIP_SOLCNT) > 0
+        gap = abs(borne - meilleure)/abs(meilleure) if trouvee and abs(meilleure) > 1e-10 else None
+        progression({
+            'meilleure': meilleure if trouvee else None,
+            'borne': borne,
+            'gap': gap,
+            'noeuds': int(m.cbGet(GRB.Callback.MIP_NODCNT)),
+            'temps': temps,
+        })
+
+    return rappel
+
 
 class ModeleGaz:
     """
@@ -7,7 +52,11 @@ class ModeleGaz:
     avec options avancées : coûts fixes, capacité min, pressions, pertes, diamètres, redondance.
     """
 
-    def __init__(self, donnees):
+    # Borne offre/demande valable pour un bilan fixé (désactivée par les
+    # modèles dont le bilan change après construction)
+    bornes_demande = True
+
+    def __init__(self, donnees, serrer_bornes=True):
         """
         donnees: dict contenant
             - 'Noeuds': liste de nœuds
@@ -18,112 +67,342 @@ class ModeleGaz:
         Optionnel selon activation :
             - 'Cout_Fixe', 'Capacite_Min', 'Pression_Min', 'Pression_Max',
               'Perte_Charge', 'Longueur', 'Diametre', 'Vitesse_Max', 'Contrainte_Redondance', 'Noeuds_Critiques'
+            - 'Weymouth': pertes quadratiques (voir Dorra.weymouth.ModeleGazWeymouth)
+            - 'Reseau_Indexe': ReseauIndexe précalculé (voir Dorra.chargement)
+        serrer_bornes: M par arc calculés depuis les données (voir Dorra.bornes)
+                       au lieu de la capacité et de M_pres = 20
         """
         self.donnees = donnees
+        self.serrer_bornes = serrer_bornes
         self.resultats = {}
+        # Index d'adjacence {noeud: [arcs]}, construits une fois et réutilisés
+        # par les contraintes par nœud, l'IHM et l'analyse des résultats
+        self.arcs_sortants, self.arcs_entrants = adjacence(donnees['Noeuds'], donnees['Arcs'])
+        self._reseau = donnees.get('Reseau_Indexe')
+
+    def reseau_indexe(self):
+        """Indexation entière du réseau, construite une seule fois"""
+        if self._reseau is None:
+            self._reseau = ReseauIndexe(self.donnees['Noeuds'], self.donnees['Arcs'])
+        return self._reseau
+
+    def _grands_m(self, reseau):
+        """M de débit et de pression par arc, alignés sur reseau.arcs"""
+        if not self.serrer_bornes:
+            return (reseau.valeurs_arcs(self.donnees['Capacite']),
+                    np.full(reseau.nb_arcs, M_PRES_DEFAUT))
+        return calculer_grands_m(self.donnees, reseau, demande=self.bornes_demande)
+
+    def flux_noeuds(self):
+        """
+        Flux entrant et sortant de chaque nœud dans la solution courante.
 
-    def resoudre(self):
+        Returns:
+            dict {noeud: (entrant, sortant)}, vide si aucune solution
+        """
+        debits = self.resultats.get('debits_optimaux')
+        if not debits:
+            return {}
+        return {n: (sum((debits[a] for a in self.arcs_entrants[n]), 0.0),
+                    sum((debits[a] for a in self.arcs_sortants[n]), 0.0))
+                for n in self.donnees['Noeuds']}
+
+    def diagnostiquer(self):
+        """
+        Explication d'une irréalisabilité : nœuds/arcs en conflit (IIS) et
+        corrections de bilan minimales, mise en cache par empreinte des données
+        (voir Dorra.diagnostic). Le résultat est aussi rangé dans
+        self.resultats['diagnostic'].
+        """
+        self.resultats['diagnostic'] = diagnostiquer(self.donnees)
+        return self.resultats['diagnostic']
+
+    def options(self):
+        """Détection des fonctionnalités activées à partir des données"""
+        return {
+            'use_fixed': 'Cout_Fixe' in self.donnees,
+            'use_min': 'Capacite_Min' in self.donnees,
+            'use_press': 'Pression_Min' in self.donnees or 'Pression_Max' in self.donnees,
+            'use_losses': 'Perte_Charge' in self.donnees,
+            'use_diam': 'Diametre' in self.donnees,
+            'use_redund': self.donnees.get('Contrainte_Redondance', False),
+        }
+
+    def resoudre(self, matriciel=False, progression=None, annulation=None, decomposer=False):
+        """
+        Construit et résout le modèle.
+
+        Args:
+            matriciel: True pour la construction matricielle (matrice d'incidence
+                       creuse + API matricielle de Gurobi), adaptée aux grands réseaux
+            progression: Fonction appelée pendant le branch-and-bound (voir rappel_progression)
+            annulation: threading.Event d'arrêt ; la meilleure solution trouvée est gardée
+            decomposer: Prétraitement par composantes connexes et ponts, sous-modèles
+                        résolus en parallèle (voir Dorra.decomposition) ; la
+                        progression n'est alors pas publiée
+
+        Returns:
+            dict resultats (statut, statut_text, cout_total, debits_optimaux, ...)
+        """
         try:
+            if decomposer:
+                rappel = rappel_progression(None, annulation) if annulation is not None else None
+                resultats = resoudre_par_composantes(self, matriciel, rappel)
+                if resultats is not None:
+                    self.resultats.update(resultats)
+                    return self.resultats
+
             m = gp.Model("DistributionGaz_Enrichi")
             m.setParam('OutputFlag', 0)
 
-            Arcs = gp.tuplelist(self.donnees['Arcs'])
-            Noeuds = self.donnees['Noeuds']
-            Bilan = self.donnees['Bilan']
-            Cout_Var = self.donnees['Cout_Var']
-            Capacite = self.donnees['Capacite']
-
-            # Détection des fonctionnalités activées
-            use_fixed = 'Cout_Fixe' in self.donnees
-            use_min = 'Capacite_Min' in self.donnees
-            use_press = 'Pression_Min' in self.donnees or 'Pression_Max' in self.donnees
-            use_losses = 'Perte_Charge' in self.donnees
-            use_diam = 'Diametre' in self.donnees
-            use_redund = self.donnees.get('Contrainte_Redondance', False)
-
-            # === VARIABLES ===
-            x = m.addVars(Arcs, vtype=GRB.CONTINUOUS, lb=0.0, ub=Capacite, name="Debit")
-            if use_fixed or use_min:
-                y = m.addVars(Arcs, vtype=GRB.BINARY, name="ArcActif")
-            if use_press or use_losses:
-                p_min = self.donnees.get('Pression_Min', {})
-                p_max = self.donnees.get('Pression_Max', {})
-                p = m.addVars(Noeuds, vtype=GRB.CONTINUOUS,
-                              lb={i: p_min.get(i, 1.0) for i in Noeuds},
-                              ub={i: p_max.get(i, 10.0) for i in Noeuds},
-                              name="Pression")
-
-            # === OBJECTIF ===
-            obj = gp.quicksum(Cout_Var[i,j]*x[i,j] for i,j in Arcs)
-            if use_fixed:
-                Cout_Fixe = self.donnees['Cout_Fixe']
-                obj += gp.quicksum(Cout_Fixe[i,j]*y[i,j] for i,j in Arcs)
-            m.setObjective(obj, GRB.MINIMIZE)
-
-            # === CONTRAINTES ===
-            # Conservation de flux
-            m.addConstrs((x.sum(i,'*') - x.sum('*',i) == Bilan[i] for i in Noeuds), name="Conservation")
-
-            # Liaison flux-activation
-            if use_fixed or use_min:
-                M = {arc: Capacite[arc] for arc in Arcs}
-                m.addConstrs((x[i,j] <= M[i,j]*y[i,j] for i,j in Arcs), name="BigM")
-            # Capacités minimales
-            if use_min:
-                Capacite_Min = self.donnees['Capacite_Min']
-                m.addConstrs((x[i,j] >= Capacite_Min[i,j]*y[i,j] for i,j in Arcs if Capacite_Min[i,j]>0),
-                             name="CapMin")
-            # Pertes de charge
-            if use_losses:
-                Perte_Charge = self.donnees['Perte_Charge']
-                Longueur = self.donnees.get('Longueur', {arc:1.0 for arc in Arcs})
-                M_pres = 20.0
-                for i,j in Arcs:
-                    if Perte_Charge[i,j]>0:
-                        perte = Perte_Charge[i,j]*Longueur.get((i,j),1.0)
-                        if use_fixed or use_min:
-                            m.addConstr(p[i]-p[j] >= perte*x[i,j]-M_pres*(1-y[i,j]), name=f"Perte_{i}_{j}")
-                        else:
-                            m.addConstr(p[i]-p[j] >= perte*x[i,j], name=f"Perte_{i}_{j}")
-            # Diamètre / vitesse
-            if use_diam:
-                Diametre = self.donnees['Diametre']
-                V_max = self.donnees.get('Vitesse_Max',20.0)
-                for i,j in Arcs:
-                    if Diametre[i,j]>0:
-                        section = 3.14159*(Diametre[i,j]/2)**2
-                        debit_max_v = section*V_max
-                        if debit_max_v < Capacite[i,j]:
-                            m.addConstr(x[i,j]<=debit_max_v, name=f"Vmax_{i}_{j}")
-            # Redondance
-            if use_redund and use_fixed:
-                noeuds_crit = self.donnees.get('Noeuds_Critiques', [])
-                for node in noeuds_crit:
-                    arcs_in = [arc for arc in Arcs if arc[1]==node]
-                    if len(arcs_in)>=2:
-                        m.addConstr(gp.quicksum(y[arc] for arc in arcs_in)>=2,
-                                    name=f"Redondance_{node}")
+            if matriciel:
+                x, y, p = self._construire_matriciel(m)
+            else:
+                x, y, p = self._construire_classique(m)
 
             # === RÉSOLUTION ===
-            m.optimize()
-
-            self.resultats['statut'] = m.status
-            if m.status==GRB.OPTIMAL:
-                self.resultats['statut_text']="OPTIMAL"
-                self.resultats['cout_total']=m.ObjVal
-                self.resultats['debits_optimaux']={(i,j):x[i,j].X for i,j in Arcs}
-                if use_fixed or use_min:
-                    self.resultats['arcs_actifs']={(i,j):y[i,j].X for i,j in Arcs}
-                if use_press or use_losses:
-                    self.resultats['pressions']={i:p[i].X for i in Noeuds}
-            elif m.status==GRB.INFEASIBLE:
-                self.resultats['statut_text']="IRRÉALISABLE"
+            if progression is None and annulation is None:
+                m.optimize()
             else:
-                self.resultats['statut_text']=f"Statut non optimal (code {m.status})"
+                m.optimize(rappel_progression(progression, annulation))
+            self._lire_resultats(m, x, y, p)
 
         except gp.GurobiError as e:
             self.resultats['statut_text']=f"Erreur Gurobi : {e.message}"
         except Exception as e:
             self.resultats['statut_text']=f"Erreur générale : {str(e)}"
 
-        return self.resultats
\ No newline at end of file
+        return self.resultats
+
+    def _construire_classique(self, m):
+        """Construction contrainte par contrainte (tuplelist / addConstrs)"""
+        Arcs = gp.tuplelist(self.donnees['Arcs'])
+        Noeuds = self.donnees['Noeuds']
+        Bilan = self.donnees['Bilan']
+        Cout_Var = self.donnees['Cout_Var']
+        Capacite = self.donnees['Capacite']
+
+        # Détection des fonctionnalités activées
+        opts = self.options()
+        use_fixed, use_min = opts['use_fixed'], opts['use_min']
+        use_press, use_losses = opts['use_press'], opts['use_losses']
+        use_diam, use_redund = opts['use_diam'], opts['use_redund']
+
+        # M par arc (prétraitement)
+        reseau = self.reseau_indexe()
+        m_debit, m_pression = self._grands_m(reseau)
+        M = dict(zip(reseau.arcs, m_debit.tolist()))
+        M_pres = dict(zip(reseau.arcs, m_pression.tolist()))
+
+        # === VARIABLES ===
+        x = m.addVars(Arcs, vtype=GRB.CONTINUOUS, lb=0.0, ub=M, name="Debit")
+        y = p = None
+        if use_fixed or use_min:
+            y = m.addVars(Arcs, vtype=GRB.BINARY, name="ArcActif")
+        if use_press or use_losses:
+            p_min = self.donnees.get('Pression_Min', {})
+            p_max = self.donnees.get('Pression_Max', {})
+            p = m.addVars(Noeuds, vtype=GRB.CONTINUOUS,
+                          lb={i: p_min.get(i, 1.0) for i in Noeuds},
+                          ub={i: p_max.get(i, 10.0) for i in Noeuds},
+                          name="Pression")
+
+        # === OBJECTIF ===
+        obj = gp.quicksum(Cout_Var[i,j]*x[i,j] for i,j in Arcs)
+        if use_fixed:
+            Cout_Fixe = self.donnees['Cout_Fixe']
+            obj += gp.quicksum(Cout_Fixe[i,j]*y[i,j] for i,j in Arcs)
+        m.setObjective(obj, GRB.MINIMIZE)
+
+        # === CONTRAINTES ===
+        # Conservation de flux
+        sortants, entrants = self.arcs_sortants, self.arcs_entrants
+        m.addConstrs((gp.quicksum(x[a] for a in sortants[i]) - gp.quicksum(x[a] for a in entrants[i])
+                      == Bilan[i] for i in Noeuds), name="Conservation")
+
+        # Liaison flux-activation
+        if use_fixed or use_min:
+            m.addConstrs((x[i,j] <= M[i,j]*y[i,j] for i,j in Arcs), name="BigM")
+        # Capacités minimales
+        if use_min:
+            Capacite_Min = self.donnees['Capacite_Min']
+            m.addConstrs((x[i,j] >= Capacite_Min[i,j]*y[i,j] for i,j in Arcs if Capacite_Min[i,j]>0),
+                         name="CapMin")
+        # Pertes de charge
+        if use_losses:
+            Perte_Charge = self.donnees['Perte_Charge']
+            Longueur = self.donnees.get('Longueur', {arc:1.0 for arc in Arcs})
+            for i,j in Arcs:
+                if Perte_Charge[i,j]>0:
+                    perte = Perte_Charge[i,j]*Longueur.get((i,j),1.0)
+                    if use_fixed or use_min:
+                        m.addConstr(p[i]-p[j] >= perte*x[i,j]-M_pres[i,j]*(1-y[i,j]), name=f"Perte_{i}_{j}")
+                    else:
+                        m.addConstr(p[i]-p[j] >= perte*x[i,j], name=f"Perte_{i}_{j}")
+        # Diamètre / vitesse
+        if use_diam:
+            Diametre = self.donnees['Diametre']
+            V_max = self.donnees.get('Vitesse_Max',20.0)
+            for i,j in Arcs:
+                if Diametre[i,j]>0:
+                    section = 3.14159*(Diametre[i,j]/2)**2
+                    debit_max_v = section*V_max
+                    if debit_max_v < Capacite[i,j]:
+                        m.addConstr(x[i,j]<=debit_max_v, name=f"Vmax_{i}_{j}")
+        # Redondance
+        if use_redund and use_fixed:
+            noeuds_crit = self.donnees.get('Noeuds_Critiques', [])
+            for node in noeuds_crit:
+                arcs_in = self.arcs_entrants.get(node, [])
+                if len(arcs_in)>=2:
+                    m.addConstr(gp.quicksum(y[arc] for arc in arcs_in)>=2,
+                                name=f"Redondance_{node}")
+
+        return x, y, p
+
+    def _construire_matriciel(self, m):
+        """
+        Construction matricielle : la matrice d'incidence nœud-arc (CSR) est
+        construite une seule fois et toutes les familles de contraintes sont
+        ajoutées en bloc par addMConstr. Mêmes contraintes que _construire_classique.
+        """
+        reseau = self.reseau_indexe()
+        nN, nA = reseau.nb_noeuds, reseau.nb_arcs
+        N = reseau.incidence()
+        I = sp.identity(nA, format='csr')
+
+        opts = self.options()
+        use_fixed, use_min = opts['use_fixed'], opts['use_min']
+        use_press, use_losses = opts['use_press'], opts['use_losses']
+        use_y = use_fixed or use_min
+
+        cap = reseau.valeurs_arcs(self.donnees['Capacite'])
+        cout = reseau.valeurs_arcs(self.donnees['Cout_Var'])
+        bilan = reseau.valeurs_noeuds(self.donnees['Bilan'])
+        m_debit, m_pression = self._grands_m(reseau)
+
+        # === VARIABLES ===
+        x = m.addMVar(nA, lb=0.0, ub=m_debit, name="Debit")
+        y = p = m._bigm = None
+        if use_y:
+            y = m.addMVar(nA, vtype=GRB.BINARY, name="ArcActif")
+        if use_press or use_losses:
+            p = m.addMVar(nN,
+                          lb=reseau.valeurs_noeuds(self.donnees.get('Pression_Min', {}), 1.0),
+                          ub=reseau.valeurs_noeuds(self.donnees.get('Pression_Max', {}), 10.0),
+                          name="Pression")
+
+        # === OBJECTIF ===
+        obj = cout @ x
+        if use_fixed:
+            obj += reseau.valeurs_arcs(self.donnees['Cout_Fixe']) @ y
+        m.setObjective(obj, GRB.MINIMIZE)
+
+        # === CONTRAINTES ===
+        # Conservation de flux : N x = Bilan
+        m._conservation = m.addMConstr(N, x, '=', bilan, name="Conservation")
+
+        # Liaison flux-activation : x - M y <= 0
+        if use_y:
+            xy = gp.MVar.fromlist(x.tolist() + y.tolist())
+            m._bigm = m.addMConstr(sp.hstack([I, -sp.diags(m_debit, format='csr')], format='csr'), xy, '<',
+                                   np.zeros(nA), name="BigM")
+        # Capacités minimales : x - Cmin y >= 0 (arcs avec Cmin > 0)
+        if use_min:
+            cmin = reseau.valeurs_arcs(self.donnees['Capacite_Min'])
+            sel = np.flatnonzero(cmin > 0)
+            if len(sel):
+                m.addMConstr(sp.hstack([I[sel], -sp.diags(cmin, format='csr')[sel]], format='csr'), xy, '>',
+                             np.zeros(len(sel)), name="CapMin")
+        # Pertes de charge : p_i - p_j - perte x (- M y) >= 0 (-M)
+        if use_losses:
+            longueur = reseau.valeurs_arcs(self.donnees.get('Longueur', {}), 1.0)
+            perte = reseau.valeurs_arcs(self.donnees['Perte_Charge'])
+            sel = np.flatnonzero(perte > 0)
+            if len(sel):
+                M_pres = m_pression[sel]
+                perte = perte * longueur
+                blocs = [N.T.tocsr()[sel], -sp.diags(perte, format='csr')[sel]]
+                variables = p.tolist() + x.tolist()
+                rhs = np.zeros(len(sel))
+                if use_y:
+                    blocs.append(-sp.diags(M_pres, format='csr') @ I[sel])
+                    variables += y.tolist()
+                    rhs -= M_pres
+                m.addMConstr(sp.hstack(blocs, format='csr'), gp.MVar.fromlist(variables), '>',
+                             rhs, name="Perte")
+        # Diamètre / vitesse : x <= section * V_max lorsque plus restrictif
+        if opts['use_diam']:
+            diam = reseau.valeurs_arcs(self.donnees['Diametre'])
+            debit_max_v = 3.14159*(diam/2)**2 * self.donnees.get('Vitesse_Max', 20.0)
+            sel = np.flatnonzero((diam > 0) & (debit_max_v < cap))
+            if len(sel):
+                m.addMConstr(I[sel], x, '<', debit_max_v[sel], name="Vmax")
+        # Redondance : au moins deux arcs entrants actifs par nœud critique
+        if opts['use_redund'] and use_fixed:
+            crit = [reseau.indice_noeud[n] for n in self.donnees.get('Noeuds_Critiques', [])
+                    if n in reseau.indice_noeud]
+            E = reseau.entrants()[crit]
+            sel = np.flatnonzero(np.diff(E.indptr) >= 2)
+            if len(sel):
+                m.addMConstr(E[sel], y, '>', np.full(len(sel), 2.0), name="Redondance")
+
+        #poignées conservées pour les modifications en place (scénarios)
+        m._reseau, m._x, m._y, m._p = reseau, x, y, p
+
+        #résultats lus par arc / nœud comme pour le modèle classique
+        return (_ParIndice(x, reseau.arcs),
+                _ParIndice(y, reseau.arcs) if y is not None else None,
+                _ParIndice(p, reseau.noeuds) if p is not None else None)
+
+    def _lire_resultats(self, m, x, y, p):
+        """Remplit self.resultats après optimisation"""
+        Arcs = [tuple(a) for a in self.donnees['Arcs']]
+        self.resultats['statut'] = m.status
+        if m.status==GRB.OPTIMAL:
+            self.resultats['statut_text']="OPTIMAL"
+        elif m.status in (GRB.INTERRUPTED, GRB.TIME_LIMIT) and m.SolCount > 0:
+            # arrêt demandé ou limite de temps : meilleure solution trouvée et écart à la borne
+            self.resultats['statut_text']=("INTERROMPU (meilleure solution)" if m.status==GRB.INTERRUPTED
+                                           else "LIMITE DE TEMPS (meilleure solution)")
+            self.resultats['gap']=m.MIPGap if m.IsMIP else 0.0
+        elif m.status==GRB.INFEASIBLE:
+            self.resultats['statut_text']="IRRÉALISABLE"
+            return
+        elif m.status==GRB.INTERRUPTED:
+            self.resultats['statut_text']="INTERROMPU"
+            return
+        elif m.status==GRB.TIME_LIMIT:
+            self.resultats['statut_text']="LIMITE DE TEMPS"
+            return
+        else:
+            self.resultats['statut_text']=f"Statut non optimal (code {m.status})"
+            return
+        self.resultats['cout_total']=m.ObjVal
+        self.resultats['debits_optimaux']=_valeurs(x, Arcs)
+        if y is not None:
+            self.resultats['arcs_actifs']=_valeurs(y, Arcs)
+        if p is not None:
+            self.resultats['pressions']=_valeurs(p, self.donnees['Noeuds'])
+
+
+class _ParIndice:
+    """Accès x[i,j] / p[i] sur un MVar, comme sur un tupledict"""
+
+    def __init__(self, mvar, cles):
+        self._mvar = mvar
+        self._position = {c: k for k, c in enumerate(cles)}
+
+    def __getitem__(self, cle):
+        return self._mvar[self._position[cle]]
+
+    def valeurs(self):
+        """Valeurs de la solution, lues en un seul appel"""
+        return dict(zip(self._position, self._mvar.X.tolist()))
+
+
+def _valeurs(v, cles):
+    #dict {clé: valeur} depuis un tupledict ou un _ParIndice
+    if isinstance(v, _ParIndice):
+        return v.valeurs()
+    return {c: v[c].X for c in cles}
@@ -1,4 +1,5 @@
 import sys
+import threading
 from qtpy.QtWidgets import *
 
 
@@ -8,27 +9,79 @@ import matplotlib.pyplot as plt
 import networkx as nx
 
 from Dorra.EnergiePl import ModeleGaz  # ton modèle enrichi
+from Dorra.weymouth import ModeleGazWeymouth
+from Dorra.batch import lire_scenarios_csv, executer_lot
+from Dorra.chargement import charger_reseau
+from Dorra.diagnostic import resume
+
+# Au-delà, le graphe du réseau n'est pas dessiné (disposition trop coûteuse)
+MAX_NOEUDS_GRAPHE = 500
 
 # --- Thread de résolution ---
 class SolverWorker(QThread):
     result_ready = Signal(dict)
     error_signal = Signal(str)
+    progress = Signal(object)
 
     def __init__(self, donnees):
         super().__init__()
         self.donnees = donnees
+        self.modele = None
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        """Demande l'arrêt : Gurobi s'interrompt et garde la meilleure solution"""
+        self.cancel_event.set()
 
     def run(self):
         try:
-            modele = ModeleGaz(self.donnees)
-            resultats = modele.resoudre()
-            if "Erreur" in resultats.get('statut_text','') or "IRRÉALISABLE" in resultats.get('statut_text',''):
+            if self.donnees.get('Weymouth', False):
+                modele = self.modele = ModeleGazWeymouth(self.donnees)
+            else:
+                modele = self.modele = ModeleGaz(self.donnees)
+            suivi = dict(progression=self.progress.emit, annulation=self.cancel_event)
+            if isinstance(modele, ModeleGazWeymouth):
+                resultats = modele.resoudre(**suivi)
+            else:
+                # réseau importé : construction matricielle sur les colonnes,
+                # composantes indépendantes résolues en parallèle
+                importe = 'Reseau_Indexe' in self.donnees
+                resultats = modele.resoudre(matriciel=importe, decomposer=importe, **suivi)
+            if 'debits_optimaux' not in resultats and resultats.get('statut_text') == "INTERROMPU":
+                self.error_signal.emit("Résolution interrompue avant toute solution")
+            elif "IRRÉALISABLE" in resultats.get('statut_text',''):
+                # explication : nœuds et arcs en conflit
+                diagnostic = modele.diagnostiquer()
+                self.error_signal.emit(f"{resultats['statut_text']}\n\n{resume(diagnostic)}")
+            elif "Erreur" in resultats.get('statut_text',''):
                 self.error_signal.emit(resultats['statut_text'])
             else:
                 self.result_ready.emit(resultats)
         except Exception as e:
             self.error_signal.emit(f"Erreur inattendue : {str(e)}")
 
+# --- Thread de résolution d'un lot de scénarios ---
+class BatchWorker(QThread):
+    result_ready = Signal(object)
+    error_signal = Signal(str)
+
+    def __init__(self, donnees, scenarios):
+        super().__init__()
+        self.donnees = donnees
+        self.scenarios = scenarios
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        # les scénarios pas encore résolus sont abandonnés
+        self.cancel_event.set()
+
+    def run(self):
+        try:
+            self.result_ready.emit(executer_lot(self.donnees, self.scenarios,
+                                                annulation=self.cancel_event))
+        except Exception as e:
+            self.error_signal.emit(f"Erreur inattendue : {str(e)}")
+
 # --- IHM principale ---
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -47,11 +100,23 @@ class MainWindow(QMainWindow):
         self.btn_solve.clicked.connect(self.lancer_resolution)
         self.layout.addWidget(self.btn_solve)
 
+        self.btn_cancel = QPushButton("⛔ Annuler")
+        self.btn_cancel.setToolTip("Arrête la résolution et garde la meilleure solution trouvée")
+        self.btn_cancel.setEnabled(False)
+        self.btn_cancel.clicked.connect(self.annuler_resolution)
+        self.layout.addWidget(self.btn_cancel)
+
+        self.btn_batch = QPushButton("📅 Lot de scénarios (CSV)")
+        self.btn_batch.clicked.connect(self.lancer_lot)
+        self.layout.addWidget(self.btn_batch)
+
         self.setup_config_tab()
         self.setup_data_tab()
         self.setup_results_tab()
+        self.setup_batch_tab()
 
         self.worker = None
+        self.batch_worker = None
 
         # --- Pré-remplissage pour test ---
         self.input_nodes.setText("3")
@@ -90,8 +155,10 @@ class MainWindow(QMainWindow):
         self.cb_losses = QCheckBox("Pertes de charge")
         self.cb_diam = QCheckBox("Diamètre / vitesse")
         self.cb_red = QCheckBox("Redondance nœuds critiques")
+        self.cb_weymouth = QCheckBox("Pertes de Weymouth (p² - p² = K·x²)")
+        self.cb_weymouth.setToolTip("Remplace la perte linéaire ; nécessite « Pertes de charge »")
 
-        for cb in [self.cb_fixed,self.cb_mincap,self.cb_press,self.cb_losses,self.cb_diam,self.cb_red]:
+        for cb in [self.cb_fixed,self.cb_mincap,self.cb_press,self.cb_losses,self.cb_weymouth,self.cb_diam,self.cb_red]:
             g_layout.addWidget(cb)
 
         group.setLayout(g_layout)
@@ -122,8 +189,16 @@ class MainWindow(QMainWindow):
         self.btn_generate = QPushButton("Générer tables")
         self.btn_generate.clicked.connect(self.generate_tables)
         hbox.addWidget(self.btn_generate)
+        self.btn_import = QPushButton("📂 Importer réseau (CSV/GeoJSON)")
+        self.btn_import.clicked.connect(self.importer_reseau)
+        hbox.addWidget(self.btn_import)
         layout.addLayout(hbox)
 
+        # Réseau importé : utilisé directement, sans remplir les tableaux
+        self.reseau_importe = None
+        self.label_import = QLabel("")
+        layout.addWidget(self.label_import)
+
         scroll = QScrollArea()
         scroll.setWidgetResizable(True)
         self.scroll_content = QWidget()
@@ -133,6 +208,8 @@ class MainWindow(QMainWindow):
 
     # Génération des tableaux dynamiques
     def generate_tables(self):
+        self.reseau_importe = None
+        if hasattr(self,'label_import'): self.label_import.setText("")
         for i in reversed(range(self.scroll_layout.count())):
             w = self.scroll_layout.itemAt(i).widget()
             if w:
@@ -219,8 +296,66 @@ class MainWindow(QMainWindow):
         self.canvas = FigureCanvas(self.fig)
         layout.addWidget(self.canvas)
 
+    # --- Onglet Scénarios ---
+    def setup_batch_tab(self):
+        self.batch_tab = QWidget()
+        self.tabs.addTab(self.batch_tab,"📅 Scénarios")
+        layout = QVBoxLayout(self.batch_tab)
+        self.label_batch = QLabel("Aucun lot exécuté")
+        layout.addWidget(self.label_batch)
+        self.batch_table = QTableWidget(0,0)
+        layout.addWidget(self.batch_table)
+
+    # --- Import d'un réseau depuis fichiers ---
+    def importer_reseau(self):
+        chemin_arcs,_ = QFileDialog.getOpenFileName(self,"Arcs du réseau","","Réseau (*.csv *.geojson *.json)")
+        if not chemin_arcs: return
+        chemin_noeuds = None
+        if chemin_arcs.lower().endswith('.csv'):
+            chemin_noeuds,_ = QFileDialog.getOpenFileName(self,"Nœuds du réseau","","CSV (*.csv)")
+            if not chemin_noeuds: return
+        try:
+            vitesse = float(self.input_vmax.text()) if self.input_vmax.text().strip() else None
+            self.reseau_importe = charger_reseau(chemin_arcs, chemin_noeuds, vitesse)
+        except Exception as e:
+            QMessageBox.critical(self,"Erreur","Import impossible: "+str(e))
+            return
+        d=self.reseau_importe
+        options=[k for k in ('Cout_Fixe','Capacite_Min','Pression_Min','Perte_Charge','Diametre','Noeuds_Critiques') if k in d]
+        #options présentes dans les fichiers cochées par défaut
+        for cb,cles in self.options_reseau():
+            cb.setChecked(any(k in d for k in cles))
+        self.label_import.setText(f"Réseau importé : {len(d['Noeuds'])} nœuds, {len(d['Arcs'])} arcs"
+                                  + (f" ({', '.join(options)})" if options else "")
+                                  + " — « Générer tables » pour revenir à la saisie")
+
     # --- Collecte des données ---
+    def options_reseau(self):
+        """Case à cocher -> clés des données ModeleGaz qu'elle active"""
+        return [(self.cb_fixed,('Cout_Fixe',)),(self.cb_mincap,('Capacite_Min',)),
+                (self.cb_press,('Pression_Min','Pression_Max')),
+                (self.cb_losses,('Longueur','Perte_Charge','Weymouth')),
+                (self.cb_diam,('Diametre','Vitesse_Max')),
+                (self.cb_red,('Contrainte_Redondance','Noeuds_Critiques'))]
+
+    def collecter_reseau_importe(self):
+        """Réseau importé restreint aux options cochées (une colonne absente du fichier reste absente)"""
+        try:
+            donnees=dict(self.reseau_importe)
+            for cb,cles in self.options_reseau():
+                if not cb.isChecked():
+                    for k in cles: donnees.pop(k,None)
+            if 'Perte_Charge' in donnees and self.cb_weymouth.isChecked(): donnees['Weymouth']=True
+            if 'Diametre' in donnees and self.input_vmax.text().strip():
+                donnees['Vitesse_Max']=float(self.input_vmax.text())
+            return donnees
+        except Exception as e:
+            QMessageBox.critical(self,"Erreur","Données invalides: "+str(e))
+            return None
+
     def collecter_donnees(self):
+        if self.reseau_importe is not None:
+            return self.collecter_reseau_importe()
         try:
             Arcs,Cout_Var,Capacite={}, {}, {}
             Cout_Fixe,Cap_Min={}, {}
@@ -247,17 +382,19 @@ class MainWindow(QMainWindow):
 
             # avancés
             if hasattr(self,'adv_table'):
+                liste_arcs=list(Arcs.keys())
                 for r in range(self.adv_table.rowCount()):
+                    arc=liste_arcs[r]
                     c=0
                     if self.cb_fixed.isChecked():
-                        Cout_Fixe[list(Arcs.keys())[r]]=float(self.adv_table.item(r,c).text());c+=1
+                        Cout_Fixe[arc]=float(self.adv_table.item(r,c).text());c+=1
                     if self.cb_mincap.isChecked():
-                        Cap_Min[list(Arcs.keys())[r]]=float(self.adv_table.item(r,c).text());c+=1
+                        Cap_Min[arc]=float(self.adv_table.item(r,c).text());c+=1
                     if self.cb_losses.isChecked():
-                        Longueur[list(Arcs.keys())[r]]=float(self.adv_table.item(r,c).text());c+=1
-                        Perte[list(Arcs.keys())[r]]=float(self.adv_table.item(r,c).text());c+=1
+                        Longueur[arc]=float(self.adv_table.item(r,c).text());c+=1
+                        Perte[arc]=float(self.adv_table.item(r,c).text());c+=1
                     if self.cb_diam.isChecked():
-                        Diametre[list(Arcs.keys())[r]]=float(self.adv_table.item(r,c).text())
+                        Diametre[arc]=float(self.adv_table.item(r,c).text())
 
             # noeuds
             for r in range(self.node_table.rowCount()):
@@ -283,6 +420,7 @@ class MainWindow(QMainWindow):
             if self.cb_losses.isChecked():
                 donnees['Longueur']=Longueur
                 donnees['Perte_Charge']=Perte
+                if self.cb_weymouth.isChecked(): donnees['Weymouth']=True
             if self.cb_diam.isChecked():
                 donnees['Diametre']=Diametre
                 donnees['Vitesse_Max']=float(self.input_vmax.text())
@@ -304,8 +442,35 @@ class MainWindow(QMainWindow):
         self.worker = SolverWorker(donnees)
         self.worker.result_ready.connect(self.afficher_resultats)
         self.worker.error_signal.connect(self.handle_error)
+        self.worker.progress.connect(self.afficher_progression)
+        self.worker.finished.connect(lambda: self.btn_cancel.setEnabled(False))
+        self.btn_cancel.setEnabled(True)
         self.worker.start()
 
+    def closeEvent(self, event):
+        # un QThread encore actif ne peut pas être détruit : arrêt puis attente
+        for worker in (self.worker, self.batch_worker):
+            if worker is not None and worker.isRunning():
+                worker.cancel()
+                worker.wait()
+        super().closeEvent(event)
+
+    def annuler_resolution(self):
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.cancel()
+            self.btn_cancel.setEnabled(False)
+            self.label_status.setText("Statut : Annulation en cours...")
+
+    def afficher_progression(self, info):
+        # meilleure solution, borne et écart pendant le branch-and-bound
+        meilleure = f"{info['meilleure']:.2f} €" if info['meilleure'] is not None else "—"
+        gap = f"{info['gap']*100:.2f} %" if info['gap'] is not None else "—"
+        self.label_status.setText(
+            f"Statut : Résolution en cours ({info['temps']:.0f} s, {info['noeuds']} nœuds)"
+            f" — meilleure : {meilleure} | borne : {info['borne']:.2f} | écart : {gap}")
+        if info['meilleure'] is not None:
+            self.label_cost.setText(f"Coût total : {info['meilleure']:.2f} €")
+
     def handle_error(self,msg):
         QMessageBox.critical(self,"Erreur",msg)
         self.label_status.setText("Statut : ERREUR")
@@ -314,35 +479,93 @@ class MainWindow(QMainWindow):
     # --- Affichage résultats ---
     def afficher_resultats(self,res):
         self.btn_solve.setEnabled(True)
-        self.label_status.setText(f"Statut : {res.get('statut_text')}")
+        statut=f"Statut : {res.get('statut_text')}"
+        if 'gap' in res:
+            statut+=f" — écart : {res['gap']*100:.2f} %"
+        if 'presolve' in res:
+            statut+=(f" — {res['presolve']['composantes']} composante(s),"
+                     f" {res['presolve']['ponts']} pont(s)")
+        self.label_status.setText(statut)
         if 'cout_total' in res:
             self.label_cost.setText(f"Coût total : {res['cout_total']:.2f} €")
 
         debits=res.get('debits_optimaux',{})
         arcs_act=res.get('arcs_actifs',{})
+        # données et index d'adjacence du modèle résolu (pas de nouvelle lecture des tableaux)
+        modele=self.worker.modele
+        donnees=modele.donnees
         self.results_table.setRowCount(len(debits))
         for r,(arc,val) in enumerate(debits.items()):
             self.results_table.setItem(r,0,QTableWidgetItem(f"{arc[0]}→{arc[1]}"))
             self.results_table.setItem(r,1,QTableWidgetItem(f"{val:.2f}"))
             etat="✓" if (arc in arcs_act and arcs_act[arc]>0.5) else "✗"
             self.results_table.setItem(r,2,QTableWidgetItem(etat))
-            cout = val*self.collecter_donnees()['Cout_Var'][arc]
+            cout = val*donnees['Cout_Var'][arc]
             if arc in arcs_act and arcs_act[arc]>0.5:
-                cout += self.collecter_donnees().get('Cout_Fixe',{}).get(arc,0)
+                cout += donnees.get('Cout_Fixe',{}).get(arc,0)
             self.results_table.setItem(r,3,QTableWidgetItem(f"{cout:.2f}"))
 
         # --- Graphe ---
         self.ax.clear()
+        if len(modele.arcs_sortants)>MAX_NOEUDS_GRAPHE:
+            self.ax.text(0.5,0.5,f"Réseau de {len(modele.arcs_sortants)} nœuds : graphe non affiché",
+                         ha='center',va='center')
+            self.ax.set_axis_off()
+            self.canvas.draw()
+            return
         G=nx.DiGraph()
-        for n in self.collecter_donnees()['Noeuds']:
+        for n,arcs_out in modele.arcs_sortants.items():
             G.add_node(n)
-        for arc in debits:
-            G.add_edge(arc[0],arc[1])
-        colors=['green' if (arc in arcs_act and arcs_act[arc]>0.5) else 'red' for arc in debits]
+            G.add_edges_from(arcs_out)
+        colors=['green' if (arc in arcs_act and arcs_act[arc]>0.5) else 'red' for arc in G.edges()]
         pos=nx.spring_layout(G)
         nx.draw(G,pos,ax=self.ax,node_color='lightblue',with_labels=True,arrows=True,edge_color=colors,arrowstyle='-|>',arrowsize=20)
         self.canvas.draw()
 
+    # --- Lot de scénarios ---
+    def lancer_lot(self):
+        chemin,_ = QFileDialog.getOpenFileName(self,"Scénarios de demande","","CSV (*.csv)")
+        if not chemin: return
+        donnees = self.collecter_donnees()
+        if not donnees: return
+        try:
+            scenarios = lire_scenarios_csv(chemin)
+        except Exception as e:
+            QMessageBox.critical(self,"Erreur","Fichier de scénarios invalide: "+str(e))
+            return
+        inconnus = {n for _,bilan in scenarios for n in bilan} - set(donnees['Noeuds'])
+        if inconnus:
+            QMessageBox.critical(self,"Erreur","Nœuds inconnus : "+", ".join(sorted(inconnus)))
+            return
+        self.btn_batch.setEnabled(False)
+        self.label_batch.setText(f"Résolution de {len(scenarios)} scénarios...")
+        self.batch_worker = BatchWorker(donnees, scenarios)
+        self.batch_worker.result_ready.connect(self.afficher_lot)
+        self.batch_worker.error_signal.connect(self.handle_batch_error)
+        self.batch_worker.start()
+
+    def handle_batch_error(self,msg):
+        QMessageBox.critical(self,"Erreur",msg)
+        self.label_batch.setText("Lot : ERREUR")
+        self.btn_batch.setEnabled(True)
+
+    def afficher_lot(self,lignes):
+        self.btn_batch.setEnabled(True)
+        colonnes=[]
+        for ligne in lignes:
+            colonnes.extend(c for c in ligne if c not in colonnes)
+        self.batch_table.setColumnCount(len(colonnes))
+        self.batch_table.setHorizontalHeaderLabels(colonnes)
+        self.batch_table.setRowCount(len(lignes))
+        for r,ligne in enumerate(lignes):
+            for c,col in enumerate(colonnes):
+                val=ligne.get(col)
+                texte="" if val is None else (f"{val:.2f}" if isinstance(val,float) else str(val))
+                self.batch_table.setItem(r,c,QTableWidgetItem(texte))
+        optimaux=sum(1 for ligne in lignes if ligne['statut']=="OPTIMAL")
+        self.label_batch.setText(f"{len(lignes)} scénarios résolus, {optimaux} optimaux")
+        self.tabs.setCurrentWidget(self.batch_tab)
+
 def main():
     app = QApplication(sys.argv)
     window = MainWindow()
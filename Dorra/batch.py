@@ -0,0 +1,143 @@
+import csv
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import gurobipy as gp
+
+from Dorra.scenarios import ModeleGazScenarios
+
+
+def lire_scenarios_csv(chemin):
+    """
+    Lit un fichier CSV de scénarios de demande.
+
+    Une ligne par scénario : la première colonne donne le nom du scénario
+    (heure, cas météo, ...), les colonnes suivantes le bilan de chaque nœud
+    (en-tête = nom du nœud). Une cellule vide garde le bilan de base.
+
+    Args:
+        chemin: Chemin du fichier CSV
+
+    Returns:
+        liste de (nom, {noeud: bilan})
+    """
+    scenarios = []
+    with open(chemin, newline='', encoding='utf-8-sig') as f:
+        lecteur = csv.reader(f)
+        entete = [c.strip() for c in next(lecteur)]
+        noeuds = entete[1:]
+        for ligne in lecteur:
+            if not ligne or not ligne[0].strip():
+                continue
+            bilan = {n: float(v) for n, v in zip(noeuds, ligne[1:]) if v.strip()}
+            scenarios.append((ligne[0].strip(), bilan))
+    return scenarios
+
+
+def _ligne_resultat(nom, res, noeuds, arcs):
+    #une ligne du tableau agrégé
+    ligne = {'scenario': nom, 'statut': res.get('statut_text'),
+             'cout_total': res.get('cout_total'), 'temps': res.get('temps')}
+    debits = res.get('debits_optimaux')
+    if debits is not None:
+        actifs = res.get('arcs_actifs')
+        if actifs is not None:
+            ouverts = [a for a in arcs if actifs[a] > 0.5]
+        else:
+            ouverts = [a for a in arcs if debits[a] > 1e-6]
+        ligne['nb_arcs_actifs'] = len(ouverts)
+        ligne['arcs_actifs'] = ";".join(f"{i}→{j}" for i, j in ouverts)
+    pressions = res.get('pressions')
+    if pressions:
+        ligne['pression_min'] = min(pressions.values())
+        ligne['pression_max'] = max(pressions.values())
+        for n in noeuds:
+            ligne[f"P_{n}"] = pressions[n]
+    return ligne
+
+
+def _resoudre_paquet(donnees, paquet, threads, arret=None):
+    #un processus : un environnement Gurobi et un modèle persistant pour tout le paquet
+    noeuds = donnees['Noeuds']
+    arcs = [tuple(a) for a in donnees['Arcs']]
+    lignes = []
+    with gp.Env(params={'OutputFlag': 0, 'Threads': threads}) as env:
+        modele = ModeleGazScenarios(donnees, env=env)
+        for nom, bilan, *reste in paquet:
+            if arret is not None and arret.is_set():
+                lignes.append({'scenario': nom, 'statut': "ANNULÉ"})
+                continue
+            res = modele.resoudre_scenario(bilan, reste[0] if reste else None)
+            lignes.append(_ligne_resultat(nom, res, noeuds, arcs))
+        if modele.modele is not None:
+            modele.modele.dispose()
+    return lignes
+
+
+def executer_lot(donnees, scenarios, processus=None, threads_par_processus=1, annulation=None):
+    """
+    Résout un lot de scénarios de demande en parallèle.
+
+    Les scénarios sont répartis en paquets contigus (un par processus) ; chaque
+    processus (démarré par spawn, sans copier l'état du processus appelant)
+    ouvre son propre environnement Gurobi limité à
+    threads_par_processus threads et réutilise un modèle persistant
+    (ModeleGazScenarios) d'un scénario à l'autre.
+
+    Args:
+        donnees: Données du réseau (format ModeleGaz)
+        scenarios: liste de (nom, bilan[, capacites]), par exemple lire_scenarios_csv(...)
+        processus: Nombre de processus (par défaut : nombre de cœurs / threads_par_processus)
+        threads_par_processus: Threads Gurobi par processus
+        annulation: threading.Event optionnel ; une fois positionné, les
+            scénarios restants ne sont pas résolus (statut « ANNULÉ »)
+
+    Returns:
+        liste de lignes (dicts) dans l'ordre des scénarios : scenario, statut,
+        cout_total, temps, nb_arcs_actifs, arcs_actifs, pression_min,
+        pression_max et P_<noeud>
+    """
+    scenarios = list(scenarios)
+    if not scenarios:
+        return []
+    if processus is None:
+        processus = max(1, (os.cpu_count() or 1) // max(1, threads_par_processus))
+    processus = min(processus, len(scenarios))
+
+    if processus == 1:
+        return _resoudre_paquet(donnees, scenarios, threads_par_processus, annulation)
+
+    taille = -(-len(scenarios) // processus)
+    paquets = [scenarios[k:k + taille] for k in range(0, len(scenarios), taille)]
+    #spawn : le lot est lancé depuis un QThread d'un processus déjà multithread (Qt, Gurobi)
+    contexte = multiprocessing.get_context('spawn')
+    if annulation is None:
+        with ProcessPoolExecutor(max_workers=processus, mp_context=contexte) as pool:
+            resultats = pool.map(_resoudre_paquet, [donnees]*len(paquets), paquets,
+                                 [threads_par_processus]*len(paquets))
+            return [ligne for resultat in resultats for ligne in resultat]
+
+    #l'événement local est relayé aux processus par un Event partagé
+    with contexte.Manager() as gestionnaire, \
+            ProcessPoolExecutor(max_workers=processus, mp_context=contexte) as pool:
+        arret = gestionnaire.Event()
+        futures = [pool.submit(_resoudre_paquet, donnees, paquet, threads_par_processus, arret)
+                   for paquet in paquets]
+        en_cours = set(futures)
+        while en_cours:
+            _, en_cours = wait(en_cours, timeout=0.2, return_when=FIRST_COMPLETED)
+            if annulation.is_set():
+                arret.set()
+        return [ligne for future in futures for ligne in future.result()]
+
+
+def ecrire_resultats_csv(lignes, chemin):
+    """Écrit le tableau agrégé dans un fichier CSV (colonnes = union des clés)"""
+    colonnes = []
+    for ligne in lignes:
+        colonnes.extend(c for c in ligne if c not in colonnes)
+    with open(chemin, 'w', newline='', encoding='utf-8') as f:
+        ecrivain = csv.DictWriter(f, fieldnames=colonnes)
+        ecrivain.writeheader()
+        ecrivain.writerows(lignes)
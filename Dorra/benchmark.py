@@ -0,0 +1,288 @@
+"""
+Banc d'essai du modèle de réseau gaz.
+
+Génère des réseaux synthétiques reproductibles (arbre, maillé, grille,
+antennes radiales de type distribution), active chaque option de ModeleGaz
+séparément et mesure la construction, la résolution, le nombre de nœuds
+de branch-and-bound et la mémoire ; écrit un rapport JSON.
+
+    python -m Dorra.benchmark --topologies arbre radial --tailles 200 1000 \\
+        --options base fixe pressions pertes toutes --output bench_gaz.json
+"""
+import argparse
+import itertools
+import json
+import platform
+import time
+import tracemalloc
+from datetime import datetime
+
+import gurobipy as gp
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import dijkstra
+
+from Dorra.EnergiePl import ModeleGaz
+
+TOPOLOGIES = ('arbre', 'maille', 'grille', 'radial')
+# Option -> clés de données ajoutées au réseau de base
+OPTIONS = {
+    'base': (),
+    'fixe': ('Cout_Fixe',),
+    'min': ('Capacite_Min',),
+    'pressions': ('Pression_Min', 'Pression_Max'),
+    'pertes': ('Pression_Min', 'Pression_Max', 'Perte_Charge', 'Longueur'),
+    'diametre': ('Diametre', 'Vitesse_Max'),
+    'redondance': ('Cout_Fixe', 'Contrainte_Redondance', 'Noeuds_Critiques'),
+    'toutes': ('Cout_Fixe', 'Capacite_Min', 'Pression_Min', 'Pression_Max', 'Perte_Charge',
+               'Longueur', 'Diametre', 'Vitesse_Max', 'Contrainte_Redondance', 'Noeuds_Critiques'),
+}
+
+
+def _topologie(topologie, n, rng):
+    """Arcs (origine, destination) en indices et liste des sources"""
+    if topologie == 'arbre':
+        parents = [int(rng.integers(0, k)) for k in range(1, n)]
+        return list(zip(parents, range(1, n))), [0]
+    if topologie == 'maille':
+        arcs = set(zip((int(rng.integers(0, k)) for k in range(1, n)), range(1, n)))
+        #cordes : environ 50 % d'arcs en plus, orientées vers les indices
+        #croissants comme l'arbre (pas de circuit : pressions compatibles)
+        while len(arcs) < int(1.5*(n - 1)):
+            i, j = sorted(int(v) for v in rng.choice(n, 2, replace=False))
+            arcs.add((i, j))
+        return sorted(arcs), [0]
+    if topologie == 'grille':
+        #grille orientée depuis le coin source (vers la droite et vers le bas)
+        cote = max(2, int(round(np.sqrt(n))))
+        arcs = []
+        for r, c in itertools.product(range(cote), range(cote)):
+            k = r*cote + c
+            if c + 1 < cote:
+                arcs.append((k, k + 1))
+            if r + 1 < cote:
+                arcs.append((k, k + cote))
+        return arcs, [0]
+    if topologie == 'radial':
+        #postes de détente alimentant chacun une artère, avec des antennes
+        #courtes et quelques bouclages entre artères
+        nb_postes = max(1, n // 200)
+        arcs, postes, arteres = [], list(range(nb_postes)), [[] for _ in range(nb_postes)]
+        k = nb_postes
+        while k < n:
+            p = k % nb_postes
+            amont = arteres[p][-1] if arteres[p] else p
+            if arteres[p] and rng.random() < 0.6:
+                #antenne de 1 à 5 nœuds piquée sur l'artère
+                amont = arteres[p][int(rng.integers(0, len(arteres[p])))]
+                for _ in range(int(rng.integers(1, 6))):
+                    if k >= n:
+                        break
+                    arcs.append((amont, k))
+                    amont, k = k, k + 1
+            else:
+                arcs.append((amont, k))
+                arteres[p].append(k)
+                k += 1
+        for _ in range(max(1, nb_postes // 2) if nb_postes > 1 else 0):
+            a, b = (int(v) for v in rng.choice(nb_postes, 2, replace=False))
+            bouclage = (arteres[a][-1], arteres[b][-1]) if arteres[a] and arteres[b] else None
+            if bouclage and bouclage not in arcs and bouclage[::-1] not in arcs:
+                arcs.append(bouclage)
+        return arcs, postes
+    raise ValueError(f"Topologie inconnue : {topologie}")
+
+
+def generer_reseau(topologie, n, seed=0):
+    """
+    Génère un réseau gaz synthétique reproductible avec toutes les colonnes.
+
+    Le réseau est dimensionné pour que chaque option reste réalisable :
+    capacités et débits max. (diamètre) au-dessus de la demande totale,
+    arcs sans circuit orientés depuis les sources, pertes de charge
+    calibrées sur la profondeur du réseau (nombre d'arcs depuis la source
+    la plus proche).
+
+    Args:
+        topologie: 'arbre', 'maille', 'grille' ou 'radial'
+        n: Nombre de nœuds visé (arrondi à un carré pour la grille)
+        seed: Graine du générateur aléatoire
+
+    Returns:
+        dict donnees complet (format ModeleGaz, toutes options renseignées)
+    """
+    rng = np.random.default_rng(seed)
+    arcs_idx, sources = _topologie(topologie, n, rng)
+    n = max(max(a) for a in arcs_idx) + 1
+    noeuds = [f"N{k}" for k in range(n)]
+    arcs = [(noeuds[i], noeuds[j]) for i, j in arcs_idx]
+    nA = len(arcs)
+
+    demande = rng.integers(1, 11, n).astype(float)
+    demande[sources] = 0.0
+    bilan = -demande
+    bilan[sources] = demande.sum()/len(sources)
+    total = demande.sum()
+
+    orig = np.array([i for i, _ in arcs_idx])
+    dest = np.array([j for _, j in arcs_idx])
+    G = sp.csr_matrix((np.ones(nA), (orig, dest)), shape=(n, n))
+    profondeur = dijkstra(G, indices=sources, unweighted=True, min_only=True)
+    prof_max = max(1.0, float(np.max(profondeur[np.isfinite(profondeur)])))
+
+    capacite = total*rng.uniform(1.0, 1.5, nA)
+    longueur = rng.uniform(0.5, 2.0, nA)
+    #chute de pression totale sous 30 % de la marge sur le chemin le plus long
+    perte = 0.3*(70.0 - 20.0)/(prof_max*2.0*total)*rng.uniform(0.5, 1.0, nA)
+    vitesse = 20.0
+    diametre = 2*np.sqrt(total*rng.uniform(1.0, 1.3, nA)/(3.14159*vitesse))
+    entrants = np.bincount(dest, minlength=n)
+    candidats = np.flatnonzero(entrants >= 2)
+    critiques = rng.choice(candidats, min(len(candidats), max(1, n // 20)), replace=False) \
+        if len(candidats) else []
+
+    par_arc = lambda valeurs: dict(zip(arcs, valeurs.tolist()))
+    par_noeud = lambda valeurs: dict(zip(noeuds, valeurs.tolist()))
+    return {
+        'Noeuds': noeuds,
+        'Arcs': arcs,
+        'Bilan': par_noeud(bilan),
+        'Cout_Var': par_arc(rng.uniform(1, 5, nA)*longueur),
+        'Capacite': par_arc(capacite),
+        'Cout_Fixe': par_arc(rng.uniform(10, 50, nA)*longueur),
+        'Capacite_Min': par_arc(rng.choice([0.0, 0.0, 0.5, 1.0], nA)),
+        'Pression_Min': par_noeud(np.full(n, 20.0)),
+        'Pression_Max': par_noeud(np.full(n, 70.0)),
+        'Perte_Charge': par_arc(perte),
+        'Longueur': par_arc(longueur),
+        'Diametre': par_arc(diametre),
+        'Vitesse_Max': vitesse,
+        'Contrainte_Redondance': True,
+        'Noeuds_Critiques': [noeuds[k] for k in critiques],
+    }
+
+
+def selectionner_options(reseau, option):
+    """Données du réseau avec les seules colonnes de l'option"""
+    base = ('Noeuds', 'Arcs', 'Bilan', 'Cout_Var', 'Capacite')
+    return {k: v for k, v in reseau.items() if k in base or k in OPTIONS[option]}
+
+
+def _construire(modele, matriciel, env):
+    m = gp.Model("DistributionGaz_Banc", env=env)
+    if matriciel:
+        x, y, p = modele._construire_matriciel(m)
+    else:
+        x, y, p = modele._construire_classique(m)
+    m.update()
+    return m, x, y, p
+
+
+def memoire_construction(donnees, matriciel, env):
+    """Pic de mémoire Python (octets) pendant la construction du modèle"""
+    tracemalloc.start()
+    try:
+        m, *_ = _construire(ModeleGaz(donnees), matriciel, env)
+        _, pic = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    m.dispose()
+    return pic
+
+
+def mesurer_cas(donnees, matriciel, temps_max, env):
+    """
+    Mesure construction et résolution pour un réseau et une option.
+
+    La mémoire Python est mesurée sur une construction à part (le suivi
+    tracemalloc fausserait le temps de construction) ; la mémoire Gurobi
+    est le pic MaxMemUsed du modèle résolu.
+    """
+    pic_python = memoire_construction(donnees, matriciel, env)
+    modele = ModeleGaz(donnees)
+    t0 = time.perf_counter()
+    m, x, y, p = _construire(modele, matriciel, env)
+    t1 = time.perf_counter()
+    m.Params.TimeLimit = temps_max
+    m.optimize()
+    t2 = time.perf_counter()
+    modele._lire_resultats(m, x, y, p)
+
+    resultat = {
+        'nb_variables': m.NumVars,
+        'nb_binaires': m.NumBinVars,
+        'nb_contraintes': m.NumConstrs + m.NumGenConstrs,
+        'nb_non_zeros': m.NumNZs,
+        'construction_s': round(t1 - t0, 6),
+        'resolution_s': round(t2 - t1, 6),
+        'statut': modele.resultats.get('statut_text'),
+        'objectif': m.ObjVal if m.SolCount > 0 else None,
+        'gap': m.MIPGap if m.SolCount > 0 and m.IsMIP else None,
+        'noeuds_bb': m.NodeCount if m.IsMIP else 0,
+        'memoire_construction_mo': round(pic_python/2**20, 3),
+        'memoire_gurobi_mo': round(m.MaxMemUsed*1024, 3),
+    }
+    m.dispose()
+    return resultat
+
+
+def executer_benchmark(topologies, tailles, options, constructions=('matriciel',),
+                       seed=0, temps_max=30.0, threads=0):
+    """Exécute toute la grille et retourne le rapport"""
+    cas = []
+    with gp.Env(params={'OutputFlag': 0, 'Threads': threads}) as env:
+        for topologie, n in itertools.product(topologies, tailles):
+            reseau = generer_reseau(topologie, n, seed=seed)
+            for option, construction in itertools.product(options, constructions):
+                c = {
+                    'topologie': topologie,
+                    'nb_noeuds': len(reseau['Noeuds']),
+                    'nb_arcs': len(reseau['Arcs']),
+                    'option': option,
+                    'construction': construction,
+                }
+                try:
+                    c.update(mesurer_cas(selectionner_options(reseau, option),
+                                         construction == 'matriciel', temps_max, env))
+                except gp.GurobiError as e:
+                    c['erreur'] = str(e)
+                print(f"{topologie:7} n={c['nb_noeuds']:<6} a={c['nb_arcs']:<6} {option:10} "
+                      f"{construction:10} "
+                      + (f"construction={c['construction_s']:.3f}s resolution={c['resolution_s']:.3f}s "
+                         f"noeuds={c['noeuds_bb']:<6.0f} {c['statut']}" if 'erreur' not in c
+                         else c['erreur']))
+                cas.append(c)
+
+    return {
+        'benchmark': 'reseau_gaz',
+        'cree': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'gurobi': '.'.join(map(str, gp.gurobi.version())),
+        'seed': seed,
+        'temps_max': temps_max,
+        'cas': cas,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Banc d'essai du modèle de réseau gaz")
+    parser.add_argument('--topologies', nargs='+', default=list(TOPOLOGIES), choices=TOPOLOGIES)
+    parser.add_argument('--tailles', type=int, nargs='+', default=[100, 500])
+    parser.add_argument('--options', nargs='+', default=list(OPTIONS), choices=list(OPTIONS))
+    parser.add_argument('--constructions', nargs='+', default=['matriciel'],
+                        choices=['classique', 'matriciel'])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--temps-max', type=float, default=30.0)
+    parser.add_argument('--threads', type=int, default=0)
+    parser.add_argument('--output', default='bench_gaz.json')
+    args = parser.parse_args(argv)
+
+    rapport = executer_benchmark(args.topologies, args.tailles, args.options, args.constructions,
+                                 args.seed, args.temps_max, args.threads)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(rapport, f, indent=2)
+    print(f"Rapport écrit dans {args.output} ({len(rapport['cas'])} cas)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import time
+
+import gurobipy as gp
+from gurobipy import GRB
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import breadth_first_order
+
+from Dorra.incidence import ReseauIndexe
+
+M_PRES_DEFAUT = 20.0
+
+
+def _cumul_atteint(G, bilan_abs, terminaux, max_parcours=64):
+    """
+    Pour chaque nœud, somme des |bilan| des terminaux qui l'atteignent dans G.
+    Au-delà de max_parcours terminaux, un seul parcours depuis un super-nœud
+    relié à tous les terminaux donne une borne plus large : le total des
+    terminaux pour tout nœud atteint.
+    """
+    n = G.shape[0]
+    cumul = np.zeros(n)
+    if len(terminaux) <= max_parcours:
+        for t in terminaux:
+            cumul[breadth_first_order(G, t, directed=True, return_predecessors=False)] += bilan_abs[t]
+        return cumul
+    super_noeud = sp.csr_matrix((np.ones(len(terminaux)), (np.full(len(terminaux), n), terminaux)),
+                                shape=(n + 1, n + 1))
+    G_etendu = sp.bmat([[G, None], [None, sp.csr_matrix((1, 1))]], format='csr') + super_noeud
+    atteints = breadth_first_order(G_etendu, n, directed=True, return_predecessors=False)
+    cumul[atteints[atteints < n]] = bilan_abs[terminaux].sum()
+    return cumul
+
+
+def _offre_et_demande_atteignables(reseau, bilan):
+    """
+    Pour chaque nœud : offre totale des sources qui l'atteignent et demande
+    totale des puits qu'il atteint (parcours en largeur depuis les sources
+    sur le graphe, depuis les puits sur le graphe inversé).
+    """
+    nN = reseau.nb_noeuds
+    G = sp.csr_matrix((np.ones(reseau.nb_arcs), (reseau.orig, reseau.dest)), shape=(nN, nN))
+    offre = _cumul_atteint(G, np.abs(bilan), np.flatnonzero(bilan > 0))
+    demande = _cumul_atteint(G.T.tocsr(), np.abs(bilan), np.flatnonzero(bilan < 0))
+    return offre, demande
+
+
+def calculer_grands_m(donnees, reseau=None, demande=True):
+    """
+    Calcule le M le plus serré valide pour chaque arc.
+
+    - Débit (BigM x <= M y) : min(Capacite, section × Vitesse_Max si diamètre,
+      offre atteignant i, demande atteignable depuis j). La borne offre/demande
+      repose sur la décomposition du flot en chemins sans cycle ; elle n'est
+      utilisée que si elle reste valide (coûts variables >= 0, pas de
+      capacités minimales) et si demande=True.
+    - Pression (p_i - p_j >= perte x - M (1 - y)) : arc inactif => x = 0 et
+      la ligne doit admettre tout p_i - p_j >= Pmin_i - Pmax_j, donc
+      M = max(0, Pmax_j - Pmin_i).
+
+    Args:
+        donnees: Données du réseau (format ModeleGaz)
+        reseau: ReseauIndexe (construit si absent)
+        demande: False pour ignorer la borne offre/demande (bilans variables)
+
+    Returns:
+        (m_debit, m_pression) : tableaux alignés sur reseau.arcs
+    """
+    if reseau is None:
+        reseau = donnees.get('Reseau_Indexe') or ReseauIndexe(donnees['Noeuds'], donnees['Arcs'])
+
+    m_debit = reseau.valeurs_arcs(donnees['Capacite'])
+    if 'Diametre' in donnees:
+        diam = reseau.valeurs_arcs(donnees['Diametre'])
+        debit_max_v = 3.14159*(diam/2)**2*donnees.get('Vitesse_Max', 20.0)
+        m_debit = np.where(diam > 0, np.minimum(m_debit, debit_max_v), m_debit)
+
+    cout = reseau.valeurs_arcs(donnees['Cout_Var'])
+    if demande and 'Capacite_Min' not in donnees and np.all(cout >= 0):
+        offre, dem = _offre_et_demande_atteignables(reseau, reseau.valeurs_noeuds(donnees['Bilan']))
+        m_debit = np.minimum(m_debit, np.minimum(offre[reseau.orig], dem[reseau.dest]))
+
+    p_min = reseau.valeurs_noeuds(donnees.get('Pression_Min', {}), 1.0)
+    p_max = reseau.valeurs_noeuds(donnees.get('Pression_Max', {}), 10.0)
+    m_pression = np.maximum(p_max[reseau.dest] - p_min[reseau.orig], 0.0)
+
+    return m_debit, m_pression
+
+
+def rapport_gap_racine(donnees):
+    """
+    Compare la relaxation linéaire avec les M d'origine et les M serrés.
+
+    Le gap racine est (optimum - relaxation) / |optimum| ; le MIP est aussi
+    résolu dans les deux cas pour comparer temps et nombre de nœuds.
+
+    Args:
+        donnees: Données du réseau (format ModeleGaz)
+
+    Returns:
+        dict : relaxation_avant, relaxation_apres, optimum, gap_avant,
+        gap_apres, amelioration (points de gap gagnés), noeuds_avant,
+        noeuds_apres, temps_avant, temps_apres, ou {'erreur': ...}
+    """
+    from Dorra.EnergiePl import ModeleGaz
+
+    rapport = {}
+    for cle, serrer in (('avant', False), ('apres', True)):
+        modele = ModeleGaz(donnees, serrer_bornes=serrer)
+        with gp.Model("DistributionGaz_Bornes") as m:
+            m.setParam('OutputFlag', 0)
+            modele._construire_matriciel(m)
+            m.update()
+            relax = m.relax()
+            relax.optimize()
+            if relax.status == GRB.INFEASIBLE:
+                return {'erreur': "IRRÉALISABLE"}
+            if relax.status != GRB.OPTIMAL:
+                return {'erreur': f"Relaxation non résolue (code {relax.status})"}
+            rapport[f"relaxation_{cle}"] = relax.ObjVal
+            relax.dispose()
+
+            debut = time.perf_counter()
+            m.optimize()
+            rapport[f"temps_{cle}"] = time.perf_counter() - debut
+            if m.status != GRB.OPTIMAL:
+                return {'erreur': f"Modèle non résolu (code {m.status})"}
+            rapport[f"noeuds_{cle}"] = m.NodeCount
+            rapport['optimum'] = m.ObjVal
+
+    optimum = rapport['optimum']
+    echelle = max(abs(optimum), 1e-10)
+    rapport['gap_avant'] = (optimum - rapport['relaxation_avant'])/echelle
+    rapport['gap_apres'] = (optimum - rapport['relaxation_apres'])/echelle
+    rapport['amelioration'] = rapport['gap_avant'] - rapport['gap_apres']
+    return rapport
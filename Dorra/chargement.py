@@ -0,0 +1,245 @@
+import csv
+import json
+import os
+
+import numpy as np
+
+from Dorra.incidence import Colonne, ReseauIndexe
+
+# Colonnes reconnues (en minuscules) -> clé des données ModeleGaz
+ALIAS_NOEUDS = {
+    'noeud': 'Noeud', 'node': 'Noeud', 'id': 'Noeud', 'nom': 'Noeud', 'name': 'Noeud',
+    'bilan': 'Bilan', 'balance': 'Bilan',
+    'pression_min': 'Pression_Min', 'p_min': 'Pression_Min',
+    'pression_max': 'Pression_Max', 'p_max': 'Pression_Max',
+    'critique': 'Critique', 'critical': 'Critique',
+}
+ALIAS_ARCS = {
+    'origine': 'Origine', 'from': 'Origine', 'source': 'Origine',
+    'destination': 'Destination', 'to': 'Destination', 'target': 'Destination',
+    'capacite': 'Capacite', 'capacity': 'Capacite',
+    'cout': 'Cout_Var', 'cout_var': 'Cout_Var', 'cost': 'Cout_Var',
+    'cout_fixe': 'Cout_Fixe', 'fixed_cost': 'Cout_Fixe',
+    'capacite_min': 'Capacite_Min', 'min_capacity': 'Capacite_Min',
+    'longueur': 'Longueur', 'length': 'Longueur',
+    'perte_charge': 'Perte_Charge', 'perte': 'Perte_Charge', 'loss': 'Perte_Charge',
+    'diametre': 'Diametre', 'diameter': 'Diametre',
+}
+COLONNES_NOEUDS = ('Bilan', 'Pression_Min', 'Pression_Max', 'Critique')
+COLONNES_ARCS = ('Capacite', 'Cout_Var', 'Cout_Fixe', 'Capacite_Min', 'Longueur',
+                 'Perte_Charge', 'Diametre')
+DEFAUTS = {'Bilan': 0.0, 'Pression_Min': 1.0, 'Pression_Max': 10.0, 'Critique': 0.0,
+           'Cout_Fixe': 0.0, 'Capacite_Min': 0.0, 'Longueur': 1.0, 'Perte_Charge': 0.0,
+           'Diametre': 0.0}
+
+
+class _Accumulateur:
+    """Accumule les lignes lues colonne par colonne (listes puis tableaux NumPy)"""
+
+    def __init__(self, colonnes):
+        self.colonnes = {c: [] for c in colonnes}
+        self.presentes = set()
+        self.n = 0
+
+    def ajouter(self, valeurs):
+        for c, liste in self.colonnes.items():
+            v = valeurs.get(c)
+            if v is None or v == '':
+                liste.append(np.nan)
+            else:
+                liste.append(float(v))
+                self.presentes.add(c)
+        self.n += 1
+
+    def tableau(self, c):
+        t = np.asarray(self.colonnes[c], dtype=float)
+        return np.where(np.isnan(t), DEFAUTS.get(c, 0.0), t)
+
+
+def _normaliser(proprietes, alias):
+    return {alias[k.strip().lower()]: v for k, v in proprietes.items()
+            if k is not None and k.strip().lower() in alias}
+
+
+def _lignes_csv(chemin, alias):
+    #lecture ligne par ligne, colonnes renommées selon les alias
+    with open(chemin, newline='', encoding='utf-8-sig') as f:
+        for ligne in csv.DictReader(f):
+            yield _normaliser(ligne, alias)
+
+
+def _features_geojson(chemin, taille_bloc=1 << 20):
+    """
+    Parcourt les objets de "features" d'un fichier GeoJSON sans charger le
+    fichier entier : chaque feature est décodée dès qu'elle est complète.
+    """
+    decodeur = json.JSONDecoder()
+    with open(chemin, encoding='utf-8-sig') as f:
+        tampon = ''
+        debut = -1
+        while debut < 0:
+            bloc = f.read(taille_bloc)
+            if not bloc:
+                return
+            tampon += bloc
+            cle = tampon.find('"features"')
+            if cle >= 0:
+                debut = tampon.find('[', cle)
+        pos = debut + 1
+        fin_fichier = False
+        while True:
+            #séparateurs entre deux features
+            while pos < len(tampon) and tampon[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(tampon) and tampon[pos] == ']':
+                return
+            try:
+                feature, fin = decodeur.raw_decode(tampon, pos)
+            except json.JSONDecodeError:
+                if fin_fichier:
+                    raise
+                bloc = f.read(taille_bloc)
+                fin_fichier = not bloc
+                tampon = tampon[pos:] + bloc
+                pos = 0
+                continue
+            yield feature
+            pos = fin
+
+
+def _extremites(geometrie):
+    coords = geometrie.get('coordinates') or []
+    if geometrie.get('type') == 'MultiLineString':
+        coords = [pt for ligne in coords for pt in ligne]
+    return tuple(coords[0][:2]), tuple(coords[-1][:2])
+
+
+def charger_reseau(chemin_arcs, chemin_noeuds=None, vitesse_max=None):
+    """
+    Charge un réseau gaz depuis des fichiers CSV ou GeoJSON en colonnes.
+
+    Les fichiers sont lus en flux (ligne par ligne ou feature par feature)
+    et chaque colonne est stockée dans un tableau NumPy. Le résultat est un
+    dict au format ModeleGaz dont les valeurs par nœud/arc sont des vues
+    Colonne sur ces tableaux ; la construction matricielle les lit
+    directement, sans passer par des dicts Python.
+
+    Colonnes reconnues (voir ALIAS_ARCS / ALIAS_NOEUDS) :
+        arcs  : origine, destination, capacite, cout (obligatoires), cout_fixe,
+                capacite_min, longueur, perte_charge, diametre
+        nœuds : noeud, bilan, pression_min, pression_max, critique
+    Une fonctionnalité optionnelle est activée si sa colonne est présente.
+
+    En GeoJSON, les arcs sont les features LineString/MultiLineString et les
+    nœuds les features Point (un seul fichier peut contenir les deux). Sans
+    propriétés origine/destination, les extrémités d'un tronçon sont
+    rattachées aux Points de mêmes coordonnées (ou deviennent des nœuds « x,y »).
+
+    Args:
+        chemin_arcs: Fichier des arcs (.csv, .geojson ou .json)
+        chemin_noeuds: Fichier des nœuds (optionnel pour un GeoJSON contenant les Points)
+        vitesse_max: Vitesse maximale pour la colonne diametre (20 par défaut dans ModeleGaz)
+
+    Returns:
+        dict donnees pour ModeleGaz
+    """
+    noeuds = []
+    indice = {}
+    par_coordonnees = {}
+
+    def noeud(nom):
+        k = indice.get(nom)
+        if k is None:
+            k = indice[nom] = len(noeuds)
+            noeuds.append(nom)
+        return k
+
+    acc_noeuds = _Accumulateur(COLONNES_NOEUDS)
+    lignes_noeuds = {}
+    acc_arcs = _Accumulateur(COLONNES_ARCS)
+    orig, dest = [], []
+
+    def ajouter_noeud(valeurs):
+        nom = str(valeurs.get('Noeud', '')).strip()
+        if not nom:
+            raise ValueError("Nœud sans identifiant")
+        if nom in lignes_noeuds:
+            raise ValueError(f"Nœud en double : {nom}")
+        noeud(nom)
+        lignes_noeuds[nom] = acc_noeuds.n
+        acc_noeuds.ajouter(valeurs)
+
+    def ajouter_arc(valeurs, extremites=None):
+        i, j = valeurs.get('Origine'), valeurs.get('Destination')
+        if (i in (None, '') or j in (None, '')) and extremites is not None:
+            i, j = (par_coordonnees.get(c, f"{c[0]},{c[1]}") for c in extremites)
+        if i in (None, '') or j in (None, ''):
+            raise ValueError(f"Arc {len(orig) + 1} sans origine/destination")
+        orig.append(noeud(str(i).strip()))
+        dest.append(noeud(str(j).strip()))
+        acc_arcs.ajouter(valeurs)
+
+    fichiers_geojson = [c for c in (chemin_noeuds, chemin_arcs)
+                        if c and os.path.splitext(c)[1].lower() in ('.geojson', '.json')]
+    #GeoJSON : Points d'abord (rattachement des extrémités par coordonnées)
+    for chemin in dict.fromkeys(fichiers_geojson):
+        for feature in _features_geojson(chemin):
+            geometrie = feature.get('geometry') or {}
+            if geometrie.get('type') == 'Point':
+                valeurs = _normaliser(feature.get('properties') or {}, ALIAS_NOEUDS)
+                coordonnees = tuple(geometrie['coordinates'][:2])
+                valeurs.setdefault('Noeud', feature.get('id'))
+                if valeurs['Noeud'] in (None, ''):
+                    #sans identifiant : même nom « x,y » que les extrémités non rattachées
+                    valeurs['Noeud'] = f"{coordonnees[0]},{coordonnees[1]}"
+                ajouter_noeud(valeurs)
+                par_coordonnees[coordonnees] = str(valeurs['Noeud']).strip()
+    if chemin_noeuds and chemin_noeuds not in fichiers_geojson:
+        for valeurs in _lignes_csv(chemin_noeuds, ALIAS_NOEUDS):
+            ajouter_noeud(valeurs)
+
+    if chemin_arcs in fichiers_geojson:
+        for feature in _features_geojson(chemin_arcs):
+            geometrie = feature.get('geometry') or {}
+            if geometrie.get('type') in ('LineString', 'MultiLineString'):
+                valeurs = _normaliser(feature.get('properties') or {}, ALIAS_ARCS)
+                ajouter_arc(valeurs, _extremites(geometrie))
+    else:
+        for valeurs in _lignes_csv(chemin_arcs, ALIAS_ARCS):
+            ajouter_arc(valeurs)
+
+    manquantes = [c for c in ('Capacite', 'Cout_Var') if c not in acc_arcs.presentes]
+    if manquantes:
+        raise ValueError(f"Colonnes d'arcs manquantes : {', '.join(manquantes)}")
+
+    # === COLONNES ===
+    arcs = [(noeuds[i], noeuds[j]) for i, j in zip(orig, dest)]
+    reseau = ReseauIndexe.depuis_indices(noeuds, arcs, orig, dest)
+    position_arcs = {a: k for k, a in enumerate(arcs)}
+    if len(position_arcs) != len(arcs):
+        raise ValueError("Arcs en double (même origine et destination)")
+
+    #nœuds cités seulement par les arcs : valeurs par défaut
+    ligne = np.array([lignes_noeuds.get(n, -1) for n in noeuds], dtype=np.int64)
+
+    def colonne_noeuds(c):
+        t = np.full(len(noeuds), DEFAUTS.get(c, 0.0))
+        connus = ligne >= 0
+        t[connus] = acc_noeuds.tableau(c)[ligne[connus]]
+        return Colonne(t, noeuds, reseau.indice_noeud)
+
+    donnees = {'Noeuds': noeuds, 'Arcs': arcs, 'Reseau_Indexe': reseau,
+               'Bilan': colonne_noeuds('Bilan')}
+    for c in ('Pression_Min', 'Pression_Max'):
+        if c in acc_noeuds.presentes:
+            donnees[c] = colonne_noeuds(c)
+    for c in COLONNES_ARCS:
+        if c in acc_arcs.presentes or (c == 'Longueur' and 'Perte_Charge' in acc_arcs.presentes):
+            donnees[c] = Colonne(acc_arcs.tableau(c), arcs, position_arcs)
+    if 'Diametre' in donnees and vitesse_max is not None:
+        donnees['Vitesse_Max'] = float(vitesse_max)
+    if 'Critique' in acc_noeuds.presentes:
+        critique = colonne_noeuds('Critique').tableau
+        donnees['Contrainte_Redondance'] = True
+        donnees['Noeuds_Critiques'] = [noeuds[k] for k in np.flatnonzero(critique > 0)]
+    return donnees
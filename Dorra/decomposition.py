@@ -0,0 +1,282 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import gurobipy as gp
+from gurobipy import GRB
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+
+from Dorra.bornes import calculer_grands_m
+
+# Données indexées par arc / par nœud, restreintes à chaque composante
+CLES_ARCS = ('Cout_Var', 'Capacite', 'Cout_Fixe', 'Capacite_Min', 'Perte_Charge',
+             'Longueur', 'Diametre')
+CLES_NOEUDS = ('Bilan', 'Pression_Min', 'Pression_Max')
+TOLERANCE = 1e-6
+
+
+def composantes(nb_noeuds, orig, dest, garder=None):
+    """
+    Composantes faiblement connexes du graphe des arcs.
+
+    Args:
+        garder: masque booléen des arcs conservés (tous par défaut)
+
+    Returns:
+        (nombre de composantes, étiquette de composante par nœud)
+    """
+    if garder is not None:
+        orig, dest = orig[garder], dest[garder]
+    G = sp.csr_matrix((np.ones(len(orig)), (orig, dest)), shape=(nb_noeuds, nb_noeuds))
+    return connected_components(G, directed=True, connection='weak')
+
+
+def ponts(nb_noeuds, orig, dest, bilan):
+    """
+    Ponts du graphe non orienté (arcs dont la suppression déconnecte le
+    réseau), par un parcours en profondeur itératif (Tarjan). Les arcs
+    parallèles ne sont jamais des ponts.
+
+    Le débit d'un pont est imposé par les bilans : tout ce que le côté
+    aval produit ou consomme passe par lui. Il est calculé pendant le
+    parcours comme la somme des bilans du sous-arbre.
+
+    Returns:
+        (masque des ponts, débit imposé sur chaque arc ; 0 hors ponts)
+    """
+    nA = len(orig)
+    extremites = np.concatenate([orig, dest])
+    ordre = np.argsort(extremites, kind='stable')
+    debut = np.searchsorted(extremites[ordre], np.arange(nb_noeuds + 1)).tolist()
+    voisins = np.concatenate([dest, orig])[ordre].tolist()
+    ids = np.concatenate([np.arange(nA), np.arange(nA)])[ordre].tolist()
+    origines = orig.tolist()
+
+    decouverte = [-1]*nb_noeuds
+    bas = [0]*nb_noeuds
+    arc_parent = [-1]*nb_noeuds
+    somme = bilan.tolist()
+    est_pont = np.zeros(nA, dtype=bool)
+    debit = np.zeros(nA)
+    temps = 0
+    for racine in range(nb_noeuds):
+        if decouverte[racine] >= 0:
+            continue
+        decouverte[racine] = bas[racine] = temps
+        temps += 1
+        pile = [[racine, debut[racine]]]
+        while pile:
+            sommet = pile[-1]
+            u, k = sommet
+            if k < debut[u + 1]:
+                sommet[1] += 1
+                v, e = voisins[k], ids[k]
+                if e == arc_parent[u]:
+                    continue
+                if decouverte[v] < 0:
+                    arc_parent[v] = e
+                    decouverte[v] = bas[v] = temps
+                    temps += 1
+                    pile.append([v, debut[v]])
+                else:
+                    bas[u] = min(bas[u], decouverte[v])
+                continue
+            pile.pop()
+            if not pile:
+                continue
+            p = pile[-1][0]
+            bas[p] = min(bas[p], bas[u])
+            somme[p] += somme[u]
+            if bas[u] > decouverte[p]:
+                #sous-arbre de u = un côté du pont : son bilan net traverse le pont
+                e = arc_parent[u]
+                est_pont[e] = True
+                debit[e] = somme[u] if origines[e] == u else -somme[u]
+    return est_pont, debit
+
+
+def _restreindre(donnees, noeuds, arcs, bilan):
+    """Données ModeleGaz d'une composante (bilan ajusté des débits des ponts)"""
+    sous = {k: v for k, v in donnees.items()
+            if k not in CLES_ARCS + CLES_NOEUDS + ('Noeuds', 'Arcs', 'Reseau_Indexe')}
+    sous['Noeuds'], sous['Arcs'] = noeuds, arcs
+    for cle in CLES_ARCS:
+        if cle in donnees:
+            sous[cle] = {a: donnees[cle][a] for a in arcs if a in donnees[cle]}
+    for cle in CLES_NOEUDS[1:]:
+        if cle in donnees:
+            sous[cle] = {n: donnees[cle][n] for n in noeuds if n in donnees[cle]}
+    sous['Bilan'] = bilan
+    if 'Noeuds_Critiques' in donnees:
+        dans = set(noeuds)
+        sous['Noeuds_Critiques'] = [n for n in donnees['Noeuds_Critiques'] if n in dans]
+    return sous
+
+
+def _resoudre_composante(modele, env, matriciel, rappel):
+    #un sous-modèle dans l'environnement du thread
+    with gp.Model("DistributionGaz_Composante", env=env) as m:
+        if matriciel:
+            x, y, p = modele._construire_matriciel(m)
+        else:
+            x, y, p = modele._construire_classique(m)
+        m.optimize(rappel)
+        modele._lire_resultats(m, x, y, p)
+    return modele.resultats
+
+
+def resoudre_par_composantes(modele, matriciel=False, rappel=None, threads=None):
+    """
+    Prétraitement par décomposition du réseau, puis résolution en parallèle.
+
+    1. Composantes faiblement connexes : chacune doit être équilibrée
+       (somme des bilans nulle), sinon le modèle est irréalisable sans
+       appel au solveur.
+    2. Sans pressions, pertes de charge ni redondance, les ponts sont
+       retirés : leur débit est imposé par les bilans et reporté sur les
+       bilans de leurs extrémités (un réseau radial se résout sans solveur).
+    3. Les composantes restantes sont résolues comme des modèles
+       indépendants, en parallèle (un environnement Gurobi par thread).
+
+    Args:
+        modele: ModeleGaz à résoudre
+        matriciel: Construction matricielle des sous-modèles
+        rappel: Callback Gurobi passé à chaque sous-modèle (annulation)
+        threads: Nombre de sous-modèles résolus en parallèle (par défaut : nombre de cœurs)
+
+    Returns:
+        dict resultats (mêmes clés que ModeleGaz.resoudre, plus 'presolve'),
+        ou None si le réseau ne se décompose pas
+    """
+    from Dorra.EnergiePl import ModeleGaz
+
+    donnees = modele.donnees
+    reseau = modele.reseau_indexe()
+    opts = modele.options()
+    nN = reseau.nb_noeuds
+    bilan = reseau.valeurs_noeuds(donnees['Bilan'])
+    resultats = {}
+
+    # === 1. COMPOSANTES ET ÉQUILIBRE ===
+    nb, etiquette = composantes(nN, reseau.orig, reseau.dest)
+    ecarts = np.bincount(etiquette, weights=bilan, minlength=nb)
+    desequilibres = np.flatnonzero(np.abs(ecarts) > TOLERANCE*max(1.0, np.abs(bilan).max(initial=0.0)))
+    presolve = {'composantes': int(nb), 'ponts': 0}
+    resultats['presolve'] = presolve
+    if len(desequilibres):
+        presolve['desequilibres'] = [
+            {'noeuds': [reseau.noeuds[k] for k in np.flatnonzero(etiquette == c)],
+             'ecart': float(ecarts[c])} for c in desequilibres]
+        resultats['statut'] = GRB.INFEASIBLE
+        resultats['statut_text'] = "IRRÉALISABLE"
+        return resultats
+
+    # === 2. PONTS (flot pur uniquement) ===
+    est_pont = np.zeros(reseau.nb_arcs, dtype=bool)
+    debit_pont = np.zeros(reseau.nb_arcs)
+    if not (opts['use_press'] or opts['use_losses'] or (opts['use_redund'] and opts['use_fixed'])):
+        est_pont, debit_pont = ponts(nN, reseau.orig, reseau.dest, bilan)
+        debit_pont = np.where(np.abs(debit_pont) <= TOLERANCE, 0.0, debit_pont)
+        nb, etiquette = composantes(nN, reseau.orig, reseau.dest, ~est_pont)
+    presolve['ponts'] = int(est_pont.sum())
+    if nb == 1 and not est_pont.any():
+        return None
+
+    sel = np.flatnonzero(est_pont)
+    f = debit_pont[sel]
+    capacite, _ = calculer_grands_m(donnees, reseau, demande=False)
+    cap_min = reseau.valeurs_arcs(donnees.get('Capacite_Min', {}), 0.0)[sel]
+    cout_fixe = reseau.valeurs_arcs(donnees.get('Cout_Fixe', {}), 0.0)[sel]
+    hors_bornes = (f < 0) | (f > capacite[sel] + TOLERANCE) | ((f > 0) & (f < cap_min - TOLERANCE))
+    if hors_bornes.any():
+        presolve['ponts_irrealisables'] = {reseau.arcs[sel[k]]: float(f[k])
+                                           for k in np.flatnonzero(hors_bornes)}
+        resultats['statut'] = GRB.INFEASIBLE
+        resultats['statut_text'] = "IRRÉALISABLE"
+        return resultats
+    #arc actif si débit (ou coût fixe négatif sans capacité minimale)
+    actif_pont = ((f > 0) | ((cout_fixe < 0) & (cap_min <= 0))).astype(float)
+    cout_ponts = float(reseau.valeurs_arcs(donnees['Cout_Var'])[sel] @ f)
+    if opts['use_fixed']:
+        cout_ponts += float(cout_fixe @ actif_pont)
+    #report des débits imposés sur les bilans des extrémités
+    bilan_ajuste = bilan - np.bincount(reseau.orig[sel], weights=f, minlength=nN) \
+        + np.bincount(reseau.dest[sel], weights=f, minlength=nN)
+
+    # === 3. SOUS-MODÈLES ===
+    arcs_par_comp = {}
+    for k in np.flatnonzero(~est_pont):
+        arcs_par_comp.setdefault(etiquette[reseau.orig[k]], []).append(k)
+    noeuds_par_comp = {}
+    for n, c in enumerate(etiquette.tolist()):
+        if c in arcs_par_comp:
+            noeuds_par_comp.setdefault(c, []).append(n)
+    isoles = np.flatnonzero(~np.isin(etiquette, list(arcs_par_comp)))
+    if (np.abs(bilan_ajuste[isoles]) > TOLERANCE*max(1.0, np.abs(bilan).max(initial=0.0))).any():
+        resultats['statut'] = GRB.INFEASIBLE
+        resultats['statut_text'] = "IRRÉALISABLE"
+        return resultats
+
+    sous_modeles = []
+    for c in sorted(arcs_par_comp, key=lambda c: -len(arcs_par_comp[c])):
+        noeuds = [reseau.noeuds[n] for n in noeuds_par_comp[c]]
+        arcs = [reseau.arcs[k] for k in arcs_par_comp[c]]
+        bilan_c = dict(zip(noeuds, bilan_ajuste[noeuds_par_comp[c]].tolist()))
+        sous_modeles.append(ModeleGaz(_restreindre(donnees, noeuds, arcs, bilan_c),
+                                      serrer_bornes=modele.serrer_bornes))
+    presolve['resolues'] = len(sous_modeles)
+
+    nb_threads = max(1, min(threads or os.cpu_count() or 1, len(sous_modeles)))
+    paquets = [sous_modeles[k::nb_threads] for k in range(nb_threads)]
+    threads_gurobi = max(1, (os.cpu_count() or 1) // nb_threads)
+
+    def resoudre_paquet(paquet):
+        with gp.Env(params={'OutputFlag': 0, 'Threads': threads_gurobi}) as env:
+            return [_resoudre_composante(sm, env, matriciel, rappel) for sm in paquet]
+
+    if nb_threads == 1:
+        res_comp = resoudre_paquet(sous_modeles)
+    else:
+        with ThreadPoolExecutor(max_workers=nb_threads) as pool:
+            res_comp = [r for paquet in pool.map(resoudre_paquet, paquets) for r in paquet]
+
+    # === FUSION ===
+    statuts = [r.get('statut') for r in res_comp]
+    if any(s == GRB.INFEASIBLE for s in statuts):
+        resultats['statut'] = GRB.INFEASIBLE
+        resultats['statut_text'] = "IRRÉALISABLE"
+        return resultats
+    incomplets = [r for r in res_comp if 'debits_optimaux' not in r]
+    if incomplets:
+        resultats['statut'] = incomplets[0].get('statut')
+        resultats['statut_text'] = incomplets[0].get('statut_text')
+        return resultats
+    if all(s == GRB.OPTIMAL for s in statuts):
+        resultats['statut'] = GRB.OPTIMAL
+        resultats['statut_text'] = "OPTIMAL"
+    else:
+        #gap global <= plus grand gap des composantes ; une annulation prime sur la limite de temps
+        partiel = min((r for r in res_comp if r['statut'] != GRB.OPTIMAL),
+                      key=lambda r: r['statut'] != GRB.INTERRUPTED)
+        resultats['statut'] = partiel['statut']
+        resultats['statut_text'] = partiel['statut_text']
+        resultats['gap'] = max(r.get('gap', 0.0) for r in res_comp)
+
+    resultats['cout_total'] = cout_ponts + sum(r['cout_total'] for r in res_comp)
+    debits = dict(zip((reseau.arcs[k] for k in sel), f.tolist()))
+    for r in res_comp:
+        debits.update(r['debits_optimaux'])
+    resultats['debits_optimaux'] = {a: debits[a] for a in reseau.arcs}
+    if opts['use_fixed'] or opts['use_min']:
+        actifs = dict(zip((reseau.arcs[k] for k in sel), actif_pont.tolist()))
+        for r in res_comp:
+            actifs.update(r['arcs_actifs'])
+        resultats['arcs_actifs'] = {a: actifs[a] for a in reseau.arcs}
+    if opts['use_press'] or opts['use_losses']:
+        #nœud sans arc : pression libre dans ses bornes
+        pressions = dict(zip(reseau.noeuds, reseau.valeurs_noeuds(donnees.get('Pression_Min', {}), 1.0).tolist()))
+        for r in res_comp:
+            pressions.update(r['pressions'])
+        resultats['pressions'] = pressions
+    return resultats
@@ -0,0 +1,187 @@
+import hashlib
+from collections import OrderedDict
+
+import gurobipy as gp
+from gurobipy import GRB
+import numpy as np
+
+from Dorra.incidence import Colonne, ReseauIndexe
+
+# Diagnostics déjà calculés, par empreinte des données (les plus anciens sont oubliés)
+TAILLE_CACHE = 32
+_cache = OrderedDict()
+
+# Famille de contrainte / borne -> motif affiché
+MOTIFS = {
+    'Conservation': "bilan (conservation du flux)",
+    'BigM': "activation de l'arc (BigM)",
+    'CapMin': "capacité minimale",
+    'Perte': "perte de charge",
+    'Vmax': "vitesse maximale (diamètre)",
+    'Redondance': "redondance (2 arcs entrants)",
+    'Capacite': "capacité maximale",
+    'Pression_Min': "pression minimale",
+    'Pression_Max': "pression maximale",
+}
+
+
+def empreinte(donnees):
+    """
+    Empreinte (SHA-1) des données du réseau : deux jeux de données égaux de
+    même format donnent la même empreinte (l'ordre des dicts est ignoré,
+    les colonnes sont hachées d'un bloc).
+    """
+    h = hashlib.sha1()
+    for cle in sorted(donnees):
+        valeur = donnees[cle]
+        if isinstance(valeur, ReseauIndexe):
+            continue
+        h.update(repr(cle).encode())
+        if isinstance(valeur, Colonne):
+            h.update(repr(list(valeur.cles)).encode())
+            h.update(np.ascontiguousarray(valeur.tableau, dtype=float).tobytes())
+        elif isinstance(valeur, dict):
+            h.update(repr(sorted(((repr(k), float(v)) for k, v in valeur.items()))).encode())
+        else:
+            h.update(repr([tuple(v) if isinstance(v, list) else v for v in valeur]
+                          if isinstance(valeur, (list, tuple)) else valeur).encode())
+    return h.hexdigest()
+
+
+def _noms(donnees):
+    """Nom Gurobi de chaque contrainte / variable du modèle classique -> (famille, nœud ou arc)"""
+    def indice(cle):
+        return ",".join(str(c) for c in cle) if isinstance(cle, tuple) else str(cle)
+
+    noms = {}
+    for n in donnees['Noeuds']:
+        noms[f"Conservation[{indice(n)}]"] = ('Conservation', n)
+        noms[f"Redondance_{n}"] = ('Redondance', n)
+        noms[f"Pression[{indice(n)}]"] = ('Pression', n)
+    for a in donnees['Arcs']:
+        i, j = a = tuple(a)
+        for famille in ('BigM', 'CapMin', 'Debit'):
+            noms[f"{famille}[{indice(a)}]"] = (famille, a)
+        for famille in ('Perte', 'Vmax'):
+            noms[f"{famille}_{i}_{j}"] = (famille, a)
+    return noms
+
+
+def _ajouter(cible, element, motif):
+    motifs = cible.setdefault(element, [])
+    if motif not in motifs:
+        motifs.append(motif)
+
+
+def diagnostiquer(donnees):
+    """
+    Explique l'irréalisabilité du modèle gaz.
+
+    Le modèle classique (contraintes nommées) est construit avec les bornes
+    d'origine (capacités, M par défaut) : les bornes serrées de Dorra.bornes
+    sont déduites des bilans et feraient passer un déséquilibre pour une
+    capacité insuffisante. Puis :
+        - un IIS (sous-ensemble irréductible de contraintes et de bornes en
+          conflit) est calculé et chaque élément est rattaché à son nœud ou arc ;
+        - une relaxation de réalisabilité sur les bilans donne, par nœud, la
+          correction de bilan de somme minimale qui rendrait le réseau réalisable.
+    Le résultat est mis en cache par empreinte des données : une nouvelle
+    tentative sur les mêmes données erronées est immédiate.
+
+    Args:
+        donnees: Données du réseau (format ModeleGaz ; l'option Weymouth est ignorée)
+
+    Returns:
+        dict : realisable, noeuds {noeud: [motifs]}, arcs {(i,j): [motifs]},
+        contraintes (noms Gurobi de l'IIS), ecarts_bilan {noeud: correction du bilan},
+        ecart_total (somme des |corrections|), message ; ou {'erreur': ...}
+    """
+    cle = empreinte(donnees)
+    if cle in _cache:
+        _cache.move_to_end(cle)
+        return _cache[cle]
+
+    from Dorra.EnergiePl import ModeleGaz
+
+    diagnostic = {'realisable': False, 'noeuds': {}, 'arcs': {}, 'contraintes': [],
+                  'ecarts_bilan': {}, 'ecart_total': 0.0}
+    noms = _noms(donnees)
+    try:
+        with gp.Model("DistributionGaz_Diagnostic") as m:
+            m.setParam('OutputFlag', 0)
+            ModeleGaz(donnees, serrer_bornes=False)._construire_classique(m)
+            m.optimize()
+            if m.status != GRB.INFEASIBLE:
+                diagnostic['realisable'] = m.status in (GRB.OPTIMAL, GRB.SUBOPTIMAL)
+                diagnostic['message'] = "Aucun conflit : le modèle n'est pas irréalisable"
+                return _memoriser(cle, diagnostic)
+
+            # === IIS ===
+            relaxe = m.copy()
+            m.computeIIS()
+            for c in m.getConstrs():
+                if c.IISConstr:
+                    diagnostic['contraintes'].append(c.ConstrName)
+                    famille, element = noms.get(c.ConstrName, (None, None))
+                    if famille is not None:
+                        cible = diagnostic['arcs'] if isinstance(element, tuple) else diagnostic['noeuds']
+                        _ajouter(cible, element, MOTIFS[famille])
+            for v in m.getVars():
+                if not (v.IISLB or v.IISUB):
+                    continue
+                famille, element = noms.get(v.VarName, (None, None))
+                if famille == 'Debit' and v.IISUB:
+                    diagnostic['contraintes'].append(f"{v.VarName} <= {v.UB:g}")
+                    _ajouter(diagnostic['arcs'], element, MOTIFS['Capacite'])
+                elif famille == 'Pression':
+                    borne = 'Pression_Min' if v.IISLB else 'Pression_Max'
+                    diagnostic['contraintes'].append(
+                        f"{v.VarName} {'>=' if v.IISLB else '<='} {v.LB if v.IISLB else v.UB:g}")
+                    _ajouter(diagnostic['noeuds'], element, MOTIFS[borne])
+
+            # === ÉCART MINIMAL SUR LES BILANS ===
+            with relaxe:
+                conservation = [c for c in relaxe.getConstrs()
+                                if c.ConstrName.startswith("Conservation[")]
+                relaxe.feasRelax(0, False, None, None, None, conservation, [1.0]*len(conservation))
+                relaxe.optimize()
+                if relaxe.status == GRB.OPTIMAL:
+                    diagnostic['ecart_total'] = relaxe.ObjVal
+                    for c in conservation:
+                        #bilan + ArtN - ArtP est atteignable
+                        ecart = relaxe.getVarByName(f"ArtN_{c.ConstrName}").X \
+                            - relaxe.getVarByName(f"ArtP_{c.ConstrName}").X
+                        if abs(ecart) > 1e-6:
+                            diagnostic['ecarts_bilan'][noms[c.ConstrName][1]] = ecart
+    except gp.GurobiError as e:
+        return {'erreur': f"Erreur Gurobi : {e.message}"}
+
+    diagnostic['message'] = resume(diagnostic)
+    return _memoriser(cle, diagnostic)
+
+
+def _memoriser(cle, diagnostic):
+    _cache[cle] = diagnostic
+    while len(_cache) > TAILLE_CACHE:
+        _cache.popitem(last=False)
+    return diagnostic
+
+
+def resume(diagnostic, max_elements=10):
+    """Texte lisible du diagnostic (nœuds et arcs en conflit, écarts de bilan)"""
+    if 'erreur' in diagnostic:
+        return diagnostic['erreur']
+    if diagnostic.get('realisable') or not (diagnostic['noeuds'] or diagnostic['arcs']):
+        return diagnostic.get('message', "Aucun conflit identifié")
+    lignes = ["Contraintes en conflit :"]
+    elements = [(f"nœud {n}", motifs) for n, motifs in diagnostic['noeuds'].items()]
+    elements += [(f"arc {i}→{j}", motifs) for (i, j), motifs in diagnostic['arcs'].items()]
+    for nom, motifs in elements[:max_elements]:
+        lignes.append(f"  - {nom} : {', '.join(motifs)}")
+    if len(elements) > max_elements:
+        lignes.append(f"  ... et {len(elements) - max_elements} autres")
+    if diagnostic['ecarts_bilan']:
+        lignes.append(f"Écart minimal sur les bilans : {diagnostic['ecart_total']:.2f}")
+        for n, ecart in list(diagnostic['ecarts_bilan'].items())[:max_elements]:
+            lignes.append(f"  - nœud {n} : {ecart:+.2f}")
+    return "\n".join(lignes)
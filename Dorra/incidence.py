@@ -0,0 +1,128 @@
+from collections.abc import Mapping
+
+import numpy as np
+import scipy.sparse as sp
+
+
+class Colonne(Mapping):
+    """
+    Colonne de valeurs (tableau NumPy) vue comme un dict {clé: valeur}.
+
+    Les clés sont les nœuds ou les arcs d'un ReseauIndexe ; le dict de
+    positions est partagé entre toutes les colonnes du même réseau.
+    """
+
+    def __init__(self, tableau, cles, position):
+        self.tableau = tableau
+        self.cles = cles
+        self._position = position
+
+    def __getitem__(self, cle):
+        return self.tableau[self._position[cle]].item()
+
+    def __contains__(self, cle):
+        return cle in self._position
+
+    def __iter__(self):
+        return iter(self.cles)
+
+    def __len__(self):
+        return len(self.cles)
+
+
+class ReseauIndexe:
+    """
+    Indexation entière d'un réseau (nœuds et arcs) pour la construction matricielle.
+
+    - noeuds : liste des nœuds, position = indice de ligne
+    - arcs : liste des arcs (i,j), position = indice de colonne
+    - orig, dest : indices entiers des extrémités de chaque arc
+    """
+
+    def __init__(self, noeuds, arcs):
+        self.noeuds = list(noeuds)
+        self.arcs = [tuple(a) for a in arcs]
+        self.indice_noeud = {n: k for k, n in enumerate(self.noeuds)}
+        self.orig = np.fromiter((self.indice_noeud[i] for i, _ in self.arcs), dtype=np.int64,
+                                count=len(self.arcs))
+        self.dest = np.fromiter((self.indice_noeud[j] for _, j in self.arcs), dtype=np.int64,
+                                count=len(self.arcs))
+        self._incidence = None
+
+    @classmethod
+    def depuis_indices(cls, noeuds, arcs, orig, dest):
+        """Construction directe à partir des indices des extrémités (sans recherche)"""
+        reseau = cls.__new__(cls)
+        reseau.noeuds = noeuds
+        reseau.arcs = arcs
+        reseau.indice_noeud = {n: k for k, n in enumerate(noeuds)}
+        reseau.orig = np.asarray(orig, dtype=np.int64)
+        reseau.dest = np.asarray(dest, dtype=np.int64)
+        reseau._incidence = None
+        return reseau
+
+    @property
+    def nb_noeuds(self):
+        return len(self.noeuds)
+
+    @property
+    def nb_arcs(self):
+        return len(self.arcs)
+
+    def incidence(self):
+        """
+        Matrice d'incidence nœud-arc (CSR, N×A) : +1 à l'origine, -1 à la destination.
+        Ligne i : flux sortant - flux entrant, comme x.sum(i,'*') - x.sum('*',i).
+        """
+        if self._incidence is None:
+            nA = self.nb_arcs
+            lignes = np.concatenate([self.orig, self.dest])
+            cols = np.concatenate([np.arange(nA), np.arange(nA)])
+            vals = np.concatenate([np.ones(nA), -np.ones(nA)])
+            self._incidence = sp.csr_matrix((vals, (lignes, cols)),
+                                            shape=(self.nb_noeuds, nA))
+        return self._incidence
+
+    def entrants(self):
+        """Matrice N×A : 1 si l'arc arrive au nœud"""
+        nA = self.nb_arcs
+        return sp.csr_matrix((np.ones(nA), (self.dest, np.arange(nA))),
+                             shape=(self.nb_noeuds, nA))
+
+    def valeurs_arcs(self, valeurs, defaut=None):
+        """
+        Tableau aligné sur self.arcs à partir d'un dict {(i,j): valeur}.
+        Sans défaut, la colonne doit couvrir tous les arcs : un arc absent
+        lève KeyError, comme l'accès direct de la construction classique.
+        """
+        if isinstance(valeurs, Colonne) and valeurs.cles is self.arcs:
+            return valeurs.tableau.astype(float)
+        if defaut is None:
+            return np.fromiter((valeurs[a] for a in self.arcs), dtype=float, count=self.nb_arcs)
+        return np.fromiter((valeurs.get(a, defaut) for a in self.arcs), dtype=float,
+                           count=self.nb_arcs)
+
+    def valeurs_noeuds(self, valeurs, defaut=None):
+        """Tableau aligné sur self.noeuds à partir d'un dict {noeud: valeur} (voir valeurs_arcs)"""
+        if isinstance(valeurs, Colonne) and valeurs.cles is self.noeuds:
+            return valeurs.tableau.astype(float)
+        if defaut is None:
+            return np.fromiter((valeurs[n] for n in self.noeuds), dtype=float, count=self.nb_noeuds)
+        return np.fromiter((valeurs.get(n, defaut) for n in self.noeuds), dtype=float,
+                           count=self.nb_noeuds)
+
+
+def adjacence(noeuds, arcs):
+    """
+    Index d'adjacence construits en une seule passe sur les arcs.
+
+    Returns:
+        (arcs_sortants, arcs_entrants) : dicts {noeud: [arcs (i,j)]}
+    """
+    sortants = {n: [] for n in noeuds}
+    entrants = {n: [] for n in noeuds}
+    for arc in arcs:
+        i, j = arc
+        sortants.setdefault(i, []).append(tuple(arc))
+        entrants.setdefault(j, []).append(tuple(arc))
+    return sortants, entrants
@@ -0,0 +1,132 @@
+import gurobipy as gp
+import numpy as np
+
+from Dorra.EnergiePl import ModeleGaz
+
+
+class ModeleGazScenarios(ModeleGaz):
+    """
+    Modèle de réseau gaz persistant pour enchaîner des scénarios de demande.
+
+    Le modèle (construction matricielle) est construit une seule fois ; entre
+    deux scénarios seuls le second membre de la conservation (Bilan) et,
+    optionnellement, les capacités sont modifiés en place. Gurobi repart de la
+    base précédente (cas continu) ou de l'activation précédente des arcs (cas
+    avec variables binaires).
+    """
+
+    #le bilan change d'un scénario à l'autre
+    bornes_demande = False
+
+    def __init__(self, donnees, env=None):
+        super().__init__(donnees)
+        self.env = env
+        self.modele = None
+        self._y_precedent = None
+
+    def _construire(self):
+        if self.env is not None:
+            m = gp.Model("DistributionGaz_Scenarios", env=self.env)
+        else:
+            m = gp.Model("DistributionGaz_Scenarios")
+        m.setParam('OutputFlag', 0)
+        self._poignees = self._construire_matriciel(m)
+        self.modele = m
+
+        reseau = m._reseau
+        self._position = {a: k for k, a in enumerate(reseau.arcs)}
+        self._capacites = reseau.valeurs_arcs(self.donnees['Capacite'])
+        #débit maximal imposé par la vitesse (aucune limite sans diamètre)
+        self._debit_max_v = np.full(reseau.nb_arcs, np.inf)
+        if 'Diametre' in self.donnees:
+            diam = reseau.valeurs_arcs(self.donnees['Diametre'])
+            v_max = self.donnees.get('Vitesse_Max', 20.0)
+            self._debit_max_v = np.where(diam > 0, 3.14159*(diam/2)**2*v_max, np.inf)
+
+    def modifier_bilan(self, bilan):
+        """
+        Met à jour le second membre de la conservation.
+
+        Args:
+            bilan: dict {noeud: bilan} ; les nœuds absents gardent le bilan de base
+        """
+        if self.modele is None:
+            self._construire()
+        m = self.modele
+        base = self.donnees['Bilan']
+        m._conservation.RHS = np.array([bilan.get(n, base.get(n, 0.0)) for n in m._reseau.noeuds],
+                                       dtype=float)
+
+    def modifier_capacites(self, capacites):
+        """
+        Met à jour les capacités des arcs (borne sup des débits et coefficients BigM).
+
+        Args:
+            capacites: dict {(i,j): capacité} ; les arcs absents gardent leur capacité courante
+        """
+        if self.modele is None:
+            self._construire()
+        m = self.modele
+        nouvelles = self._capacites.copy()
+        for arc, cap in capacites.items():
+            nouvelles[self._position[tuple(arc)]] = cap
+
+        #la contrainte de vitesse reste portée par la borne sup
+        m._x.UB = np.minimum(nouvelles, self._debit_max_v)
+        if m._bigm is not None:
+            contraintes, y = m._bigm.tolist(), m._y.tolist()
+            for k in np.flatnonzero(nouvelles != self._capacites):
+                m.chgCoeff(contraintes[k], y[k], -nouvelles[k])
+        self._capacites = nouvelles
+
+    def resoudre_scenario(self, bilan, capacites=None):
+        """
+        Résout un scénario de demande sur le modèle persistant.
+
+        Args:
+            bilan: dict {noeud: bilan} du scénario
+            capacites: dict {(i,j): capacité} optionnel
+
+        Returns:
+            dict resultats, mêmes clés que ModeleGaz.resoudre()
+        """
+        self.resultats = {}
+        try:
+            self.modifier_bilan(bilan)
+            if capacites:
+                self.modifier_capacites(capacites)
+            m = self.modele
+
+            #démarrage à chaud : activation des arcs du scénario précédent
+            if self._y_precedent is not None:
+                m._y.Start = self._y_precedent
+
+            m.optimize()
+            self._lire_resultats(m, *self._poignees)
+            self.resultats['temps'] = m.Runtime
+            if m._y is not None and m.SolCount > 0:
+                self._y_precedent = np.round(m._y.X)
+
+        except gp.GurobiError as e:
+            self.resultats['statut_text']=f"Erreur Gurobi : {e.message}"
+        except Exception as e:
+            self.resultats['statut_text']=f"Erreur générale : {str(e)}"
+
+        return self.resultats
+
+    def resoudre_scenarios(self, scenarios):
+        """
+        Enchaîne plusieurs scénarios dans la même session.
+
+        Args:
+            scenarios: dict {nom: bilan} ou liste de (nom, bilan[, capacites])
+
+        Returns:
+            dict {nom: resultats} dans l'ordre des scénarios
+        """
+        if isinstance(scenarios, dict):
+            scenarios = list(scenarios.items())
+        resultats = {}
+        for nom, bilan, *reste in scenarios:
+            resultats[nom] = self.resoudre_scenario(bilan, reste[0] if reste else None)
+        return resultats
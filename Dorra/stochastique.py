@@ -0,0 +1,286 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import gurobipy as gp
+from gurobipy import GRB
+import numpy as np
+import scipy.sparse as sp
+
+from Dorra.EnergiePl import ModeleGaz
+from Dorra.bornes import calculer_grands_m
+
+
+class _SousProbleme:
+    """
+    Second niveau pour une activation ŷ fixée : débits et pressions (PL).
+
+    Les lignes dont le second membre dépend de y (rhs = constante + coef·ŷ) :
+        BigM   : x <= M ŷ
+        CapMin : x + e >= Cmin ŷ
+        Perte  : p_i - p_j - perte x + e >= -M + M ŷ
+    et la conservation N x + s⁺ - s⁻ = Bilan. Les écarts (s, e) sont bloqués
+    à 0, sauf en phase 1 (coupe de réalisabilité) où l'on minimise leur somme.
+    """
+
+    def __init__(self, donnees, reseau, env):
+        nN, nA = reseau.nb_noeuds, reseau.nb_arcs
+        N = reseau.incidence()
+        I = sp.identity(nA, format='csr')
+        self.nb_arcs = nA
+
+        #M valides pour tout bilan (capacité/vitesse et bornes de pression)
+        cap, m_pression = calculer_grands_m(donnees, reseau, demande=False)
+
+        m = gp.Model("DistributionGaz_SousProbleme", env=env)
+        m.setParam('OutputFlag', 0)
+        self.modele = m
+
+        # === VARIABLES ===
+        self.x = m.addMVar(nA, lb=0.0, ub=cap, name="Debit")
+        self.p = None
+        if 'Pression_Min' in donnees or 'Pression_Max' in donnees or 'Perte_Charge' in donnees:
+            self.p = m.addMVar(nN,
+                               lb=reseau.valeurs_noeuds(donnees.get('Pression_Min', {}), 1.0),
+                               ub=reseau.valeurs_noeuds(donnees.get('Pression_Max', {}), 10.0),
+                               name="Pression")
+        s_plus = m.addMVar(nN, ub=0.0, name="EcartPlus")
+        s_moins = m.addMVar(nN, ub=0.0, name="EcartMoins")
+        self.ecarts = [s_plus, s_moins]
+
+        # === CONTRAINTES ===
+        self.conservation = m.addMConstr(
+            sp.hstack([N, sp.identity(nN), -sp.identity(nN)], format='csr'),
+            gp.MVar.fromlist(self.x.tolist() + s_plus.tolist() + s_moins.tolist()),
+            '=', np.zeros(nN), name="Conservation")
+
+        #familles dépendant de y : (contraintes, constante, coef, arcs concernés)
+        self.lignes_y = [(m.addMConstr(I, self.x, '<', cap, name="BigM"),
+                          np.zeros(nA), cap, np.arange(nA))]
+        if 'Capacite_Min' in donnees:
+            cmin = reseau.valeurs_arcs(donnees['Capacite_Min'])
+            sel = np.flatnonzero(cmin > 0)
+            if len(sel):
+                e = m.addMVar(len(sel), ub=0.0, name="EcartCapMin")
+                self.ecarts.append(e)
+                c = m.addMConstr(sp.hstack([I[sel], sp.identity(len(sel))], format='csr'),
+                                 gp.MVar.fromlist(self.x.tolist() + e.tolist()), '>',
+                                 np.zeros(len(sel)), name="CapMin")
+                self.lignes_y.append((c, np.zeros(len(sel)), cmin[sel], sel))
+        if 'Perte_Charge' in donnees:
+            perte = reseau.valeurs_arcs(donnees['Perte_Charge'])
+            longueur = reseau.valeurs_arcs(donnees.get('Longueur', {}), 1.0)
+            sel = np.flatnonzero(perte > 0)
+            if len(sel):
+                M_pres = m_pression[sel]
+                e = m.addMVar(len(sel), ub=0.0, name="EcartPerte")
+                self.ecarts.append(e)
+                A = sp.hstack([N.T.tocsr()[sel], -sp.diags(perte*longueur, format='csr')[sel],
+                               sp.identity(len(sel))], format='csr')
+                c = m.addMConstr(A, gp.MVar.fromlist(self.p.tolist() + self.x.tolist() + e.tolist()),
+                                 '>', -M_pres, name="Perte")
+                self.lignes_y.append((c, -M_pres, M_pres, sel))
+
+        self.objectif = reseau.valeurs_arcs(donnees['Cout_Var']) @ self.x
+        self.objectif_phase1 = sum(e.sum() for e in self.ecarts)
+        m.setObjective(self.objectif, GRB.MINIMIZE)
+
+    def _gradient(self):
+        #dQ/dy = somme des duaux × coefficient de y dans le second membre
+        g = np.zeros(self.nb_arcs)
+        for c, _, coef, sel in self.lignes_y:
+            np.add.at(g, sel, c.Pi*coef)
+        return g
+
+    def evaluer(self, y, bilan):
+        """
+        Résout le second niveau pour ŷ et un bilan.
+
+        Returns:
+            (realisable, valeur, gradient) : valeur de Q(ŷ) et sous-gradient si
+            réalisable, sinon valeur et sous-gradient de la phase 1 (> 0)
+        """
+        m = self.modele
+        self.conservation.RHS = bilan
+        for c, const, coef, sel in self.lignes_y:
+            c.RHS = const + coef*y[sel]
+        m.optimize()
+        if m.status == GRB.OPTIMAL:
+            return True, m.ObjVal, self._gradient()
+        if m.status not in (GRB.INFEASIBLE, GRB.INF_OR_UNBD):
+            raise gp.GurobiError(m.status, f"Sous-problème non résolu (code {m.status})")
+
+        #phase 1 : écarts libérés, somme des écarts minimisée
+        for e in self.ecarts:
+            e.UB = np.inf
+        m.setObjective(self.objectif_phase1, GRB.MINIMIZE)
+        try:
+            m.optimize()
+            return False, m.ObjVal, self._gradient()
+        finally:
+            for e in self.ecarts:
+                e.UB = 0.0
+            m.setObjective(self.objectif, GRB.MINIMIZE)
+
+    def solution(self):
+        """Débits et pressions de la dernière résolution réalisable"""
+        return self.x.X, (self.p.X if self.p is not None else None)
+
+
+class ModeleGazStochastique(ModeleGaz):
+    """
+    Conception de réseau en deux étapes sous incertitude de demande.
+
+    L'activation des arcs y (coûts fixes) est décidée en première étape ;
+    débits et pressions sont des décisions de recours propres à chaque
+    scénario. Résolution par décomposition de Benders multi-coupes : un
+    maître en y et une variable θ_s par scénario, les sous-problèmes étant
+    évalués en parallèle (un environnement Gurobi par thread).
+    """
+
+    def resoudre(self, scenarios, probabilites=None, threads=None, tolerance=1e-4,
+                 iterations_max=200, temps_max=None):
+        """
+        Args:
+            scenarios: dict {nom: bilan} ou liste de (nom, bilan)
+            probabilites: dict {nom: probabilité} (scénarios équiprobables par défaut)
+            threads: Nombre de sous-problèmes résolus en parallèle (par défaut : nombre de cœurs)
+            tolerance: Écart relatif d'arrêt entre bornes inférieure et supérieure
+            iterations_max: Nombre maximal d'itérations de Benders
+            temps_max: Limite de temps en secondes (None = aucune)
+
+        Returns:
+            dict resultats : statut_text, cout_total (espéré), cout_fixe,
+            arcs_actifs, borne_inf, gap, iterations et, par scénario
+            ('scenarios'), cout, debits_optimaux et pressions
+        """
+        self.resultats = {}
+        envs, sous_problemes, maitre = [], [], None
+        try:
+            if not (self.options()['use_fixed'] or self.options()['use_min']):
+                raise ValueError("Le mode deux étapes nécessite des coûts fixes ou des capacités minimales")
+            if isinstance(scenarios, dict):
+                scenarios = list(scenarios.items())
+            noms = [nom for nom, _ in scenarios]
+            if not noms:
+                raise ValueError("Aucun scénario")
+            if probabilites is None:
+                proba = np.full(len(noms), 1.0/len(noms))
+            else:
+                proba = np.array([probabilites[nom] for nom in noms], dtype=float)
+
+            reseau = self.reseau_indexe()
+            position = {a: k for k, a in enumerate(reseau.arcs)}
+            nA = reseau.nb_arcs
+            base = self.donnees['Bilan']
+            bilans = [np.array([b.get(n, base.get(n, 0.0)) for n in reseau.noeuds], dtype=float)
+                      for _, b in scenarios]
+
+            # === MAÎTRE : y, redondance et θ_s ===
+            maitre = gp.Model("DistributionGaz_Benders")
+            maitre.setParam('OutputFlag', 0)
+            y = maitre.addMVar(nA, vtype=GRB.BINARY, name="ArcActif")
+            cout_fixe = reseau.valeurs_arcs(self.donnees.get('Cout_Fixe', {}), 0.0)
+            cout = reseau.valeurs_arcs(self.donnees['Cout_Var'])
+            #borne inférieure valide de Q_s (coûts négatifs éventuels)
+            theta_lb = float(np.minimum(cout, 0) @ reseau.valeurs_arcs(self.donnees['Capacite']))
+            theta = maitre.addMVar(len(noms), lb=theta_lb, name="Theta")
+            maitre.setObjective(cout_fixe @ y + proba @ theta, GRB.MINIMIZE)
+            if self.options()['use_redund'] and self.options()['use_fixed']:
+                for node in self.donnees.get('Noeuds_Critiques', []):
+                    arcs_in = [position[a] for a in self.arcs_entrants.get(node, [])]
+                    if len(arcs_in) >= 2:
+                        maitre.addConstr(y[arcs_in].sum() >= 2, name=f"Redondance_{node}")
+
+            # === SOUS-PROBLÈMES : un par thread, réutilisé pour ses scénarios ===
+            nb_threads = min(threads or os.cpu_count() or 1, len(noms))
+            paquets = [list(range(k, len(noms), nb_threads)) for k in range(nb_threads)]
+            for _ in range(nb_threads):
+                env = gp.Env(params={'OutputFlag': 0, 'Threads': 1})
+                envs.append(env)
+                sous_problemes.append(_SousProbleme(self.donnees, reseau, env))
+
+            def evaluer_paquet(k, y_val):
+                return [(s,) + sous_problemes[k].evaluer(y_val, bilans[s]) for s in paquets[k]]
+
+            debut = time.time()
+            borne_inf, borne_sup, y_opt = -np.inf, np.inf, None
+            iteration = 0
+            with ThreadPoolExecutor(max_workers=nb_threads) as pool:
+                while iteration < iterations_max:
+                    iteration += 1
+                    maitre.optimize()
+                    if maitre.status != GRB.OPTIMAL:
+                        break
+                    borne_inf = max(borne_inf, maitre.ObjBound)
+                    y_val = np.round(y.X)
+                    theta_val = theta.X
+
+                    evals = [r for paquet in pool.map(evaluer_paquet, range(nb_threads),
+                                                      [y_val]*nb_threads) for r in paquet]
+                    realisable = all(r[1] for r in evals)
+                    if realisable:
+                        valeur = cout_fixe @ y_val + sum(proba[s]*q for s, _, q, _ in evals)
+                        if valeur < borne_sup:
+                            borne_sup, y_opt = valeur, y_val
+                            #la meilleure conception sert de solution de départ au maître
+                            y.Start = y_opt
+
+                    #coupes : optimalité θ_s >= Q_s(ŷ) + g(y - ŷ), réalisabilité F_s(ŷ) + g(y - ŷ) <= 0
+                    coupes = 0
+                    for s, ok, q, g in evals:
+                        if ok and theta_val[s] < q - tolerance*max(1.0, abs(q)):
+                            maitre.addConstr(theta[s] >= q + g @ (y - y_val), name=f"Optimalite_{s}_{iteration}")
+                            coupes += 1
+                        elif not ok:
+                            maitre.addConstr(q + g @ (y - y_val) <= 0, name=f"Realisabilite_{s}_{iteration}")
+                            coupes += 1
+
+                    if coupes == 0 or (y_opt is not None and
+                                       borne_sup - borne_inf <= tolerance*max(1.0, abs(borne_sup))):
+                        break
+                    if temps_max is not None and time.time() - debut > temps_max:
+                        break
+
+            self.resultats['iterations'] = iteration
+            self.resultats['statut'] = maitre.status
+            if y_opt is None:
+                if maitre.status == GRB.INFEASIBLE:
+                    self.resultats['statut_text'] = "IRRÉALISABLE"
+                else:
+                    self.resultats['statut_text'] = f"Statut non optimal (code {maitre.status})"
+                return self.resultats
+
+            gap = (borne_sup - borne_inf)/max(1.0, abs(borne_sup))
+            self.resultats['statut_text'] = "OPTIMAL" if gap <= tolerance else "LIMITE ATTEINTE"
+            self.resultats['cout_total'] = borne_sup
+            self.resultats['cout_fixe'] = float(cout_fixe @ y_opt)
+            self.resultats['borne_inf'] = borne_inf
+            self.resultats['gap'] = max(gap, 0.0)
+            self.resultats['arcs_actifs'] = dict(zip(reseau.arcs, y_opt.tolist()))
+
+            #recours de chaque scénario pour la conception retenue
+            details = {}
+            for k, paquet in enumerate(paquets):
+                for s in paquet:
+                    _, q, _ = sous_problemes[k].evaluer(y_opt, bilans[s])
+                    debits, pressions = sous_problemes[k].solution()
+                    details[noms[s]] = {'cout': q,
+                                        'debits_optimaux': dict(zip(reseau.arcs, debits.tolist()))}
+                    if pressions is not None:
+                        details[noms[s]]['pressions'] = dict(zip(reseau.noeuds, pressions.tolist()))
+            self.resultats['scenarios'] = details
+
+        except gp.GurobiError as e:
+            self.resultats['statut_text']=f"Erreur Gurobi : {e.message}"
+        except Exception as e:
+            self.resultats['statut_text']=f"Erreur générale : {str(e)}"
+        finally:
+            for sous_probleme in sous_problemes:
+                sous_probleme.modele.dispose()
+            if maitre is not None:
+                maitre.dispose()
+            for env in envs:
+                env.dispose()
+
+        return self.resultats
@@ -0,0 +1,52 @@
+import gurobipy as gp
+import pytest
+
+from Dorra.benchmark import generer_reseau
+from Dorra.EnergiePl import ModeleGaz
+
+
+def reseau_radial(arc_ab=('A', 'B')):
+    #S alimente A, qui dessert B et C : chaque arc est un pont
+    arcs = [('S', 'A'), arc_ab, ('A', 'C')]
+    return {
+        'Noeuds': ['S', 'A', 'B', 'C'],
+        'Arcs': arcs,
+        'Bilan': {'S': 10.0, 'A': -2.0, 'B': -5.0, 'C': -3.0},
+        'Capacite': dict.fromkeys(arcs, 20.0),
+        'Cout_Var': dict(zip(arcs, [1.0, 2.0, 3.0])),
+    }
+
+
+def test_reseau_radial_sans_solveur(monkeypatch):
+    def interdit(*args, **kwargs):
+        raise AssertionError("aucun modèle ne doit être construit")
+    monkeypatch.setattr(gp, 'Model', interdit)
+
+    r = ModeleGaz(reseau_radial()).resoudre(decomposer=True)
+
+    assert r['statut_text'] == "OPTIMAL"
+    assert r['presolve']['ponts'] == 3 and r['presolve']['resolues'] == 0
+    assert r['cout_total'] == pytest.approx(10*1.0 + 5*2.0 + 3*3.0)
+    assert r['debits_optimaux'] == {('S', 'A'): 10.0, ('A', 'B'): 5.0, ('A', 'C'): 3.0}
+
+
+def test_pont_a_contresens():
+    r = ModeleGaz(reseau_radial(arc_ab=('B', 'A'))).resoudre(decomposer=True)
+
+    assert r['statut_text'] == "IRRÉALISABLE"
+    assert r['presolve']['ponts_irrealisables'] == {('B', 'A'): -5.0}
+
+
+@pytest.mark.parametrize('cles', [('Noeuds', 'Arcs', 'Bilan', 'Capacite', 'Cout_Var'),
+                                  ('Noeuds', 'Arcs', 'Bilan', 'Capacite', 'Cout_Var',
+                                   'Cout_Fixe', 'Capacite_Min')])
+def test_reseau_maille_meme_cout(cles):
+    donnees = generer_reseau('maille', 40, seed=1)
+    donnees = {k: donnees[k] for k in cles}
+
+    decompose = ModeleGaz(donnees).resoudre(decomposer=True)
+    direct = ModeleGaz(donnees).resoudre()
+
+    assert decompose['presolve']['ponts'] > 0 and decompose['presolve']['resolues'] == 1
+    assert decompose['statut_text'] == direct['statut_text'] == "OPTIMAL"
+    assert decompose['cout_total'] == pytest.approx(direct['cout_total'])
@@ -0,0 +1,32 @@
+import pytest
+
+from Dorra.EnergiePl import ModeleGaz
+from Dorra.incidence import ReseauIndexe
+
+
+def reseau_incomplet():
+    #le coût de l'arc B -> C est oublié
+    arcs = [('A', 'B'), ('B', 'C')]
+    return {
+        'Noeuds': ['A', 'B', 'C'],
+        'Arcs': arcs,
+        'Bilan': {'A': 5.0, 'B': 0.0, 'C': -5.0},
+        'Capacite': dict.fromkeys(arcs, 10.0),
+        'Cout_Var': {('A', 'B'): 1.0},
+    }
+
+
+def test_colonne_obligatoire_incomplete():
+    reseau = ReseauIndexe(['A', 'B', 'C'], [('A', 'B'), ('B', 'C')])
+
+    with pytest.raises(KeyError, match="'B', 'C'"):
+        reseau.valeurs_arcs({('A', 'B'): 1.0})
+    assert reseau.valeurs_arcs({('A', 'B'): 1.0}, 0.0).tolist() == [1.0, 0.0]
+
+
+@pytest.mark.parametrize('matriciel', [False, True])
+def test_cout_manquant_signale(matriciel):
+    r = ModeleGaz(reseau_incomplet()).resoudre(matriciel=matriciel)
+
+    assert 'cout_total' not in r
+    assert r['statut_text'] == "Erreur générale : ('B', 'C')"
@@ -0,0 +1,27 @@
+import pytest
+
+from Dorra.weymouth import ModeleGazWeymouth
+
+
+def reseau_cul_de_sac():
+    #l'arc A -> T ne peut transporter aucun débit (T a un bilan nul) : borne serrée U = 0
+    return {
+        'Noeuds': ['S', 'A', 'T'],
+        'Arcs': [('S', 'A'), ('A', 'T')],
+        'Bilan': {'S': 10.0, 'A': -10.0, 'T': 0.0},
+        'Capacite': {('S', 'A'): 50.0, ('A', 'T'): 50.0},
+        'Cout_Var': {('S', 'A'): 1.0, ('A', 'T'): 1.0},
+        'Perte_Charge': {('S', 'A'): 0.01, ('A', 'T'): 0.01},
+        'Longueur': {('S', 'A'): 1.0, ('A', 'T'): 1.0},
+        'Pression_Min': {'S': 5.0, 'A': 4.0, 'T': 1.0},
+        'Pression_Max': {'S': 8.0, 'A': 8.0, 'T': 3.0},
+    }
+
+
+def test_arc_sans_debit_possible():
+    resultats = {serrer: ModeleGazWeymouth(reseau_cul_de_sac(), serrer_bornes=serrer).resoudre()
+                 for serrer in (True, False)}
+    for r in resultats.values():
+        assert r['statut_text'] == "OPTIMAL"
+    assert resultats[True]['cout_total'] == pytest.approx(resultats[False]['cout_total'])
+    assert resultats[True]['debits_optimaux'].get(('A', 'T'), 0.0) == pytest.approx(0.0)
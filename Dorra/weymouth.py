@@ -0,0 +1,155 @@
+import math
+
+import gurobipy as gp
+from gurobipy import GRB
+
+from Dorra.EnergiePl import ModeleGaz, rappel_progression
+
+
+class ModeleGazWeymouth(ModeleGaz):
+    """
+    Variante physique du modèle : pertes de charge de Weymouth.
+
+    Sur chaque arc actif avec Perte_Charge > 0, p_i² - p_j² = K·x|x| avec
+    K = Perte_Charge × Longueur (x >= 0 ici, donc x|x| = x²). Les variables
+    de pression sont les carrés π = p², bornés par Pression_Min² et
+    Pression_Max². La relation est approchée par l'extérieur :
+        - π_i - π_j >= K (2 x_k x - x_k²)  (tangentes, sous la parabole)
+        - π_i - π_j <= w, w = interpolation linéaire par morceaux de K x²
+          (sécantes, au-dessus de la parabole)
+    Après chaque résolution, une tangente ou un point de cassure est ajouté
+    au débit courant sur les arcs où l'écart dépasse la tolérance.
+
+    Les arcs étant orientés (x >= 0), une conduite sans débit imposerait
+    π_i = π_j. Sans variable d'activation (ni coûts fixes ni capacités
+    minimales), chaque arc reçoit donc une variable binaire « en service » :
+    un arc hors service (vanne fermée) a un débit nul et des pressions
+    découplées.
+    """
+
+    def resoudre(self, tolerance=1e-3, iterations_max=30, progression=None, annulation=None):
+        """
+        Args:
+            tolerance: Écart maximal admis sur p_i² - p_j² - K x², relatif à Pression_Max²
+            iterations_max: Nombre maximal de raffinements
+            progression, annulation: voir ModeleGaz.resoudre (valables pour chaque raffinement)
+
+        Returns:
+            dict resultats (mêmes clés que ModeleGaz.resoudre) avec en plus
+            'iterations' et 'ecart_weymouth' (écart maximal final)
+        """
+        self.resultats = {}
+        try:
+            #modèle de base sans la perte de charge linéaire ni les pressions
+            base_donnees = {k: v for k, v in self.donnees.items()
+                            if k not in ('Perte_Charge', 'Pression_Min', 'Pression_Max')}
+            base = ModeleGaz(base_donnees, serrer_bornes=self.serrer_bornes)
+
+            m = gp.Model("DistributionGaz_Weymouth")
+            m.setParam('OutputFlag', 0)
+            x, y, _ = base._construire_classique(m)
+
+            Noeuds = self.donnees['Noeuds']
+            reseau = self.reseau_indexe()
+            m_debit, _ = self._grands_m(reseau)
+            U = dict(zip(reseau.arcs, m_debit.tolist()))
+
+            # === PRESSIONS AU CARRÉ ===
+            p_min = self.donnees.get('Pression_Min', {})
+            p_max = self.donnees.get('Pression_Max', {})
+            pi = m.addVars(Noeuds, vtype=GRB.CONTINUOUS,
+                           lb={i: p_min.get(i, 1.0)**2 for i in Noeuds},
+                           ub={i: p_max.get(i, 10.0)**2 for i in Noeuds},
+                           name="PressionCarre")
+            echelle = max(p_max.get(i, 10.0)**2 for i in Noeuds) if Noeuds else 1.0
+
+            Perte_Charge = self.donnees.get('Perte_Charge', {})
+            Longueur = self.donnees.get('Longueur', {})
+            K = {a: Perte_Charge[a]*Longueur.get(a, 1.0) for a in reseau.arcs
+                 if Perte_Charge.get(a, 0) > 0}
+            #arc sans débit possible (U = 0 : cul-de-sac, capacité nulle) : fermé,
+            #pressions découplées comme un arc hors service
+            for a in [a for a in K if U[a] <= 0]:
+                x[a].UB = 0.0
+                del K[a]
+
+            if y is not None:
+                actif = y
+            else:
+                actif = m.addVars(list(K), vtype=GRB.BINARY, name="EnService")
+                m.addConstrs((x[a] <= U[a]*actif[a] for a in K), name="Service")
+
+            def sur_arc_actif(arc, contrainte, nom):
+                #contrainte imposée seulement si l'arc est en service
+                m.addGenConstrIndicator(actif[arc], True, contrainte, name=nom)
+
+            def tangente(arc, xk):
+                i, j = arc
+                sur_arc_actif(arc, pi[i] - pi[j] - 2*K[arc]*xk*x[arc] >= -K[arc]*xk*xk,
+                              f"Tangente_{i}_{j}_{len(tangentes[arc])}")
+                tangentes[arc].append(xk)
+
+            def secante(arc):
+                i, j = arc
+                if arc in pwl:
+                    m.remove(pwl[arc])
+                pts = sorted(cassures[arc])
+                pwl[arc] = m.addGenConstrPWL(x[arc], w[arc], pts, [K[arc]*t*t for t in pts],
+                                             name=f"Secante_{i}_{j}")
+
+            # === APPROXIMATION INITIALE ===
+            w, pwl, tangentes, cassures = {}, {}, {}, {}
+            for arc in K:
+                i, j = arc
+                w[arc] = m.addVar(lb=0.0, name=f"Parabole_{i}_{j}")
+                sur_arc_actif(arc, pi[i] - pi[j] - w[arc] <= 0, f"Weymouth_{i}_{j}")
+                tangentes[arc] = []
+                for xk in (0.0, 0.5*U[arc], U[arc]):
+                    tangente(arc, xk)
+                cassures[arc] = {0.0, 0.5*U[arc], U[arc]}
+                secante(arc)
+
+            # === RAFFINEMENT ===
+            rappel = None
+            if progression is not None or annulation is not None:
+                rappel = rappel_progression(progression, annulation)
+            iteration, ecart_max = 0, 0.0
+            while True:
+                iteration += 1
+                m.optimize(rappel)
+                if m.SolCount == 0 or m.status != GRB.OPTIMAL:
+                    break
+                ecart_max, a_raffiner = 0.0, []
+                for arc in K:
+                    if actif[arc].X < 0.5:
+                        continue
+                    i, j = arc
+                    xv = x[arc].X
+                    ecart = pi[i].X - pi[j].X - K[arc]*xv*xv
+                    if abs(ecart) > tolerance*echelle:
+                        a_raffiner.append((arc, xv, ecart))
+                    ecart_max = max(ecart_max, abs(ecart))
+                if not a_raffiner or iteration >= iterations_max:
+                    break
+                for arc, xv, ecart in a_raffiner:
+                    if ecart < 0:
+                        tangente(arc, xv)
+                    elif xv not in cassures[arc]:
+                        cassures[arc].add(xv)
+                        secante(arc)
+
+            self._lire_resultats(m, x, y, None)
+            self.resultats['iterations'] = iteration
+            if 'debits_optimaux' in self.resultats:
+                self.resultats['pressions'] = {i: math.sqrt(max(pi[i].X, 0.0)) for i in Noeuds}
+            if m.status == GRB.OPTIMAL:
+                self.resultats['ecart_weymouth'] = ecart_max
+                if ecart_max > tolerance*echelle:
+                    self.resultats['statut_text'] = "APPROXIMATION NON CONVERGÉE"
+
+        except gp.GurobiError as e:
+            self.resultats['statut_text']=f"Erreur Gurobi : {e.message}"
+        except Exception as e:
+            self.resultats['statut_text']=f"Erreur générale : {str(e)}"
+
+        return self.resultats
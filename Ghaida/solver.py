@@ -1,10 +1,31 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
 import pandas as pd
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
 import gurobipy as gp
 from gurobipy import GRB
-from typing import Dict, List, Tuple
+from typing import Dict, List, NamedTuple, Tuple
 
 from Ghaida.data import DEFAULT_THRESHOLDS
 
+# (column, threshold key, constraint name) of the per-unit resource rows
+RESOURCE_ROWS = [
+    ('lab_hours', 'total_lab_hours_per_week', 'lab_hours'),
+    ('human_hours', 'human_hours_available', 'human_hours'),
+    ('cost_usd', 'total_budget_usd', 'budget'),
+    ('reagent_A_ml', 'reagent_A_ml_available', 'reagent_A'),
+    ('reagent_B_g', 'reagent_B_g_available', 'reagent_B'),
+    ('reagent_C_mmol', 'reagent_C_mmol_available', 'reagent_C'),
+]
+INSTRUMENT_COLUMNS = ['instr_HPLC', 'instr_GC', 'instr_Microscope', 'instr_MassSpec']
+
+# dependency graphs already parsed, by _dependency_key (oldest dropped first)
+GRAPH_CACHE_SIZE = 8
+_graph_cache = OrderedDict()
+
 
 def parse_dependencies_string(s: str) -> List[str]:
     if not s:
@@ -14,11 +35,194 @@ def parse_dependencies_string(s: str) -> List[str]:
         s = s[1:-1]
     if not s:
         return []
-    parts = [p.strip() for p in s.split(',') if p.strip()]
+    parts = [p.strip().strip('"\'').strip() for p in s.split(',')]
+    parts = [p for p in parts if p]
     return parts
 
 
-def build_and_solve_gurobi(df: pd.DataFrame, thresholds: Dict, time_limit: int = 30) -> Tuple[pd.DataFrame, Dict]:
+def resource_matrix(df: pd.DataFrame) -> np.ndarray:
+    # one row per resource / instrument, one column per experiment
+    cols = [c for c, _, _ in RESOURCE_ROWS] + INSTRUMENT_COLUMNS
+    return df[cols].to_numpy(dtype=float).T
+
+
+def resource_rhs(thresholds: Dict) -> np.ndarray:
+    instr_counts = thresholds.get('instrument_counts', DEFAULT_THRESHOLDS['instrument_counts'])
+    rhs = [thresholds.get(key, DEFAULT_THRESHOLDS[key]) for _, key, _ in RESOURCE_ROWS]
+    rhs += [instr_counts.get(c, 0) for c in INSTRUMENT_COLUMNS]
+    return np.array(rhs, dtype=float)
+
+
+def normalized_safety_limits(thresholds: Dict) -> Dict[int, int]:
+    safety_limits = thresholds.get('safety_limits', DEFAULT_THRESHOLDS.get('safety_limits', {}))
+    normalized = {}
+    for k, v in safety_limits.items():
+        try:
+            normalized[int(k)] = int(v)
+        except Exception:
+            continue
+    return normalized
+
+
+class DependencyGraph(NamedTuple):
+    child: np.ndarray       # positions of the experiments with a prerequisite
+    parent: np.ndarray      # positions of their prerequisites (x[child] <= x[parent])
+    unknown: List[Tuple[str, str]]  # (experiment id, unknown prerequisite id)
+    cyclic: List[str]       # experiments caught in circular dependencies
+    raw_edges: int          # edges before removing duplicates
+
+
+def _on_cycle(n: int, child: np.ndarray, parent: np.ndarray) -> np.ndarray:
+    # experiments in a strongly connected component of size > 1, or depending on themselves
+    graph = sp.csr_matrix((np.ones(len(child)), (child, parent)), shape=(n, n))
+    _, labels = connected_components(graph, directed=True, connection='strong')
+    mask = np.bincount(labels, minlength=n)[labels] > 1
+    mask[child[child == parent]] = True
+    return mask
+
+
+def _dependency_key(df: pd.DataFrame) -> str:
+    # per-row hashes in row order: the graph stores positions, so a reordered frame needs a new graph
+    hashes = pd.util.hash_pandas_object(df[['id', 'dependencies']], index=False).to_numpy()
+    return hashlib.sha1(hashes.tobytes()).hexdigest()
+
+
+def dependency_graph(df: pd.DataFrame) -> DependencyGraph:
+    """
+    Parses the dependencies column once (vectorized) into prerequisite edges.
+
+    Unknown ids are reported and ignored, duplicate edges are dropped and
+    circular dependencies are reported (the rows stay valid: everything on a
+    cycle is selected together). Edges implied by a chain (A needs B, B needs
+    C, so A needs C) are kept: the extra rows are harmless and finding them
+    costs far more than the model saves. The graph is cached by the content of
+    the id and dependencies columns, in row order (child/parent are row
+    positions), so any frame with the same rows reuses it.
+    """
+    key = _dependency_key(df)
+    if key in _graph_cache:
+        _graph_cache.move_to_end(key)
+        return _graph_cache[key]
+
+    n = len(df)
+    ids = df['id'].astype(str).to_numpy()
+    deps = (df['dependencies'].astype(str).str.strip()
+            .str.replace(r'^\[|\]$', '', regex=True)
+            .set_axis(np.arange(n)).str.split(',').explode()
+            .str.strip().str.strip('"\'').str.strip())
+    deps = deps[deps.notna() & (deps != '')]
+    positions = pd.Series(np.arange(n), index=ids)
+    positions = positions[~positions.index.duplicated()]
+    parent = positions.reindex(deps.to_numpy()).to_numpy()
+    known = ~np.isnan(parent)
+    unknown = list(zip(ids[deps.index[~known]], deps[~known]))
+    child = deps.index.to_numpy()[known].astype(int)
+    parent = parent[known].astype(int)
+    raw_edges = len(child)
+
+    edges = np.unique(child*n + parent)
+    child, parent = edges // n, edges % n
+    cyclic = ids[_on_cycle(n, child, parent)].tolist()
+
+    graph = DependencyGraph(child, parent, unknown, cyclic, raw_edges)
+    _graph_cache[key] = graph
+    while len(_graph_cache) > GRAPH_CACHE_SIZE:
+        _graph_cache.popitem(last=False)
+    return graph
+
+
+class KnapsackModel:
+    """
+    Persistent lab knapsack for one dataset.
+
+    The model (variables, objective, resource/instrument rows, one row per
+    safety level present in the data, dependency rows) is built once;
+    solve() only writes the new thresholds into the right-hand sides and
+    warm-starts from the previous selection. A safety level without a limit
+    gets a non-binding right-hand side (its number of experiments).
+    """
+
+    def __init__(self, df: pd.DataFrame, time_limit: int = 30):
+        self.df = df
+        self.graph = dependency_graph(df)
+        self.previous = None
+
+        m = self.model = gp.Model('multidim_knapsack')
+        m.setParam('OutputFlag', 0)
+        m.setParam('TimeLimit', time_limit)
+
+        n = len(df)
+        x = self.x = m.addMVar(n, vtype=GRB.BINARY, name='x')
+        m.setObjective(df['value'].to_numpy(dtype=float) @ x, GRB.MAXIMIZE)
+
+        self.resources = m.addMConstr(resource_matrix(df), x, '<', resource_rhs(DEFAULT_THRESHOLDS),
+                                      name='resources')
+
+        safety = df['safety_level'].to_numpy(dtype=float).astype(int)
+        self.levels, self.level_counts = np.unique(safety, return_counts=True)
+        self.safety = None
+        if len(self.levels):
+            A = (safety[None, :] == self.levels[:, None]).astype(float)
+            self.safety = m.addMConstr(A, x, '<', self.level_counts.astype(float), name='max_level')
+
+        if len(self.graph.child):
+            m.addConstr(x[self.graph.child] <= x[self.graph.parent], name='dep')
+
+    def solve(self, thresholds: Dict, time_limit: int = None) -> Tuple[pd.DataFrame, Dict]:
+        m, x = self.model, self.x
+        if time_limit is not None:
+            m.setParam('TimeLimit', time_limit)
+        self.resources.RHS = resource_rhs(thresholds)
+        if self.safety is not None:
+            limits = normalized_safety_limits(thresholds)
+            caps = [limits[lvl] if limits.get(lvl, 0) > 0 else cnt
+                    for lvl, cnt in zip(self.levels.tolist(), self.level_counts.tolist())]
+            self.safety.RHS = np.array(caps, dtype=float)
+        if self.previous is not None:
+            x.Start = self.previous
+
+        m.optimize()
+
+        if m.SolCount > 0:
+            mask = x.X > 0.5
+            self.previous = mask.astype(float)
+            result_df = self.df[mask].copy()
+            obj_val = m.ObjVal
+        else:
+            result_df = self.df.iloc[0:0].copy()
+            obj_val = None
+        result_info = {'status': m.status, 'obj_val': obj_val}
+        if self.graph.unknown or self.graph.cyclic:
+            result_info['dependency_issues'] = {'unknown': self.graph.unknown,
+                                                'cyclic': self.graph.cyclic}
+        return result_df, result_info
+
+    def dispose(self):
+        self.model.dispose()
+
+
+def build_and_solve_gurobi(df: pd.DataFrame, thresholds: Dict, time_limit: int = 30,
+                           matrix: bool = True) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Selects the experiments maximizing total value under the lab thresholds.
+
+    With matrix=True the resource columns are read once into a NumPy matrix
+    and every family of rows (resources and instruments, safety levels,
+    dependencies) is added with a single matrix-API call, and dependencies
+    come from the cached dependency_graph; matrix=False keeps the row-by-row
+    quicksum construction. For repeated solves on the same dataset, keep a
+    KnapsackModel instead.
+    """
+    if not matrix:
+        return _build_and_solve_rows(df, thresholds, time_limit)
+    knapsack = KnapsackModel(df, time_limit)
+    try:
+        return knapsack.solve(thresholds)
+    finally:
+        knapsack.dispose()
+
+
+def _build_and_solve_rows(df: pd.DataFrame, thresholds: Dict, time_limit: int = 30) -> Tuple[pd.DataFrame, Dict]:
     m = gp.Model('multidim_knapsack')
     m.setParam('OutputFlag', 0)
     m.setParam('TimeLimit', time_limit)
@@ -0,0 +1,67 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Ghaida.data import DEFAULT_THRESHOLDS, load_dataset
+from Ghaida.solver import (build_and_solve_gurobi, dependency_graph, parse_dependencies_string,
+                           _dependency_key)
+
+
+def _respects_dependencies(selected):
+    chosen = set(selected['id'].astype(str))
+    for _, row in selected.iterrows():
+        for dep in parse_dependencies_string(str(row['dependencies'])):
+            if dep not in chosen:
+                return False
+    return True
+
+
+def test_reordered_rows_rebuild_dependency_graph():
+    df, _ = load_dataset()
+    thresholds = dict(DEFAULT_THRESHOLDS, total_budget_usd=15000.0)
+    dependency_graph(df)
+
+    reordered = df.sort_values('value').reset_index(drop=True)
+    selected, info = build_and_solve_gurobi(reordered, thresholds)
+    _, expected = build_and_solve_gurobi(reordered, thresholds, matrix=False)
+
+    assert info['obj_val'] == pytest.approx(expected['obj_val'])
+    assert _respects_dependencies(selected)
+
+
+def test_only_experiments_on_a_cycle_are_circular():
+    df, _ = load_dataset()
+    df = df.head(6).copy()
+    df['id'] = ['A', 'B', 'X', 'C', 'D', 'E']
+    # A <-> B, B -> X -> C, C <-> D, E depends on itself
+    df['dependencies'] = ['["B"]', '["A", "X"]', '["C"]', '["D"]', '["C"]', '["E"]']
+
+    assert sorted(dependency_graph(df).cyclic) == ['A', 'B', 'C', 'D', 'E']
+
+
+def test_dependency_graph_on_deep_random_dag_is_fast():
+    n = 20000
+    rng = np.random.default_rng(0)
+    ids = [f'E{i:05d}' for i in range(n)]
+    deps = ['[]' if i == 0 else
+            '[' + ', '.join(f'"{ids[p]}"' for p in rng.choice(np.arange(max(0, i - 50), i),
+                                                              size=min(2, i), replace=False)) + ']'
+            for i in range(n)]
+    df = pd.DataFrame({'id': ids, 'dependencies': deps})
+
+    start = time.perf_counter()
+    graph = dependency_graph(df)
+    assert time.perf_counter() - start < 5.0
+    assert len(graph.child) == graph.raw_edges == 2*n - 3
+    assert not graph.cyclic
+
+
+def test_solving_leaves_the_dataframe_usable():
+    df, _ = load_dataset()
+    selected, _ = build_and_solve_gurobi(df, DEFAULT_THRESHOLDS)
+
+    assert not df.attrs and not selected.attrs
+    assert len(pd.concat([df.iloc[:5], df.iloc[5:]])) == len(df)
+    assert _dependency_key(df.sort_values('value')) != _dependency_key(df)
@@ -1,3 +1,5 @@
+import traceback
+
 import pandas as pd
 from qtpy.QtWidgets import *
 from qtpy.QtCore import Qt, QAbstractTableModel
@@ -8,7 +10,7 @@ import numpy as np
 from typing import Dict, List, Tuple, Optional
 
 from Ghaida.data import load_dataset, save_dataset, DEFAULT_THRESHOLDS, REQUIRED_COLUMNS, next_enumber_id
-from Ghaida.solver import build_and_solve_gurobi
+from Ghaida.solver import KnapsackModel
 
 
 class PandasModel(QAbstractTableModel):
@@ -353,6 +355,8 @@ class MainWindow(QWidget):
         self.obj_display = QLineEdit()
         self.obj_display.setReadOnly(True)
         self.last_results_df = pd.DataFrame(columns=self.df.columns)
+        # persistent model of the loaded dataset: new thresholds only update its RHS
+        self.knapsack = None
         self.last_obj_val = None
 
         right_top = QVBoxLayout()
@@ -453,12 +457,27 @@ class MainWindow(QWidget):
     def solve_model(self):
         thresholds = self.gather_thresholds()
         try:
-            res_df, info = build_and_solve_gurobi(self.df, thresholds, time_limit=30)
+            if self.knapsack is None or self.knapsack.df is not self.df:
+                if self.knapsack is not None:
+                    self.knapsack.dispose()
+                self.knapsack = KnapsackModel(self.df, time_limit=30)
+            res_df, info = self.knapsack.solve(thresholds)
 
             # store for export
             self.last_results_df = res_df.copy() if not res_df.empty else pd.DataFrame(columns=self.df.columns)
             self.last_obj_val = info.get('obj_val', None)
 
+            issues = info.get('dependency_issues')
+            if issues:
+                lines = []
+                if issues['unknown']:
+                    lines.append('Unknown prerequisites (ignored): ' + ', '.join(
+                        f'{i} -> {dep}' for i, dep in issues['unknown'][:10]))
+                if issues['cyclic']:
+                    lines.append('Circular dependencies (selected together or not at all): '
+                                 + ', '.join(issues['cyclic'][:10]))
+                QMessageBox.warning(self, 'Dependencies', '\n'.join(lines))
+
             if res_df.empty:
                 self.results_model.update(pd.DataFrame(columns=self.df.columns))
                 self.obj_display.setText('N/A')